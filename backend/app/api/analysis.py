@@ -1,9 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import List
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+
+from ..core.etags import not_modified
 from ..models.analysis import (
     AnalysisRunCreate,
     AnalysisRunListResponse,
     AnalysisRunResponse,
+    AnalysisSearchResponse,
     AnalysisStatsResponse,
     AnalysisType,
 )
@@ -24,7 +28,7 @@ async def save_analysis_run(
 ) -> AnalysisRunResponse:
     """Persist an analysis result for later review."""
     try:
-        return analysis_history_service.save_run(user_id=user_id, payload=payload)
+        return await analysis_history_service.save_run(user_id=user_id, payload=payload)
     except Exception as exc:  # noqa: BLE001 - surface as 500
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -32,20 +36,43 @@ async def save_analysis_run(
         ) from exc
 
 
+@router.post(
+    "/bulk",
+    response_model=List[AnalysisRunResponse],
+    status_code=status.HTTP_201_CREATED,
+)
+async def import_analysis_runs(
+    payloads: List[AnalysisRunCreate],
+    user_id: str = Depends(get_current_user_id),
+) -> List[AnalysisRunResponse]:
+    """Import many analysis results at once (e.g. migrating history)."""
+    try:
+        return await analysis_history_service.save_runs(user_id=user_id, payloads=payloads)
+    except Exception as exc:  # noqa: BLE001 - surface as 500
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"分析結果のインポートに失敗しました: {exc}",
+        ) from exc
+
+
 @router.get("/", response_model=AnalysisRunListResponse)
 async def list_analysis_runs(
+    request: Request,
+    response: Response,
     analysis_type: AnalysisType | None = Query(
         default=None, description="Filter by analysis type if specified"
     ),
     limit: int = Query(default=10, ge=1, le=50),
     cursor: str | None = Query(
         default=None,
-        description="Fetch records created before this ISO timestamp",
+        description="Opaque cursor from a previous page's next_cursor",
     ),
     user_id: str = Depends(get_current_user_id),
 ) -> AnalysisRunListResponse:
     """Return paginated analysis history for the authenticated user."""
-    return analysis_history_service.list_runs(
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
+    return await analysis_history_service.list_runs(
         user_id=user_id,
         analysis_type=analysis_type,
         limit=limit,
@@ -55,20 +82,55 @@ async def list_analysis_runs(
 
 @router.get("/stats", response_model=AnalysisStatsResponse)
 async def get_analysis_stats(
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
 ) -> AnalysisStatsResponse:
     """Return aggregated stats for analysis history."""
-    return analysis_history_service.get_stats(user_id=user_id)
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
+    return await analysis_history_service.get_stats(user_id=user_id)
+
+
+@router.get("/search", response_model=AnalysisSearchResponse)
+async def search_analysis_runs(
+    request: Request,
+    response: Response,
+    q: str = Query(
+        ...,
+        min_length=1,
+        max_length=200,
+        description="Words to find in keywords, summaries, video titles, channel names and insights",
+    ),
+    analysis_type: AnalysisType | None = Query(
+        default=None, description="Filter by analysis type if specified"
+    ),
+    limit: int = Query(default=20, ge=1, le=50),
+    user_id: str = Depends(get_current_user_id),
+) -> AnalysisSearchResponse:
+    """Full-text search over the authenticated user's analysis history."""
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
+    return await analysis_history_service.search_runs(
+        user_id=user_id,
+        query=q,
+        analysis_type=analysis_type,
+        limit=limit,
+    )
 
 
 @router.get("/{analysis_id}", response_model=AnalysisRunResponse)
 async def get_analysis_run(
     analysis_id: str,
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
 ) -> AnalysisRunResponse:
     """Return a single analysis run."""
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
     try:
-        return analysis_history_service.get_run(user_id=user_id, analysis_id=analysis_id)
+        return await analysis_history_service.get_run(user_id=user_id, analysis_id=analysis_id)
     except LookupError as exc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -86,7 +148,7 @@ async def delete_analysis_run(
 ) -> None:
     """Delete an analysis run."""
     try:
-        analysis_history_service.delete_run(user_id=user_id, analysis_id=analysis_id)
+        await analysis_history_service.delete_run(user_id=user_id, analysis_id=analysis_id)
     except LookupError as exc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -3,14 +3,15 @@ from uuid import UUID
 from typing import List, Dict, Any
 import logging
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from supabase import Client
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from supabase import AsyncClient
 
 from ..models.channel import Channel, ChannelCreate
 from ..models.analysis import AnalysisRunListResponse, AnalysisStatsResponse
 from ..services.channel_service import ChannelService
 from ..services.analysis_history import analysis_history_service
-from ..core.database import get_supabase
+from ..core.database import get_async_supabase
+from ..core.etags import not_modified
 from .deps import get_current_user_id
 
 logger = logging.getLogger(__name__)
@@ -18,7 +19,7 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
-def get_channel_service(supabase: Client = Depends(get_supabase)) -> ChannelService:
+def get_channel_service(supabase: AsyncClient = Depends(get_async_supabase)) -> ChannelService:
     return ChannelService(supabase)
 
 
@@ -42,10 +43,14 @@ async def create_channel(
 
 @router.get("/", response_model=List[Channel])
 async def get_channels(
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
     service: ChannelService = Depends(get_channel_service),
 ):
     """登録済みのチャンネル一覧を取得する"""
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
     try:
         user_uuid = UUID(user_id)
         return await service.get_channels_by_user(user_id=user_uuid)
@@ -72,27 +77,35 @@ async def delete_channel(
 @router.get("/{channel_id}/stats", response_model=AnalysisStatsResponse)
 async def get_channel_stats(
     channel_id: UUID,
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
 ):
     """特定のチャンネルの統計情報を取得する"""
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
     try:
         user_uuid = UUID(user_id)
         # We can re-use the analysis history service here
-        return analysis_history_service.get_stats_by_channel(user_id=user_uuid, channel_id=channel_id)
+        return await analysis_history_service.get_stats_by_channel(user_id=user_uuid, channel_id=channel_id)
     except Exception as e:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(e))
 
 @router.get("/{channel_id}/analyses", response_model=AnalysisRunListResponse)
 async def get_channel_analyses(
     channel_id: UUID,
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
     limit: int = 10,
     cursor: str | None = None,
 ):
     """特定のチャンネルの分析履歴を取得する"""
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
     try:
         user_uuid = UUID(user_id)
-        return analysis_history_service.list_runs_by_channel(
+        return await analysis_history_service.list_runs_by_channel(
             user_id=user_uuid, channel_id=channel_id, limit=limit, cursor=cursor
         )
     except Exception as e:
@@ -101,13 +114,17 @@ async def get_channel_analyses(
 @router.get("/{channel_id}/top-keywords", response_model=List[Dict[str, Any]])
 async def get_channel_top_keywords(
     channel_id: UUID,
+    request: Request,
+    response: Response,
     user_id: str = Depends(get_current_user_id),
     limit: int = 10,
 ):
     """特定のチャンネルのよく使うキーワードを取得する"""
+    if (cached := not_modified(request, response, user_id)) is not None:
+        return cached
     try:
         user_uuid = UUID(user_id)
-        return analysis_history_service.get_top_keywords(
+        return await analysis_history_service.get_top_keywords(
             user_id=user_uuid, channel_id=channel_id, limit=limit
         )
     except Exception as e:
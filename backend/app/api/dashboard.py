@@ -1,5 +1,7 @@
 from fastapi import APIRouter
+from starlette.concurrency import run_in_threadpool
 
+from ..core.responses import fast_json
 from ..models.dashboard import DashboardOverviewRequest, DashboardOverviewResponse
 from ..services.dashboard_overview import dashboard_overview_service
 
@@ -11,7 +13,7 @@ async def dashboard_overview(
     request: DashboardOverviewRequest,
 ) -> DashboardOverviewResponse:
     """ダッシュボード向けの集約データを生成"""
-    return dashboard_overview_service.generate_overview(request)
+    return fast_json(await run_in_threadpool(dashboard_overview_service.generate_overview, request))
 
 
 @router.get("/health")
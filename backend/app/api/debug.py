@@ -0,0 +1,19 @@
+from typing import Any, Dict
+
+from fastapi import APIRouter, HTTPException
+
+from ..core.config import settings
+from ..core.tracing import timeline_store
+
+router = APIRouter()
+
+
+@router.get("/traces/{trace_id}", response_model=Dict[str, Any])
+async def get_trace(trace_id: str):
+    """X-Debug-Trace 付きリクエストの上流呼び出しタイムラインを取得する"""
+    if not settings.TRACE_TIMELINE_ENABLED:
+        raise HTTPException(status_code=404, detail="Trace timelines are disabled")
+    timeline = timeline_store.get(trace_id)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return timeline
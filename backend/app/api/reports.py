@@ -1,5 +1,10 @@
+import asyncio
+import logging
+from typing import AsyncIterator, Callable
+
 from fastapi import APIRouter, Response, File, UploadFile, HTTPException
-from fastapi.responses import PlainTextResponse
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from ..services.report_generator import report_generator
 from ..models.schemas import ChannelStrategyRequest, CombinedPlanRequest
 from ..services.trend_analyzer import trend_analyzer
@@ -8,55 +13,98 @@ from ..services.combined_planner import combined_planner
 from ..services.csv_analyzer import csv_analyzer
 from ..services.ai_planner import ai_planner
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 
+def _retrieve_exception(task: asyncio.Task) -> None:
+    # ストリームが待たずに終わったタスクの例外も取り出しておく
+    # （"Task exception was never retrieved" を出さない）
+    if not task.cancelled():
+        task.exception()
+
+
+def _in_threadpool(func: Callable, *args, **kwargs) -> asyncio.Task:
+    """スレッドプールでの実行をタスクとして開始する"""
+    task = asyncio.ensure_future(run_in_threadpool(func, *args, **kwargs))
+    task.add_done_callback(_retrieve_exception)
+    return task
+
+
+def _markdown_stream(sections: AsyncIterator[str], *tasks: asyncio.Task) -> StreamingResponse:
+    """Markdownのセクションを生成され次第クライアントへ送る
+
+    ``tasks`` は ``sections`` が待つタスク。クライアントの切断や失敗で
+    ストリームが途中で終わった場合は、まだ実行中のものをキャンセルする。
+    """
+
+    async def body() -> AsyncIterator[str]:
+        try:
+            async for section in sections:
+                yield section
+        except Exception as e:
+            # ヘッダー送信後はステータスコードを変えられないため本文で通知する
+            logger.exception("Markdown report generation failed")
+            yield f"\n\n> ⚠️ レポート生成に失敗しました: {e}\n"
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(body(), media_type="text/markdown")
+
+
 @router.post("/trends-markdown")
 async def generate_trends_markdown(request: ChannelStrategyRequest):
     """トレンド分析のMarkdownレポートを生成"""
-    result = trend_analyzer.analyze_trends(
+    result = _in_threadpool(
+        trend_analyzer.analyze_trends,
         keywords=request.persona.interests,
         platforms=["YouTube"],
-        max_results_per_platform=10
+        max_results_per_platform=10,
+        relevance_terms=request.persona.interests + request.persona.pain_points
     )
-    markdown = report_generator.generate_trends_report(result)
-    return PlainTextResponse(content=markdown, media_type="text/markdown")
+    return _markdown_stream(report_generator.stream_trends_report(result), result)
 
 
 @router.post("/viral-markdown")
 async def generate_viral_markdown(request: ChannelStrategyRequest):
     """バイラル動画のMarkdownレポートを生成"""
-    result = viral_finder.find_viral_videos(
+    result = _in_threadpool(
+        viral_finder.find_viral_videos,
         keywords=request.persona.interests,
         platforms=["YouTube"],
-        max_results=20
+        max_results=20,
+        relevance_terms=request.persona.interests + request.persona.pain_points
     )
-    markdown = report_generator.generate_viral_report(result)
-    return PlainTextResponse(content=markdown, media_type="text/markdown")
+    return _markdown_stream(report_generator.stream_viral_report(result), result)
 
 
 @router.post("/combined-plan")
 async def generate_combined_plan(request: CombinedPlanRequest):
     """トレンド+バイラル分析から企画案を生成"""
 
-    # トレンド分析
-    trends = trend_analyzer.analyze_trends(
-        keywords=request.trends_request.persona_keywords,
-        platforms=request.trends_request.platforms,
-        max_results_per_platform=request.trends_request.max_results_per_platform
-    )
-
-    # バイラル動画検索
-    viral = viral_finder.find_viral_videos(
-        keywords=request.viral_request.keywords,
-        min_viral_ratio=request.viral_request.min_viral_ratio,
-        max_subscribers=request.viral_request.max_subscribers,
-        platforms=request.viral_request.platforms,
-        max_results=request.viral_request.max_results
+    # トレンド分析とバイラル動画検索を並行して実行
+    trends, viral = await asyncio.gather(
+        run_in_threadpool(
+            trend_analyzer.analyze_trends,
+            keywords=request.trends_request.persona_keywords,
+            platforms=request.trends_request.platforms,
+            max_results_per_platform=request.trends_request.max_results_per_platform
+        ),
+        run_in_threadpool(
+            viral_finder.find_viral_videos,
+            keywords=request.viral_request.keywords,
+            min_viral_ratio=request.viral_request.min_viral_ratio,
+            max_subscribers=request.viral_request.max_subscribers,
+            platforms=request.viral_request.platforms,
+            max_results=request.viral_request.max_results
+        ),
     )
 
-    # 組み合わせて企画案生成
-    plan = combined_planner.generate_plan_from_research(
+    # 組み合わせて企画案生成（Gemini呼び出しはブロッキングなのでスレッドプールで）
+    plan = await run_in_threadpool(
+        combined_planner.generate_plan_from_research,
         trends=trends,
         viral=viral,
         channel_genre=request.channel_genre,
@@ -80,12 +128,9 @@ async def generate_analytics_markdown(file: UploadFile = File(...)):
         if not contents:
             raise HTTPException(status_code=400, detail="ファイルが空です")
 
-        # Analyze CSV
-        report = csv_analyzer.analyze_csv(contents)
-
-        # Generate markdown
-        markdown = report_generator.generate_analytics_report(report)
-        return PlainTextResponse(content=markdown, media_type="text/markdown")
+        # Analyze before responding so a failure is still a 500; only the rendering streams
+        report = await run_in_threadpool(csv_analyzer.analyze_csv, contents)
+        return StreamingResponse(report_generator.iter_analytics_report(report), media_type="text/markdown")
 
     except HTTPException:
         raise
@@ -96,9 +141,20 @@ async def generate_analytics_markdown(file: UploadFile = File(...)):
 @router.post("/planning-markdown")
 async def generate_planning_markdown(request: ChannelStrategyRequest):
     """AI企画案のMarkdownレポートを生成"""
-    result = ai_planner.generate_full_plan(request)
-    markdown = report_generator.generate_planning_report(result)
-    return PlainTextResponse(content=markdown, media_type="text/markdown")
+    # 戦略とカレンダーは独立しているので並行して生成し、届いた順に書き出す
+    strategy = _in_threadpool(
+        ai_planner.generate_channel_strategy,
+        request.persona,
+        request.channel_genre,
+        request.channel_name
+    )
+    calendar = _in_threadpool(
+        ai_planner.generate_content_calendar,
+        request.persona,
+        request.channel_genre,
+        weeks=4
+    )
+    return _markdown_stream(report_generator.stream_planning_report(strategy, calendar), strategy, calendar)
 
 
 @router.get("/health")
@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from ..core.responses import fast_json
 from ..models.trends import TrendingAnalysisRequest, TrendsAnalysisResponse
 from ..services.trend_analyzer import trend_analyzer
 
@@ -13,12 +15,14 @@ async def analyze_trends(request: TrendingAnalysisRequest):
     ペルソナキーワードに基づいて、各プラットフォームのトレンドショート動画を分析します。
     """
     try:
-        result = trend_analyzer.analyze_trends(
+        # 同時に来た同じ分析を1回にまとめられるよう、イベントループを塞がずに実行する
+        result = await run_in_threadpool(
+            trend_analyzer.analyze_trends,
             keywords=request.persona_keywords,
             platforms=request.platforms,
             max_results_per_platform=request.max_results_per_platform
         )
-        return result
+        return fast_json(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"トレンド分析に失敗しました: {str(e)}")
 
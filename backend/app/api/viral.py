@@ -1,4 +1,6 @@
 from fastapi import APIRouter, HTTPException
+from starlette.concurrency import run_in_threadpool
+from ..core.responses import fast_json
 from ..models.viral_finder import ViralFinderRequest, ViralFinderResponse
 from ..services.viral_finder import viral_finder
 
@@ -13,14 +15,15 @@ async def find_viral_videos(request: ViralFinderRequest):
     登録者数が少ないのに再生数が多い動画を見つけて分析します。
     """
     try:
-        result = viral_finder.find_viral_videos(
+        result = await run_in_threadpool(
+            viral_finder.find_viral_videos,
             keywords=request.keywords,
             min_viral_ratio=request.min_viral_ratio,
             max_subscribers=request.max_subscribers,
             platforms=request.platforms,
             max_results=request.max_results
         )
-        return result
+        return fast_json(result)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"バイラル動画検索に失敗しました: {str(e)}")
 
@@ -0,0 +1,156 @@
+import base64
+import glob
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from .config import settings
+from .metrics import registry
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - optional dependency
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# A compressed value is stored in place of the JSON value as {"zstd": base64}.
+# The zstd frame records the id of the dictionary it was written with.
+ENVELOPE_KEY = "zstd"
+# Plain values that look like an envelope (or like this escape) are stored
+# as {"$literal": value}, so a client's {"zstd": "..."} stays plain data.
+ESCAPE_KEY = "$literal"
+# Largest JSON a stored blob may decompress to; results are at most a few
+# hundred KB, so anything larger is not ours.
+MAX_DECODED_SIZE = 16 * 1024 * 1024
+# Dictionaries are read from <dir of ANALYSIS_HISTORY_ZSTD_DICT>/*.zdict.
+DICT_SUFFIX = ".zdict"
+
+BLOB_BYTES = registry.counter(
+    "history_blob_bytes_total",
+    "JSON bytes of analysis history result/meta blobs written, before (raw) and after (stored) compression.",
+    ("encoding", "stage"),
+)
+BLOB_CODEC_CPU = registry.histogram(
+    "history_blob_codec_cpu_seconds",
+    "CPU time spent compressing (encode) or decompressing (decode) one history blob.",
+    ("op",),
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1),
+)
+
+
+def _dumps(value: Any) -> bytes:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _wrapper_key(value: Any) -> Optional[str]:
+    if isinstance(value, dict) and len(value) == 1:
+        key = next(iter(value))
+        if key in (ENVELOPE_KEY, ESCAPE_KEY):
+            return key
+    return None
+
+
+class BlobCodec:
+    """Optional zstd compression of large ``result``/``meta`` values.
+
+    ``encode`` returns the value unchanged unless ``ANALYSIS_HISTORY_COMPRESSION``
+    is ``zstd`` and its JSON is at least ``ANALYSIS_HISTORY_COMPRESSION_MIN_SIZE``
+    bytes (values shaped like an envelope are escaped either way); ``decode``
+    passes plain values through, so rows written before the switch (or with
+    it off again) read the same. A blob that cannot be decoded is returned
+    as stored rather than failing the read. With a dictionary trained on
+    our own history (``python -m benchmarks.blob_compression --train``) the
+    repeated Japanese keys and phrases of even a few-KB result compress well.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._dictionaries: Optional[Dict[int, Any]] = None
+        self._write_dict: Any = None
+
+    @property
+    def enabled(self) -> bool:
+        return settings.ANALYSIS_HISTORY_COMPRESSION.lower() == "zstd" and zstandard is not None
+
+    def _load(self) -> Dict[int, Any]:
+        if self._dictionaries is None:
+            with self._lock:
+                if self._dictionaries is None:
+                    dictionaries: Dict[int, Any] = {}
+                    path = settings.ANALYSIS_HISTORY_ZSTD_DICT
+                    if path and zstandard is not None:
+                        directory = os.path.dirname(os.path.abspath(path))
+                        for name in sorted(glob.glob(os.path.join(directory, "*" + DICT_SUFFIX))):
+                            with open(name, "rb") as f:
+                                dictionary = zstandard.ZstdCompressionDict(f.read())
+                            dictionaries[dictionary.dict_id()] = dictionary
+                        with open(path, "rb") as f:
+                            self._write_dict = zstandard.ZstdCompressionDict(f.read())
+                        # Prepare the dictionary once instead of on every compressor
+                        self._write_dict.precompute_compress(level=settings.ANALYSIS_HISTORY_ZSTD_LEVEL)
+                        dictionaries[self._write_dict.dict_id()] = self._write_dict
+                    self._dictionaries = dictionaries
+        return self._dictionaries
+
+    def warm_up(self) -> None:
+        """Load the dictionaries before the first request (see main.warm_up_worker)."""
+        if settings.ANALYSIS_HISTORY_COMPRESSION.lower() == "zstd" and zstandard is None:
+            logger.warning("ANALYSIS_HISTORY_COMPRESSION=zstd needs `pip install zstandard`. Storing plain JSON.")
+        self._load()
+
+    def encode(self, value: Any) -> Any:
+        if _wrapper_key(value) is not None:
+            return {ESCAPE_KEY: value}
+        if not self.enabled or not value:
+            return value
+        raw = _dumps(value)
+        if len(raw) < settings.ANALYSIS_HISTORY_COMPRESSION_MIN_SIZE:
+            return value
+        self._load()
+        start = time.thread_time()
+        compressed = zstandard.ZstdCompressor(
+            level=settings.ANALYSIS_HISTORY_ZSTD_LEVEL, dict_data=self._write_dict
+        ).compress(raw)
+        BLOB_CODEC_CPU.observe(time.thread_time() - start, op="encode")
+        encoded = {ENVELOPE_KEY: base64.b64encode(compressed).decode("ascii")}
+        BLOB_BYTES.inc(len(raw), encoding="zstd", stage="raw")
+        BLOB_BYTES.inc(len(_dumps(encoded)), encoding="zstd", stage="stored")
+        return encoded
+
+    def decode(self, value: Any) -> Any:
+        key = _wrapper_key(value)
+        if key == ESCAPE_KEY:
+            return value[ESCAPE_KEY]
+        if key is None or not isinstance(value[ENVELOPE_KEY], str):
+            return value
+        if zstandard is None:
+            logger.warning("Analysis history blob is zstd-compressed; `pip install zstandard` to read it")
+            return value
+        start = time.thread_time()
+        try:
+            decoded = self._decompress(value[ENVELOPE_KEY])
+        except Exception as e:  # noqa: BLE001 - corrupt or foreign data; keep the row readable
+            logger.warning("Could not decode a compressed analysis history blob", extra={"error": repr(e)})
+            return value
+        BLOB_CODEC_CPU.observe(time.thread_time() - start, op="decode")
+        return decoded
+
+    def _decompress(self, encoded: str) -> Any:
+        data = base64.b64decode(encoded, validate=True)
+        params = zstandard.get_frame_parameters(data)
+        # max_output_size only bounds frames without a content size, so check the declared one too
+        if params.content_size != zstandard.CONTENTSIZE_UNKNOWN and params.content_size > MAX_DECODED_SIZE:
+            raise ValueError(f"blob declares {params.content_size} bytes, more than {MAX_DECODED_SIZE}")
+        dictionary = self._load().get(params.dict_id) if params.dict_id else None
+        if params.dict_id and dictionary is None:
+            raise LookupError(f"zstd dictionary {params.dict_id} not found next to ANALYSIS_HISTORY_ZSTD_DICT")
+        raw = zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data, max_output_size=MAX_DECODED_SIZE)
+        return json.loads(raw)
+
+
+# Singleton instance
+blob_codec = BlobCodec()
@@ -11,6 +11,122 @@ class Settings(BaseSettings):
     # Supabase
     SUPABASE_URL: str = ""
     SUPABASE_KEY: str = ""
+    SUPABASE_POOL_SIZE: int = 20
+    SUPABASE_TIMEOUT: float = 10.0
+
+    # Background refresh of registered channels' subscriber counts
+    CHANNEL_REFRESH_INTERVAL: float = 0  # seconds between refreshes; 0 disables
+    CHANNEL_REFRESH_JITTER: float = 0.1  # random delay after each period start, as a fraction of the interval
+    # Persistent handle/custom URL/username -> UC id index for channel registration
+    CHANNEL_HANDLE_INDEX_PATH: str = "channel_handles.db"
+    CHANNEL_RESOLVER_NEGATIVE_TTL: float = 86400  # seconds a failed lookup is remembered
+    CHANNEL_RESOLVER_SEARCH_FALLBACK: bool = True  # search (100 units) for unresolved custom URLs
+
+    # Analysis history storage ("supabase" or "sqlite")
+    ANALYSIS_HISTORY_BACKEND: str = "supabase"
+    ANALYSIS_HISTORY_SQLITE_PATH: str = "analysis_history.db"
+    # Fetch the following history page in the background after each page
+    ANALYSIS_HISTORY_PREFETCH: bool = False
+    ANALYSIS_HISTORY_PREFETCH_TTL: float = 30.0
+    ANALYSIS_HISTORY_PREFETCH_MAX_PAGES: int = 256
+    # Store a search document with each Supabase row for GET /analysis/search;
+    # enable only after migrations/003_analysis_history_search.sql (SQLite always indexes)
+    ANALYSIS_HISTORY_SEARCH: bool = False
+    # Save each video of a run's result once in analysis_videos (content-addressed)
+    # and keep only references in the run (Supabase needs migrations/004)
+    ANALYSIS_HISTORY_VIDEO_STORE: bool = False
+    # "zstd" stores result/meta JSON of at least COMPRESSION_MIN_SIZE bytes
+    # compressed (needs `pip install zstandard`); "off" stores plain JSON.
+    # Rows are read either way.
+    ANALYSIS_HISTORY_COMPRESSION: str = "off"
+    ANALYSIS_HISTORY_COMPRESSION_MIN_SIZE: int = 2048
+    ANALYSIS_HISTORY_ZSTD_LEVEL: int = 9
+    # Dictionary for new rows (python -m benchmarks.blob_compression --train);
+    # older *.zdict files in the same directory stay readable
+    ANALYSIS_HISTORY_ZSTD_DICT: str = ""
+
+    # Gemini
+    GEMINI_MODEL: str = "gemini-2.0-flash"
+    GEMINI_API_ENDPOINT: str = ""
+    GEMINI_TRANSPORT: str = ""
+    # Prompt token accounting: ask Gemini's count_tokens before each call
+    # instead of the local estimate (one extra round trip per call)
+    GEMINI_COUNT_TOKENS: bool = False
+    GEMINI_MAX_PROMPT_TOKENS: int = 8000  # larger prompts are logged
+    # Per-call-site input budgets, "<service>.<operation>=<tokens>,..."
+    PROMPT_TOKEN_BUDGETS: str = ""
+    # Serve static prompt instructions from a Gemini context cache instead of
+    # resending them; only instructions of at least MIN_TOKENS are cached
+    GEMINI_CONTEXT_CACHE: bool = False
+    GEMINI_CONTEXT_CACHE_MIN_TOKENS: int = 4096
+    GEMINI_CONTEXT_CACHE_TTL: int = 3600  # seconds
+
+    # YouTube Data API transport
+    YOUTUBE_API_ENDPOINT: str = ""
+    YOUTUBE_HTTP_POOL_SIZE: int = 10
+    YOUTUBE_HTTP_TIMEOUT: float = 15.0
+    YOUTUBE_HTTP_RETRIES: int = 2
+
+    # YouTube data source: live / synthetic / fixtures
+    YOUTUBE_DATA_PROVIDER: str = "live"
+    # Used when the live API has no key or fails:
+    # gemini (Gemini-generated mock) / synthetic / fixtures / none
+    YOUTUBE_FALLBACK_PROVIDER: str = "gemini"
+    YOUTUBE_FIXTURES_PATH: str = "youtube_fixtures.json"
+    YOUTUBE_FIXTURES_RECORD: bool = False  # record live responses to the fixtures file
+    SYNTHETIC_DATA_SEED: int = 0
+
+    # Worker processes started by run.py (uvicorn also reads WEB_CONCURRENCY)
+    WEB_CONCURRENCY: int = 1
+    # Cache shared by the YouTube, LLM and dashboard caches and the ETag
+    # versions: memory (per worker process) / sqlite (one WAL file that every
+    # worker on the host reads and writes; use it when WEB_CONCURRENCY > 1)
+    CACHE_BACKEND: str = "memory"
+    CACHE_SQLITE_PATH: str = "shared_cache.db"
+    CACHE_MAX_ENTRIES: int = 10000  # memory backend only
+    # Seconds an entry is kept; 0 disables that cache
+    YOUTUBE_CACHE_TTL: float = 900  # live API search/videos/channels responses
+    LLM_CACHE_TTL: float = 0  # Gemini responses for an identical prompt
+    DASHBOARD_CACHE_TTL: float = 300  # dashboard overviews per request
+
+    # Local index of viral candidates per keyword query, filled by live
+    # searches and the background crawler. /viral/find answers from it while
+    # a query's harvest is younger than MAX_AGE seconds; 0 (the default) disables it
+    VIRAL_INDEX_PATH: str = "viral_index.db"
+    VIRAL_INDEX_MAX_AGE: float = 0
+    VIRAL_INDEX_LIVE_TOPUP: bool = True  # search live when the index has too few matches
+    VIRAL_CRAWL_INTERVAL: float = 0  # seconds between crawls; 0 disables the crawler
+    VIRAL_CRAWL_JITTER: float = 0.1  # random delay after each period start, as a fraction of the interval
+    VIRAL_CRAWL_MAX_QUERIES: int = 100  # queries harvested per crawl
+    VIRAL_CRAWL_LOOKBACK_DAYS: int = 30  # history window keywords are taken from
+
+    # Persona relevance (character n-gram TF-IDF, CPU only). Candidates below
+    # the minimum score are dropped before any per-video Gemini call; 0 keeps all
+    RELEVANCE_MIN_SCORE: float = 0.05
+    # Optional sentence-transformers model blended into the score
+    RELEVANCE_EMBEDDING_MODEL: str = ""
+
+    # Response encoding
+    FAST_JSON_RESPONSES: bool = False
+    RESPONSE_COMPRESSION: str = "off"  # off / gzip / br
+    RESPONSE_COMPRESSION_MIN_SIZE: int = 1024
+    RESPONSE_COMPRESSION_LEVEL: int = 6  # gzip 1-9, brotli 0-11
+
+    # Request tracing
+    SERVER_TIMING_ENABLED: bool = True
+    # Keep per-request JSON timelines for requests sent with X-Debug-Trace: 1
+    TRACE_TIMELINE_ENABLED: bool = False
+    TRACE_TIMELINE_MAX_ENTRIES: int = 200
+    OTEL_EXPORTER: str = ""  # "" / otlp / console
+    OTEL_SERVICE_NAME: str = "youtube-content-studio"
+
+    # Logging (JSON lines written by a background thread)
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"  # json / text
+    LOG_DEBUG_SAMPLE_RATE: float = 1.0  # fraction of requests whose DEBUG lines are kept
+
+    # Prometheus metrics at /metrics
+    METRICS_ENABLED: bool = True
 
     # CORS
     ALLOWED_ORIGINS: str = "http://localhost:5173,http://localhost:3000"
@@ -1,10 +1,65 @@
-from supabase import create_client, Client
-from ..core.config import settings
+import asyncio
+from functools import lru_cache
+from typing import Optional
 
-# Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+import httpx
+from supabase import AsyncClient, AsyncClientOptions, Client, create_client
+from ..core.config import settings
+from ..core.tracing import span
 
 
+@lru_cache(maxsize=1)
 def get_supabase() -> Client:
-    """Dependency to get Supabase client"""
-    return supabase
+    """Dependency to get the synchronous Supabase client"""
+    return create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+
+
+class TracedAsyncTransport(httpx.AsyncBaseTransport):
+    """httpx transport that records every PostgREST call as a ``supabase`` span."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport) -> None:
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        with span("supabase", f"{request.method} {request.url.path}"):
+            response = await self._transport.handle_async_request(request)
+            await response.aread()
+        return response
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+_async_supabase: Optional[AsyncClient] = None
+_async_supabase_lock = asyncio.Lock()
+
+
+async def get_async_supabase() -> AsyncClient:
+    """Dependency to get the shared async Supabase client.
+
+    A single client (and therefore a single httpx connection pool) is reused
+    by every request, so PostgREST calls keep their connections alive instead
+    of paying a new TLS handshake per query.
+    """
+    global _async_supabase
+    if _async_supabase is None:
+        async with _async_supabase_lock:
+            if _async_supabase is None:
+                http_client = httpx.AsyncClient(
+                    transport=TracedAsyncTransport(httpx.AsyncHTTPTransport(
+                        limits=httpx.Limits(
+                            max_connections=settings.SUPABASE_POOL_SIZE,
+                            max_keepalive_connections=settings.SUPABASE_POOL_SIZE,
+                        ),
+                    )),
+                    timeout=settings.SUPABASE_TIMEOUT,
+                )
+                _async_supabase = AsyncClient(
+                    settings.SUPABASE_URL,
+                    settings.SUPABASE_KEY,
+                    AsyncClientOptions(
+                        httpx_client=http_client,
+                        postgrest_client_timeout=settings.SUPABASE_TIMEOUT,
+                    ),
+                )
+    return _async_supabase
@@ -0,0 +1,119 @@
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Hashtags and punctuation carry no signal for title similarity.
+_TITLE_NOISE = re.compile(r"#\S+|[\s\W_]+")
+
+
+def _title_bigrams(title: str) -> set:
+    text = _TITLE_NOISE.sub("", unicodedata.normalize("NFKC", title).casefold())
+    if len(text) < 2:
+        return {text} if text else set()
+    return {text[i:i + 2] for i in range(len(text) - 1)}
+
+
+def title_similarity(titles: List[str]) -> np.ndarray:
+    """Pairwise Jaccard similarity of the titles' character bigrams.
+
+    Character bigrams work for Japanese titles, which have no spaces to split
+    words on. Returns an ``n x n`` matrix with ones on the diagonal.
+    """
+    grams = [_title_bigrams(title) for title in titles]
+    vocabulary: Dict[str, int] = {}
+    for gram_set in grams:
+        for gram in gram_set:
+            vocabulary.setdefault(gram, len(vocabulary))
+    matrix = np.zeros((len(titles), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, gram_set in enumerate(grams):
+        matrix[row, [vocabulary[gram] for gram in gram_set]] = 1.0
+    intersection = matrix @ matrix.T
+    sizes = matrix.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - intersection
+    similarity = np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+    np.fill_diagonal(similarity, 1.0)
+    return similarity
+
+
+def _published_age_days(published_at: str, now: datetime) -> float:
+    try:
+        published = datetime.fromisoformat(published_at.replace("Z", "+00:00"))
+    except ValueError:
+        return float("inf")
+    if published.tzinfo is None:
+        published = published.replace(tzinfo=timezone.utc)
+    return max((now - published).total_seconds() / 86400, 0.0)
+
+
+def select_diverse(
+    videos: List[Dict[str, Any]],
+    count: int,
+    seed: str,
+    relevance: Optional[np.ndarray] = None,
+    relevance_weight: float = 1.0,
+    view_weight: float = 1.0,
+    recency_weight: float = 0.5,
+    recency_half_life_days: float = 30.0,
+    channel_penalty: float = 0.75,
+    duplicate_threshold: float = 0.6,
+    duplicate_penalty: float = 1.0,
+    now: Optional[datetime] = None,
+) -> List[Dict[str, Any]]:
+    """Pick ``count`` videos that score well and differ from each other.
+
+    ``videos`` are ``videos().list`` items (``snippet`` and ``statistics``).
+    Each candidate's base score is its standardized log view count plus a
+    recency term that halves every ``recency_half_life_days``, plus the
+    persona ``relevance`` of each video scaled to its maximum. Selection is
+    greedy: every pick lowers the score of the remaining videos from the same
+    channel by ``channel_penalty`` and of similar titles by
+    ``duplicate_penalty`` times their similarity, and titles at least
+    ``duplicate_threshold`` similar to a pick are only taken once nothing
+    else is left.
+
+    Ties are broken by a small jitter derived from ``seed`` (the canonical
+    query), so the same candidates always give the same selection in the
+    same order.
+    """
+    if count <= 0 or not videos:
+        return []
+    if len(videos) <= count:
+        count = len(videos)
+
+    now = now or datetime.now(timezone.utc)
+    snippets = [video.get("snippet", {}) for video in videos]
+    views = np.log1p(np.array(
+        [float(video.get("statistics", {}).get("viewCount", 0) or 0) for video in videos]
+    ))
+    views_std = views.std()
+    view_score = (views - views.mean()) / views_std if views_std > 0 else np.zeros_like(views)
+    ages = np.array([_published_age_days(snippet.get("publishedAt", ""), now) for snippet in snippets])
+    recency = np.power(0.5, ages / recency_half_life_days)
+
+    rng = np.random.default_rng(int.from_bytes(hashlib.sha256(seed.encode("utf-8")).digest()[:8], "big"))
+    base = view_weight * view_score + recency_weight * recency + rng.uniform(0, 1e-6, len(videos))
+    if relevance is not None and relevance.max() > 0:
+        base += relevance_weight * relevance / relevance.max()
+
+    _, channel_index = np.unique([snippet.get("channelId", "") for snippet in snippets], return_inverse=True)
+    channel_picks = np.zeros(channel_index.max() + 1)
+    similarity = title_similarity([snippet.get("title", "") for snippet in snippets])
+    max_similarity = np.zeros(len(videos))
+    available = np.ones(len(videos), dtype=bool)
+
+    selected = []
+    for _ in range(count):
+        score = base - channel_penalty * channel_picks[channel_index] - duplicate_penalty * max_similarity
+        distinct = available & (max_similarity < duplicate_threshold)
+        pool = distinct if distinct.any() else available
+        pick = int(np.argmax(np.where(pool, score, -np.inf)))
+        selected.append(pick)
+        available[pick] = False
+        channel_picks[channel_index[pick]] += 1
+        np.maximum(max_similarity, similarity[pick], out=max_similarity)
+
+    return [videos[index] for index in selected]
@@ -0,0 +1,69 @@
+import hashlib
+from typing import Iterable, Optional
+
+from fastapi import Request, Response
+
+from .shared_cache import get_shared_cache
+from .tracing import record_cache_lookup
+
+CACHE_CONTROL = "private, no-cache"
+
+
+class UserVersions:
+    """Per-user data version, bumped by every write to a user's channels or history.
+
+    ETags are ``W/"<epoch>.<user hash>.<version>"``. Versions are counters
+    in the shared cache, so with ``CACHE_BACKEND=sqlite`` every worker
+    hands out the same tag; with the in-memory backend they live in this
+    process only. The cache's epoch changes whenever its counters may have
+    been reset, so an old ETag can never match again; clients simply
+    refetch once.
+    """
+
+    def version(self, user_id: str) -> int:
+        return get_shared_cache().counter(f"user_version:{user_id}")
+
+    def bump(self, user_id: str) -> None:
+        get_shared_cache().incr(f"user_version:{user_id}")
+
+    def bump_many(self, user_ids: Iterable[str]) -> None:
+        for user_id in set(map(str, user_ids)):
+            self.bump(user_id)
+
+    def etag(self, user_id: str) -> str:
+        # The user hash keeps two users at the same version from sharing a tag.
+        user_hash = hashlib.blake2s(str(user_id).encode("utf-8"), digest_size=4).hexdigest()
+        return f'W/"{get_shared_cache().epoch}.{user_hash}.{self.version(user_id)}"'
+
+
+user_versions = UserVersions()
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/ prefixes are ignored on both sides.
+    tag = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == tag for candidate in if_none_match.split(","))
+
+
+def not_modified(request: Request, response: Response, user_id: str) -> Optional[Response]:
+    """Answer a conditional GET for data owned by ``user_id``.
+
+    Call it before touching the database: it returns a ``304`` response when
+    the client's ``If-None-Match`` still matches the user's version, and
+    otherwise sets the validator headers on ``response`` and returns
+    ``None``. The ETag is taken before the data is read, so a write racing
+    the read leaves the client with an older tag and a revalidation next
+    time, never a stale 304.
+    """
+    etag = user_versions.etag(user_id)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Vary": "X-User-Id"}
+    if_none_match = request.headers.get("if-none-match")
+    hit = if_none_match is not None and _matches(if_none_match, etag)
+    if if_none_match is not None:
+        record_cache_lookup("etag", hit)
+    if hit:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
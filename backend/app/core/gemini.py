@@ -0,0 +1,124 @@
+import hashlib
+import logging
+from typing import Optional
+
+import google.generativeai as genai
+
+from .config import settings
+from .shared_cache import cache_key, get_shared_cache
+from .tokens import count_prompt_tokens, estimate_tokens
+from .tracing import current_trace, span
+
+logger = logging.getLogger(__name__)
+
+
+def configure_gemini() -> None:
+    """Configure the google.generativeai client from settings.
+
+    ``GEMINI_API_ENDPOINT`` points the client at another host (e.g. the
+    fake Gemini server used by the benchmarks); custom endpoints are reached
+    over the REST transport so plain ``http://`` URLs work.
+    """
+    options = {"api_key": settings.GEMINI_API_KEY}
+    if settings.GEMINI_API_ENDPOINT:
+        options["transport"] = "rest"
+        options["client_options"] = {"api_endpoint": settings.GEMINI_API_ENDPOINT}
+    elif settings.GEMINI_TRANSPORT:
+        options["transport"] = settings.GEMINI_TRANSPORT
+    genai.configure(**options)
+
+
+class CachedResponse:
+    """A Gemini response served from the LLM cache; callers only read ``text``."""
+
+    usage_metadata = None
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+
+
+class TracedGenerativeModel(genai.GenerativeModel):
+    """``GenerativeModel`` that records each ``generate_content`` call as a span.
+
+    The prompt is counted before it is sent (see
+    :func:`app.core.tokens.count_prompt_tokens`); prompts over
+    ``GEMINI_MAX_PROMPT_TOKENS`` are logged. Prompt, completion and
+    context-cache token counts, taken from the response's ``usage_metadata``
+    when Gemini reports it, are stored on the span and added to the request
+    trace. Models built for a :class:`~app.core.prompts.PromptTemplate` also
+    tag the span with the template name.
+
+    With ``LLM_CACHE_TTL`` set, plain-text prompts are answered from the
+    shared cache when the same model, instruction and prompt were sent
+    within the TTL.
+    """
+
+    prompt_template: Optional[str] = None
+    static_tokens = 0
+    _cache_prefix: Optional[str] = None
+
+    def _llm_cache_key(self, contents: str) -> str:
+        if self._cache_prefix is None:
+            # Context-cached models have no system instruction of their own;
+            # the template name stands in for it (cache names change on refresh).
+            instruction = repr(getattr(self, "_system_instruction", None))
+            self._cache_prefix = cache_key(self.model_name, self.prompt_template, instruction)
+        return hashlib.blake2b(f"{self._cache_prefix}\n{contents}".encode("utf-8"), digest_size=16).hexdigest()
+
+    def generate_content(self, contents, *args, **kwargs):
+        ttl = settings.LLM_CACHE_TTL
+        key = None
+        if ttl > 0 and isinstance(contents, str) and not args and not kwargs:
+            key = self._llm_cache_key(contents)
+            text = get_shared_cache().lookup("llm", key)
+            if text is not None:
+                return CachedResponse(text)
+        response = self._generate_content(contents, *args, **kwargs)
+        if key is not None:
+            try:
+                get_shared_cache().set("llm", key, response.text, ttl)
+            except ValueError:  # blocked or empty candidate: not worth repeating
+                pass
+        return response
+
+    def _generate_content(self, contents, *args, **kwargs):
+        prompt_tokens = count_prompt_tokens(self, contents)
+        attributes = {"model": self.model_name}
+        if self.prompt_template:
+            attributes["template"] = self.prompt_template
+        with span("gemini", "generate_content", **attributes) as record:
+            if prompt_tokens > settings.GEMINI_MAX_PROMPT_TOKENS:
+                logger.warning(
+                    "Gemini prompt over budget",
+                    extra={
+                        "prompt_tokens": prompt_tokens,
+                        "max_prompt_tokens": settings.GEMINI_MAX_PROMPT_TOKENS,
+                        "caller": f"{record.service}.{record.caller}" if record.service else None,
+                    },
+                )
+            response = super().generate_content(contents, *args, **kwargs)
+
+            usage = getattr(response, "usage_metadata", None)
+            completion_tokens = getattr(usage, "candidates_token_count", 0) if usage else 0
+            if usage and getattr(usage, "prompt_token_count", 0):
+                prompt_tokens = usage.prompt_token_count
+            cached_tokens = getattr(usage, "cached_content_token_count", 0) if usage else 0
+            if not completion_tokens:
+                try:
+                    completion_tokens = estimate_tokens(response.text)
+                except ValueError:  # blocked or empty candidate
+                    completion_tokens = 0
+            record.attributes["prompt_tokens"] = prompt_tokens
+            record.attributes["completion_tokens"] = completion_tokens
+            if cached_tokens:
+                record.attributes["cached_tokens"] = cached_tokens
+            trace = current_trace()
+            if trace is not None:
+                trace.add_tokens(prompt_tokens, completion_tokens)
+            return response
+
+
+def create_gemini_model(system_instruction: Optional[str] = None) -> TracedGenerativeModel:
+    """Configure the client and return the model used by every service."""
+    configure_gemini()
+    return TracedGenerativeModel(settings.GEMINI_MODEL, system_instruction=system_instruction)
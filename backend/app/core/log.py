@@ -0,0 +1,145 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import threading
+import zlib
+from datetime import datetime, timezone
+from typing import IO, Optional
+
+from .config import settings
+from .tracing import current_trace
+
+# Attributes every LogRecord has; anything else was passed through ``extra=``.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "trace_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, trace id and extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        trace_id = getattr(record, "trace_id", None)
+        if trace_id:
+            entry["trace_id"] = trace_id
+        for key, value in vars(record).items():
+            if key not in _RESERVED and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DebugSampler(logging.Filter):
+    """Keep only a fraction of DEBUG records; other levels always pass.
+
+    Inside a request the decision is made per trace id, so a sampled request
+    keeps all of its debug lines and an unsampled one drops all of them.
+    """
+
+    def __init__(self, rate: float) -> None:
+        super().__init__()
+        self.rate = rate
+        self._threshold = int(max(0.0, min(rate, 1.0)) * 0xFFFFFFFF)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > logging.DEBUG or self.rate >= 1.0:
+            return True
+        trace = current_trace()
+        if trace is None:
+            return random.random() < self.rate
+        return zlib.crc32(trace.id.encode()) <= self._threshold
+
+
+class _ContextQueueHandler(logging.handlers.QueueHandler):
+    """``QueueHandler`` that only does the cheap work on the calling thread.
+
+    The stdlib ``prepare`` runs the formatter in the caller. Here the caller
+    only merges ``msg % args``, captures the trace id (a contextvar, only
+    readable on this thread) and renders a traceback if there is one.
+    JSON encoding and the write happen on the listener thread.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        trace = current_trace()
+        record.trace_id = trace.id if trace else None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_NOISY_LOGGERS = ("httpcore", "httpx", "hpack", "urllib3", "googleapiclient.discovery_cache")
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_setup_lock = threading.Lock()
+
+
+def setup_logging(
+    level: Optional[str] = None,
+    fmt: Optional[str] = None,
+    debug_sample_rate: Optional[float] = None,
+    stream: Optional[IO[str]] = None,
+) -> None:
+    """Route the root logger through a queue to a background writer thread.
+
+    Request threads only enqueue records; formatting and the blocking write
+    to ``stream`` (stderr by default) happen on the listener thread, so a
+    slow or contended stderr never stalls a request. Calling it again
+    replaces the previous configuration.
+    """
+    global _listener
+    level = (level or settings.LOG_LEVEL).upper()
+    fmt = (fmt or settings.LOG_FORMAT).lower()
+    rate = settings.LOG_DEBUG_SAMPLE_RATE if debug_sample_rate is None else debug_sample_rate
+
+    with _setup_lock:
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(
+            JsonFormatter() if fmt == "json"
+            else logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s")
+        )
+
+        log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+        handler = _ContextQueueHandler(log_queue)
+        handler.addFilter(DebugSampler(rate))
+
+        root = logging.getLogger()
+        previous = [h for h in root.handlers if isinstance(h, _ContextQueueHandler)]
+        root.addHandler(handler)
+        for existing in previous:
+            root.removeHandler(existing)
+        root.setLevel(level)
+        # Connection-level chatter from the HTTP clients drowns out our own
+        # DEBUG lines; keep those libraries at INFO or above.
+        for name in _NOISY_LOGGERS:
+            logging.getLogger(name).setLevel(max(logging.getLevelName(level), logging.INFO))
+
+        if _listener is not None:
+            _listener.stop()  # drains whatever the previous handler queued
+        _listener = logging.handlers.QueueListener(log_queue, output)
+        _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the writer thread."""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,327 @@
+import bisect
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .tracing import InstrumentationListener, OperationScope, Span, add_listener, current_trace
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+TOKEN_BUCKETS = (100, 250, 500, 1000, 2500, 5000, 10000, 25000, 50000, 100000)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+            *self.samples(),
+        ]
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(_Metric):
+    """Gauge that is either set directly or read from a callback at scrape time."""
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], float]] = None,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def samples(self) -> Iterable[str]:
+        if self._callback is not None:
+            try:
+                yield f"{self.name} {_format_value(self._callback())}"
+            except Exception:  # noqa: BLE001 - a broken callback must not break the scrape
+                pass
+            return
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total = self._values.setdefault(key, ([0] * (len(self.buckets) + 1), [0.0]))
+            counts[index] += 1
+            total[0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> Iterable[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total[0])) for key, (counts, total) in self._values.items())
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {cumulative}"
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = (), callback=None) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames, callback))
+
+    def histogram(
+        self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets=DEFAULT_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+UPSTREAM_DURATION = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Duration of calls to YouTube, Gemini, Supabase and SQLite.",
+    ("upstream", "method", "service", "operation", "status"),
+)
+SERVICE_OPERATION_DURATION = registry.histogram(
+    "service_operation_duration_seconds",
+    "Duration of instrumented service operations by outcome (ok, fallback, error).",
+    ("service", "operation", "outcome"),
+)
+SERVICE_FALLBACKS = registry.counter(
+    "service_fallbacks_total",
+    "Times a service answered with canned data instead of a real upstream result.",
+    ("service", "operation", "reason"),
+)
+CACHE_LOOKUPS = registry.counter(
+    "cache_lookups_total",
+    "In-process cache lookups by result (hit, miss).",
+    ("cache", "result"),
+)
+HTTP_REQUEST_DURATION = registry.histogram(
+    "http_request_duration_seconds",
+    "Duration of HTTP requests handled by the API.",
+    ("method", "handler", "status"),
+)
+HTTP_REQUESTS_IN_FLIGHT = registry.gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being handled.",
+)
+GEMINI_TOKENS = registry.counter(
+    "gemini_tokens_total",
+    "Gemini prompt, completion and context-cache tokens by calling service operation.",
+    ("service", "operation", "kind"),
+)
+HTTP_REQUEST_GEMINI_TOKENS = registry.histogram(
+    "http_request_gemini_tokens",
+    "Gemini tokens spent per HTTP request, for requests that called Gemini.",
+    ("handler", "kind"),
+    buckets=TOKEN_BUCKETS,
+)
+PROMPT_TRUNCATIONS = registry.counter(
+    "prompt_truncations_total",
+    "Prompt inputs cut to fit their per-call-site token budget.",
+    ("service", "operation"),
+)
+
+
+class MetricsListener(InstrumentationListener):
+    """Feeds the shared instrumentation hook into the metrics registry."""
+
+    def span_finished(self, span: Span) -> None:
+        UPSTREAM_DURATION.observe(
+            span.duration,
+            upstream=span.upstream,
+            method=span.operation,
+            service=span.service or "",
+            operation=span.caller or "",
+            status="error" if span.error else "ok",
+        )
+        if "prompt_tokens" in span.attributes:
+            labels = {"service": span.service or "", "operation": span.caller or ""}
+            GEMINI_TOKENS.inc(span.attributes["prompt_tokens"], kind="prompt", **labels)
+            GEMINI_TOKENS.inc(span.attributes["completion_tokens"], kind="completion", **labels)
+            if span.attributes.get("cached_tokens"):
+                GEMINI_TOKENS.inc(span.attributes["cached_tokens"], kind="cached", **labels)
+
+    def operation_finished(self, scope: OperationScope, duration: float, outcome: str) -> None:
+        SERVICE_OPERATION_DURATION.observe(
+            duration, service=scope.service, operation=scope.operation, outcome=outcome
+        )
+
+    def fallback(self, scope: Optional[OperationScope], reason: str) -> None:
+        SERVICE_FALLBACKS.inc(
+            service=scope.service if scope else "",
+            operation=scope.operation if scope else "",
+            reason=reason,
+        )
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        CACHE_LOOKUPS.inc(cache=cache, result="hit" if hit else "miss")
+
+    def prompt_truncated(self, scope: Optional[OperationScope]) -> None:
+        PROMPT_TRUNCATIONS.inc(
+            service=scope.service if scope else "",
+            operation=scope.operation if scope else "",
+        )
+
+
+add_listener(MetricsListener())
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request duration and in-flight requests.
+
+    Requests are labelled with the matched endpoint's name
+    (``get_analysis_run``) rather than the raw path, so ids do not blow up
+    the label cardinality. Unmatched paths are reported as ``unmatched``.
+    Gemini tokens are read from the request trace, so this middleware must
+    run inside :class:`~app.core.tracing.TracingMiddleware`.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            handler = getattr(scope.get("route"), "name", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start,
+                method=scope.get("method", ""),
+                handler=handler,
+                status=status,
+            )
+            trace = current_trace()
+            if trace is not None and (trace.prompt_tokens or trace.completion_tokens):
+                HTTP_REQUEST_GEMINI_TOKENS.observe(trace.prompt_tokens, handler=handler, kind="prompt")
+                HTTP_REQUEST_GEMINI_TOKENS.observe(trace.completion_tokens, handler=handler, kind="completion")
@@ -0,0 +1,73 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from .metrics import Counter, Gauge
+from .shared_cache import get_shared_cache
+
+logger = logging.getLogger(__name__)
+
+
+def clamp_jitter(jitter: float) -> float:
+    """Jitter setting as a fraction of the interval in [0, 0.9], so a run never slips into the next period."""
+    return min(max(jitter, 0.0), 0.9)
+
+
+class PeriodicJob:
+    """Background job run once per interval-aligned period by one worker.
+
+    Each worker wakes in every period at a random ``jitter`` fraction of the
+    interval after its start, so separate instances do not hit the API at
+    the same moment. Workers sharing the cache agree on the period, and
+    only the first to claim it in the shared cache runs ``job``; with the
+    in-memory cache every worker runs it. Results are counted in ``runs``
+    (``ok``/``error``) and successes stamped on ``last_success``.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        job: Callable[[], Awaitable[Any]],
+        runs: Counter,
+        last_success: Gauge,
+    ) -> None:
+        self.name = name
+        self._job = job
+        self._runs = runs
+        self._last_success = last_success
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self, interval: float, jitter: float) -> None:
+        while True:
+            now = time.time()
+            await asyncio.sleep(interval - now % interval + interval * random.uniform(0, jitter))
+            period = int(time.time() // interval)
+            if get_shared_cache().incr(f"{self.name}:{period}") > 1:
+                continue
+            try:
+                await self._job()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._runs.inc(result="error")
+                logger.exception("Periodic job failed", extra={"job": self.name})
+            else:
+                self._runs.inc(result="ok")
+                self._last_success.set(time.time())
+
+    def start(self, interval: float, jitter: float) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.get_running_loop().create_task(self._run(interval, clamp_jitter(jitter)))
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
@@ -0,0 +1,114 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+from string import Formatter
+from typing import Dict, List, Optional
+
+import google.generativeai as genai
+
+from .config import settings
+from .gemini import TracedGenerativeModel, create_gemini_model
+from .tokens import estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+
+class PromptTemplate:
+    """A prompt split into static instructions and a per-request body.
+
+    ``instruction`` (role, output schema, rules) never changes and is sent as
+    the model's system instruction, or served from a Gemini context cache
+    when ``GEMINI_CONTEXT_CACHE`` is on and it is large enough to be cached.
+    ``body`` is a ``str.format`` template holding only the request's values,
+    so literal braces belong in ``instruction``, not here.
+    """
+
+    def __init__(self, name: str, instruction: str, body: str) -> None:
+        self.name = name
+        self.instruction = instruction.strip()
+        self.body = body.strip()
+        self.fields = sorted({field for _, field, _, _ in Formatter().parse(self.body) if field})
+        self.static_bytes = len(self.instruction.encode("utf-8"))
+        self.static_tokens = estimate_tokens(self.instruction)
+        self.cached = False
+        self._model: Optional[TracedGenerativeModel] = None
+        self._cache_expires: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def render(self, **values) -> str:
+        """The per-request part of the prompt."""
+        return self.body.format(**values)
+
+    def full_text(self, **values) -> str:
+        """Instruction and body as one string, i.e. what used to be sent as a single prompt."""
+        return f"{self.instruction}\n\n{self.render(**values)}"
+
+    def model(self) -> TracedGenerativeModel:
+        """The model for this template, compiled on first use."""
+        if self._model is None or self._cache_expiring():
+            with self._lock:
+                if self._model is None or self._cache_expiring():
+                    self._model = self._compile()
+        return self._model
+
+    def generate(self, **values):
+        """Render the body and send it to this template's model."""
+        return self.model().generate_content(self.render(**values))
+
+    def _cache_expiring(self) -> bool:
+        return self._cache_expires is not None and time.monotonic() > self._cache_expires
+
+    def _compile(self) -> TracedGenerativeModel:
+        model = None
+        self.cached = False
+        self._cache_expires = None
+        if settings.GEMINI_CONTEXT_CACHE and self.static_tokens >= settings.GEMINI_CONTEXT_CACHE_MIN_TOKENS:
+            try:
+                ttl = settings.GEMINI_CONTEXT_CACHE_TTL
+                cached_content = genai.caching.CachedContent.create(
+                    model=f"models/{settings.GEMINI_MODEL}",
+                    display_name=self.name,
+                    system_instruction=self.instruction,
+                    ttl=timedelta(seconds=ttl),
+                )
+                model = TracedGenerativeModel.from_cached_content(cached_content)
+                self.cached = True
+                # Recreate a minute before Gemini drops the cache.
+                self._cache_expires = time.monotonic() + max(ttl - 60, ttl / 2)
+            except Exception as e:
+                logger.warning(f"Context cache unavailable for prompt {self.name}, using a system instruction: {e}")
+        if model is None:
+            model = create_gemini_model(system_instruction=self.instruction)
+            # Locally estimated prompt sizes must include the instruction sent with each call.
+            model.static_tokens = self.static_tokens
+        model.prompt_template = self.name
+        return model
+
+
+class PromptRegistry:
+    """All prompt templates, so they can be compiled together at startup."""
+
+    def __init__(self) -> None:
+        self._templates: Dict[str, PromptTemplate] = {}
+
+    def register(self, name: str, instruction: str, body: str) -> PromptTemplate:
+        if name in self._templates:
+            raise ValueError(f"Prompt template already registered: {name}")
+        template = PromptTemplate(name, instruction, body)
+        self._templates[name] = template
+        return template
+
+    def get(self, name: str) -> PromptTemplate:
+        return self._templates[name]
+
+    def templates(self) -> List[PromptTemplate]:
+        return list(self._templates.values())
+
+    def compile_all(self) -> None:
+        """Build every template's model (and context cache, when enabled) up front."""
+        for template in self._templates.values():
+            template.model()
+
+
+prompt_registry = PromptRegistry()
@@ -0,0 +1,34 @@
+import re
+import unicodedata
+from typing import Iterable, List
+
+# ASCII/ideographic commas, semicolons and whitespace separate terms. NFKC has
+# already folded full-width variants (，；and U+3000) to these by the time
+# this runs.
+_SEPARATORS = re.compile(r"[\s,、;]+")
+
+
+def canonical_terms(keywords: Iterable[str]) -> List[str]:
+    """Normalize keywords into a sorted list of unique search terms.
+
+    Each keyword is NFKC-normalized (full-width ASCII and half-width kana
+    folded), case-folded and split on commas and whitespace. Empty terms are
+    dropped and the rest de-duplicated and sorted, so 「筋トレ, ダイエット」,
+    「ダイエット　筋トレ」 and ["ﾀﾞｲｴｯﾄ", "筋トレ"] all give
+    ``["ダイエット", "筋トレ"]``.
+    """
+    terms = set()
+    for keyword in keywords:
+        if not keyword:
+            continue
+        normalized = unicodedata.normalize("NFKC", keyword).casefold()
+        terms.update(term for term in _SEPARATORS.split(normalized) if term)
+    return sorted(terms)
+
+
+def query_key(keywords: Iterable[str]) -> str:
+    """Canonical key for a keyword query; equal for any spelling of the same terms.
+
+    Terms never contain whitespace, so the key doubles as the search text.
+    """
+    return " ".join(canonical_terms(keywords))
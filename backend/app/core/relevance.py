@@ -0,0 +1,105 @@
+import logging
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Sequence
+
+import numpy as np
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+NGRAM_SIZES = (1, 2, 3)
+
+
+def _ngrams(text: str) -> Counter:
+    """Character n-grams of a text, counted; words need no segmentation this way."""
+    text = " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+    grams: Counter = Counter()
+    for n in NGRAM_SIZES:
+        grams.update(text[i:i + n] for i in range(len(text) - n + 1))
+    # Whitespace-only grams carry no signal.
+    return Counter({gram: count for gram, count in grams.items() if gram.strip()})
+
+
+def tfidf_matrix(texts: Sequence[str]) -> np.ndarray:
+    """L2-normalized character n-gram TF-IDF rows for ``texts``.
+
+    Term frequencies are sublinear (``1 + log tf``) so a word repeated in a
+    description does not dominate, and IDF is computed over ``texts`` itself,
+    which is the candidate set plus the persona terms.
+    """
+    counts = [_ngrams(text) for text in texts]
+    vocabulary: Dict[str, int] = {}
+    for grams in counts:
+        for gram in grams:
+            vocabulary.setdefault(gram, len(vocabulary))
+    matrix = np.zeros((len(texts), max(len(vocabulary), 1)), dtype=np.float32)
+    for row, grams in enumerate(counts):
+        if grams:
+            columns = [vocabulary[gram] for gram in grams]
+            matrix[row, columns] = 1.0 + np.log(np.fromiter(grams.values(), dtype=np.float32))
+    document_frequency = (matrix > 0).sum(axis=0)
+    matrix *= np.log((1 + len(texts)) / (1 + document_frequency)) + 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+_embedding_model = None
+_embedding_lock = threading.Lock()
+
+
+def _get_embedding_model():
+    """The ``RELEVANCE_EMBEDDING_MODEL`` sentence-transformers model, or ``None``."""
+    global _embedding_model
+    if not settings.RELEVANCE_EMBEDDING_MODEL:
+        return None
+    if _embedding_model is None:
+        with _embedding_lock:
+            if _embedding_model is None:
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    _embedding_model = SentenceTransformer(settings.RELEVANCE_EMBEDDING_MODEL, device="cpu")
+                except Exception as e:
+                    logger.warning(f"Embedding model unavailable ({e}); relevance uses TF-IDF only")
+                    _embedding_model = False
+    return _embedding_model or None
+
+
+def relevance_scores(terms: Sequence[str], documents: Sequence[str]) -> np.ndarray:
+    """Relevance of each document to the persona ``terms``, between 0 and 1.
+
+    Each document is compared with every term separately and keeps its best
+    match, so a video about one of several interests still scores high. With
+    ``RELEVANCE_EMBEDDING_MODEL`` set, the TF-IDF score is averaged with the
+    embedding cosine similarity.
+    """
+    terms = [term for term in terms if term and term.strip()]
+    if not documents:
+        return np.zeros(0, dtype=np.float32)
+    if not terms:
+        return np.zeros(len(documents), dtype=np.float32)
+
+    matrix = tfidf_matrix([*documents, *terms])
+    scores = (matrix[:len(documents)] @ matrix[len(documents):].T).max(axis=1)
+
+    model = _get_embedding_model()
+    if model is not None:
+        embeddings = model.encode([*documents, *terms], normalize_embeddings=True, convert_to_numpy=True)
+        similarity = (embeddings[:len(documents)] @ embeddings[len(documents):].T).max(axis=1)
+        scores = (scores + np.clip(similarity, 0.0, 1.0)) / 2
+    return np.clip(scores, 0.0, 1.0).astype(np.float32)
+
+
+def video_text(snippet: dict) -> str:
+    """The text of a ``snippet`` that relevance is scored on."""
+    return "\n".join([snippet.get("title", ""), " ".join(snippet.get("tags", [])), snippet.get("description", "")])
+
+
+def filter_relevant(scores: np.ndarray, min_score: float) -> List[int]:
+    """Indices of the scores that reach ``min_score``, in their original order."""
+    if min_score <= 0:
+        return list(range(len(scores)))
+    return [int(index) for index in np.flatnonzero(scores >= min_score)]
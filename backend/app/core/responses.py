@@ -0,0 +1,82 @@
+import json
+from typing import Any
+
+from fastapi import FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from .config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+class ModelJSONResponse(JSONResponse):
+    """JSON response that serializes Pydantic models in one pass.
+
+    Models are written with ``model_dump_json`` (pydantic-core, no
+    intermediate dict). Anything else goes through orjson when it is
+    installed, falling back to the standard library.
+    """
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, BaseModel):
+            return content.model_dump_json().encode("utf-8")
+        if orjson is not None:
+            return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def fast_json(model: BaseModel, status_code: int = 200):
+    """Return ``model`` through the fast path when ``FAST_JSON_RESPONSES`` is on.
+
+    Returning a ``Response`` skips FastAPI's re-validation of the model we
+    just built against ``response_model`` and its ``jsonable_encoder`` walk;
+    the route's ``response_model`` is still used for the OpenAPI schema.
+    With the setting off the model is returned unchanged.
+    """
+    if settings.FAST_JSON_RESPONSES:
+        return ModelJSONResponse(model, status_code=status_code)
+    return model
+
+
+def install_compression(app: FastAPI) -> None:
+    """Add response compression according to ``RESPONSE_COMPRESSION``.
+
+    ``gzip`` uses Starlette's middleware; ``br`` uses brotli-asgi when it is
+    installed (it still serves gzip to clients without brotli support) and
+    falls back to gzip otherwise. Bodies smaller than
+    ``RESPONSE_COMPRESSION_MIN_SIZE`` bytes are sent uncompressed.
+    """
+    mode = settings.RESPONSE_COMPRESSION.lower()
+    minimum_size = settings.RESPONSE_COMPRESSION_MIN_SIZE
+
+    if mode in ("", "off", "none"):
+        return
+
+    if mode == "br":
+        try:
+            from brotli_asgi import BrotliMiddleware
+        except ImportError:
+            mode = "gzip"
+        else:
+            app.add_middleware(
+                BrotliMiddleware,
+                quality=settings.RESPONSE_COMPRESSION_LEVEL,
+                minimum_size=minimum_size,
+                gzip_fallback=True,
+            )
+            return
+
+    if mode == "gzip":
+        app.add_middleware(
+            GZipMiddleware,
+            minimum_size=minimum_size,
+            compresslevel=settings.RESPONSE_COMPRESSION_LEVEL,
+        )
+        return
+
+    raise ValueError(f"Unsupported RESPONSE_COMPRESSION: {settings.RESPONSE_COMPRESSION}")
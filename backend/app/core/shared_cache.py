@@ -0,0 +1,211 @@
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from .config import settings
+from .tracing import record_cache_lookup, span
+
+logger = logging.getLogger(__name__)
+
+
+class SharedCache(ABC):
+    """TTL key/value cache plus integer counters, shared by the caches of one deployment.
+
+    Entries are grouped by namespace (``youtube``, ``llm``, ``dashboard``);
+    values must be JSON-serialisable. ``epoch`` identifies the lifetime of
+    the counters: it changes whenever they may have been reset, so anything
+    derived from a counter (ETags) should include it.
+    """
+
+    epoch: str
+
+    @abstractmethod
+    def get_many(self, namespace: str, keys: Sequence[str]) -> Dict[str, Any]:
+        """Unexpired values for the keys that are present."""
+
+    @abstractmethod
+    def set_many(self, namespace: str, items: Dict[str, Any], ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    def counter(self, name: str) -> int:
+        ...
+
+    @abstractmethod
+    def incr(self, name: str) -> int:
+        """Atomically add one to a counter and return the new value."""
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        return self.get_many(namespace, [key]).get(key)
+
+    def set(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        self.set_many(namespace, {key: value}, ttl)
+
+    def lookup(self, namespace: str, key: str) -> Optional[Any]:
+        """``get`` that also records a hit or miss for the namespace."""
+        value = self.get(namespace, key)
+        record_cache_lookup(namespace, value is not None)
+        return value
+
+
+class MemoryCache(SharedCache):
+    """Per-process LRU cache; each worker has its own copy."""
+
+    def __init__(self, max_entries: int = 10_000) -> None:
+        self.epoch = secrets.token_hex(4)
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Any]]" = OrderedDict()
+        self._counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get_many(self, namespace, keys):
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get((namespace, key))
+                if entry is None:
+                    continue
+                if entry[0] <= now:
+                    del self._entries[(namespace, key)]
+                    continue
+                self._entries.move_to_end((namespace, key))
+                found[key] = entry[1]
+        return found
+
+    def set_many(self, namespace, items, ttl):
+        expires_at = time.time() + ttl
+        with self._lock:
+            for key, value in items.items():
+                self._entries[(namespace, key)] = (expires_at, value)
+                self._entries.move_to_end((namespace, key))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def counter(self, name):
+        return self._counters.get(name, 0)
+
+    def incr(self, name):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + 1
+            return self._counters[name]
+
+
+class SQLiteCache(SharedCache):
+    """Cache in one SQLite file in WAL mode, shared by every worker process on the host.
+
+    WAL lets readers proceed while one worker writes; the connection
+    timeout makes concurrent writers wait for each other instead of failing.
+    Expired rows are skipped on read and purged every ``PURGE_EVERY``
+    writes. The epoch is stored in the file, so counters and the ETags
+    built from them survive worker restarts and agree across workers.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cache_entries (
+            namespace TEXT NOT NULL,
+            key TEXT NOT NULL,
+            value TEXT NOT NULL,
+            expires_at REAL NOT NULL,
+            PRIMARY KEY (namespace, key)
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS cache_counters (
+            name TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        ) WITHOUT ROWID;
+        CREATE TABLE IF NOT EXISTS cache_meta (
+            name TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+    """
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str) -> None:
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._writes = 0
+        with self._lock, self.conn:
+            # The first worker to open the file picks the epoch; the rest read it.
+            self.conn.execute(
+                "INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('epoch', ?)", (secrets.token_hex(4),)
+            )
+            self.epoch = self.conn.execute("SELECT value FROM cache_meta WHERE name = 'epoch'").fetchone()[0]
+
+    def get_many(self, namespace, keys):
+        if not keys:
+            return {}
+        placeholders = ",".join("?" * len(keys))
+        with span("sqlite", "SELECT"), self._lock:
+            rows = self.conn.execute(
+                f"SELECT key, value FROM cache_entries WHERE namespace = ? AND key IN ({placeholders})"
+                " AND expires_at > ?",
+                (namespace, *keys, time.time()),
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set_many(self, namespace, items, ttl):
+        if not items:
+            return
+        expires_at = time.time() + ttl
+        rows = [
+            (namespace, key, json.dumps(value, ensure_ascii=False, default=str), expires_at)
+            for key, value in items.items()
+        ]
+        with span("sqlite", "INSERT"), self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._writes += 1
+            if self._writes % self.PURGE_EVERY == 0:
+                self.conn.execute("DELETE FROM cache_entries WHERE expires_at <= ?", (time.time(),))
+
+    def counter(self, name):
+        with span("sqlite", "SELECT"), self._lock:
+            row = self.conn.execute("SELECT value FROM cache_counters WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def incr(self, name):
+        # One transaction: the write lock is held from the upsert to the read.
+        with span("sqlite", "UPDATE"), self._lock, self.conn:
+            self.conn.execute(
+                "INSERT INTO cache_counters (name, value) VALUES (?, 1)"
+                " ON CONFLICT (name) DO UPDATE SET value = value + 1",
+                (name,),
+            )
+            return self.conn.execute("SELECT value FROM cache_counters WHERE name = ?", (name,)).fetchone()[0]
+
+
+def cache_key(*parts: Any) -> str:
+    """Stable key for a set of parameters (order-sensitive, JSON-encoded)."""
+    return json.dumps(parts, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+
+
+_shared_cache: Optional[SharedCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_shared_cache() -> SharedCache:
+    """The cache selected by ``CACHE_BACKEND`` (``memory`` or ``sqlite``)."""
+    global _shared_cache
+    if _shared_cache is None:
+        with _shared_cache_lock:
+            if _shared_cache is None:
+                backend = settings.CACHE_BACKEND
+                if backend == "sqlite":
+                    _shared_cache = SQLiteCache(settings.CACHE_SQLITE_PATH)
+                elif backend == "memory":
+                    _shared_cache = MemoryCache(settings.CACHE_MAX_ENTRIES)
+                else:
+                    raise ValueError(f"Unknown cache backend: {backend}")
+                logger.info("Shared cache ready", extra={"backend": backend, "epoch": _shared_cache.epoch})
+    return _shared_cache
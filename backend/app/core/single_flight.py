@@ -0,0 +1,116 @@
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .metrics import registry
+from .shared_cache import cache_key
+
+SINGLE_FLIGHT_COMPUTATIONS = registry.counter(
+    "single_flight_computations_total",
+    "Computations actually run by a single-flight group.",
+    ("flight",),
+)
+SINGLE_FLIGHT_SAVED = registry.counter(
+    "single_flight_saved_total",
+    "Calls that joined an identical in-flight computation instead of running their own.",
+    ("flight",),
+)
+_groups: Dict[str, "SingleFlight"] = {}
+registry.gauge(
+    "single_flight_in_flight",
+    "Computations currently running in single-flight groups.",
+    callback=lambda: sum(len(group) for group in _groups.values()),
+)
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """Collapse concurrent calls with the same key into one computation.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running wait for it and get the same result, or the
+    same exception. Nothing is kept once the computation finishes, so this
+    only merges calls that overlap in time; it is not a cache. Callers
+    share the result object and must not mutate it.
+
+    The services are synchronous and run in the threadpool, so followers
+    wait on a ``threading.Event``.
+    """
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        _groups[name] = self
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args, **kwargs) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+
+        if not leader:
+            SINGLE_FLIGHT_SAVED.inc(flight=self.name)
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        SINGLE_FLIGHT_COMPUTATIONS.inc(flight=self.name)
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+
+def _identity(value: Any) -> Any:
+    return value
+
+
+def coalesced(flight: str, **canonical: Callable[[Any], Any]):
+    """Decorate a service method so identical concurrent calls run once.
+
+    The key is built from all arguments except ``self`` (defaults applied),
+    after passing the ones named in ``canonical`` through their function,
+    e.g. ``keywords=canonical_terms`` so every spelling of a query shares
+    one computation.
+    """
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        group = SingleFlight(flight)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            params = {
+                name: canonical.get(name, _identity)(value)
+                for name, value in bound.arguments.items()
+                if name != "self"
+            }
+            return group.do(cache_key(params), func, *args, **kwargs)
+
+        wrapper.single_flight = group
+        return wrapper
+
+    return decorator
@@ -0,0 +1,88 @@
+import re
+import unicodedata
+from typing import Any, Dict, Iterator, List, Optional
+
+# Fields of a stored analysis result worth searching: video titles, channel
+# names and the generated insights/strategies, wherever they are nested.
+RESULT_FIELDS = frozenset({
+    "title",
+    "channel_name",
+    "insights",
+    "overall_insights",
+    "why_viral",
+    "key_takeaways",
+    "content_strategies",
+})
+
+# ASCII words stay whole; every other run of word characters (kana, kanji,
+# hangul...) is split into overlapping character bigrams, so Japanese needs no
+# word segmentation and two-character words such as 筋肉 still match.
+_TOKEN_RUNS = re.compile(r"[0-9a-z]+|[^\W0-9a-z_]+")
+# Characters with a meaning in ILIKE patterns or PostgREST filters.
+_PATTERN_CHARS = re.compile(r"[%_,()\"\\*]")
+
+
+def normalize(text: str) -> str:
+    """NFKC and case folding, so full-width/half-width and case variants match."""
+    return unicodedata.normalize("NFKC", text).casefold()
+
+
+def _strings(value: Any, searchable: bool = False) -> Iterator[str]:
+    if isinstance(value, str):
+        if searchable:
+            yield value
+    elif isinstance(value, dict):
+        for key, child in value.items():
+            yield from _strings(child, searchable or key in RESULT_FIELDS)
+    elif isinstance(value, list):
+        for child in value:
+            yield from _strings(child, searchable)
+
+
+def search_document(record: Dict[str, Any]) -> str:
+    """Normalized searchable text of an ``analysis_history`` row.
+
+    Keywords, the summary and the :data:`RESULT_FIELDS` found anywhere in
+    ``result``, one per line.
+    """
+    parts: List[str] = list(record.get("keywords") or [])
+    if record.get("summary"):
+        parts.append(record["summary"])
+    parts.extend(_strings(record.get("result") or {}))
+    return normalize("\n".join(parts))
+
+
+def tokens(text: str) -> List[str]:
+    """Index tokens of normalized text: ASCII words and CJK character bigrams."""
+    result: List[str] = []
+    for run in _TOKEN_RUNS.findall(text):
+        if run.isascii() or len(run) == 1:
+            result.append(run)
+        else:
+            result.extend(run[index:index + 2] for index in range(len(run) - 1))
+    return result
+
+
+def fts_document(document: str) -> str:
+    """Space-separated tokens of a :func:`search_document` for an FTS5 ``unicode61`` column."""
+    return " ".join(tokens(document))
+
+
+def query_terms(query: str) -> List[str]:
+    """Normalized whitespace-separated search terms, stripped of pattern characters."""
+    return [term for term in (_PATTERN_CHARS.sub("", part) for part in normalize(query).split()) if term]
+
+
+def fts_query(query: str) -> Optional[str]:
+    """FTS5 MATCH expression requiring every term of ``query``, or ``None`` if it has none.
+
+    Each term becomes a phrase of its tokens, i.e. its bigrams must appear
+    next to each other, which is substring matching. The last token is a
+    prefix, so single kana/kanji and partially typed words match too.
+    """
+    phrases = []
+    for term in query_terms(query):
+        term_tokens = tokens(term)
+        if term_tokens:
+            phrases.append('"' + " ".join(term_tokens) + '"*')
+    return " AND ".join(phrases) if phrases else None
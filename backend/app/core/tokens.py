@@ -0,0 +1,117 @@
+import logging
+import math
+from typing import Dict, Iterable, List, Optional
+
+from .config import settings
+from .tracing import mark_prompt_truncated, span
+
+logger = logging.getLogger(__name__)
+
+ELLIPSIS = "…"
+
+
+def estimate_tokens(text: str) -> int:
+    """Cheap local estimate of the Gemini token count of ``text``.
+
+    Roughly four ASCII characters per token and one token per other
+    character. Japanese usually tokenizes at 1-1.5 characters per token, so
+    the estimate errs high, which is the safe side for a budget.
+    """
+    if not text:
+        return 0
+    ascii_chars = len(text.encode("ascii", "ignore"))
+    return math.ceil(ascii_chars / 4) + (len(text) - ascii_chars)
+
+
+def _prompt_text(contents) -> str:
+    if isinstance(contents, str):
+        return contents
+    if isinstance(contents, Iterable):
+        return "".join(part for part in contents if isinstance(part, str))
+    return ""
+
+
+def count_prompt_tokens(model, contents) -> int:
+    """Token count of a prompt before it is sent.
+
+    Uses the local estimate unless ``GEMINI_COUNT_TOKENS`` is on, in which
+    case Gemini's ``count_tokens`` is asked (one extra round trip per call)
+    and the estimate is only the fallback when that fails. The local
+    estimate adds the model's ``static_tokens`` (its system instruction).
+    """
+    if settings.GEMINI_COUNT_TOKENS:
+        try:
+            with span("gemini", "count_tokens", model=model.model_name):
+                return int(model.count_tokens(contents).total_tokens)
+        except Exception as e:
+            logger.warning(f"count_tokens failed, using the local estimate: {e}")
+    return estimate_tokens(_prompt_text(contents)) + getattr(model, "static_tokens", 0)
+
+
+def truncate_text(text: Optional[str], max_tokens: int) -> str:
+    """Cut ``text`` to at most ``max_tokens`` estimated tokens, marking the cut with "…"."""
+    if not text or estimate_tokens(text) <= max_tokens:
+        return text or ""
+    mark_prompt_truncated()
+    budget = max(max_tokens - 1, 0) * 4  # in quarter tokens, one token kept for the ellipsis
+    used = 0
+    for index, char in enumerate(text):
+        used += 1 if char < "\x80" else 4
+        if used > budget:
+            return text[:index].rstrip() + ELLIPSIS
+    return text
+
+
+def fit_items(items: Iterable[str], max_tokens: int, item_tokens: Optional[int] = None) -> List[str]:
+    """Keep leading ``items`` while they fit in ``max_tokens`` estimated tokens.
+
+    Each item is first cut to ``item_tokens`` when given; one token per item
+    is counted for the list marker and newline the prompt adds around it.
+    """
+    kept: List[str] = []
+    used = 0
+    for item in items:
+        if item_tokens is not None:
+            item = truncate_text(item, item_tokens)
+        cost = estimate_tokens(item) + 1
+        if used + cost > max_tokens:
+            if kept:
+                mark_prompt_truncated()
+            else:
+                kept.append(truncate_text(item, max(max_tokens - 1, 1)))
+            break
+        kept.append(item)
+        used += cost
+    return kept
+
+
+def _parse_budgets(raw: str) -> Dict[str, int]:
+    budgets: Dict[str, int] = {}
+    for entry in raw.split(","):
+        name, _, value = entry.partition("=")
+        if name.strip() and value.strip().isdigit():
+            budgets[name.strip()] = int(value)
+    return budgets
+
+
+_budget_overrides = _parse_budgets(settings.PROMPT_TOKEN_BUDGETS)
+
+
+def prompt_budget(call_site: str, default: int) -> int:
+    """Token budget for the variable inputs of one prompt call site.
+
+    ``call_site`` is ``<service>.<operation>``; ``PROMPT_TOKEN_BUDGETS``
+    overrides the default, e.g.
+    ``combined_planner.generate_plan_from_research=1500,ai_planner.generate_shooting_materials=800``.
+    """
+    return _budget_overrides.get(call_site, default)
+
+
+def video_title_budget() -> int:
+    """Budget for a video title quoted in a prompt (``video_title`` in ``PROMPT_TOKEN_BUDGETS``)."""
+    return prompt_budget("video_title", 60)
+
+
+def channel_title_budget() -> int:
+    """Budget for a channel name quoted in a prompt (``channel_title`` in ``PROMPT_TOKEN_BUDGETS``)."""
+    return prompt_budget("channel_title", 30)
@@ -0,0 +1,417 @@
+import functools
+import inspect
+import logging
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    """One upstream call (YouTube, Gemini, Supabase, SQLite) within a request.
+
+    ``service`` and ``caller`` name the :func:`instrumented` service
+    operation the call was made from, when there is one.
+    """
+
+    __slots__ = (
+        "upstream", "operation", "start", "duration", "error", "attributes", "service", "caller",
+    )
+
+    def __init__(self, upstream: str, operation: str, start: float, attributes: Dict[str, Any]):
+        self.upstream = upstream
+        self.operation = operation
+        self.start = start
+        self.duration = 0.0
+        self.error: Optional[str] = None
+        self.attributes = attributes
+        scope = _current_operation.get()
+        self.service = scope.service if scope else None
+        self.caller = scope.operation if scope else None
+
+
+class OperationScope:
+    """A service-level operation (e.g. ``trend_analyzer.analyze_trends``)."""
+
+    __slots__ = ("service", "operation", "fallbacks")
+
+    def __init__(self, service: str, operation: str) -> None:
+        self.service = service
+        self.operation = operation
+        self.fallbacks = 0
+
+
+_current_operation: ContextVar[Optional[OperationScope]] = ContextVar("service_operation", default=None)
+
+
+class InstrumentationListener:
+    """Receives instrumentation events; override the hooks you need.
+
+    Listeners are called synchronously from request and worker threads and
+    must be cheap and thread-safe. Exceptions they raise are swallowed so
+    that observability never breaks a request.
+    """
+
+    def span_finished(self, span: Span) -> None:
+        pass
+
+    def operation_finished(self, scope: OperationScope, duration: float, outcome: str) -> None:
+        pass
+
+    def fallback(self, scope: Optional[OperationScope], reason: str) -> None:
+        pass
+
+    def cache_lookup(self, cache: str, hit: bool) -> None:
+        pass
+
+    def prompt_truncated(self, scope: Optional[OperationScope]) -> None:
+        pass
+
+
+_listeners: List[InstrumentationListener] = []
+
+
+def add_listener(listener: InstrumentationListener) -> None:
+    _listeners.append(listener)
+
+
+def _notify(event: str, *args: Any) -> None:
+    for listener in _listeners:
+        try:
+            getattr(listener, event)(*args)
+        except Exception:  # noqa: BLE001 - never fail the request
+            pass
+
+
+class RequestTrace:
+    """Spans recorded while handling one HTTP request.
+
+    Services run partly in worker threads (``run_in_threadpool``,
+    ``asyncio.to_thread``); both copy the caller's context, so every thread
+    appends to the same trace. Appends are guarded by a lock.
+    """
+
+    def __init__(self, method: str = "", path: str = "") -> None:
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        self.started_at = time.time()
+        self.finished: Optional[float] = None
+        self.spans: List[Span] = []
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self._lock = threading.Lock()
+
+    def add(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def add_tokens(self, prompt: int, completion: int) -> None:
+        with self._lock:
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+
+    def finish(self) -> None:
+        self.finished = time.perf_counter()
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Call count and summed duration (ms) per upstream, in first-seen order."""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = totals.setdefault(span.upstream, {"count": 0, "dur": 0.0})
+            entry["count"] += 1
+            entry["dur"] += span.duration * 1000
+        return totals
+
+    def server_timing(self) -> str:
+        """Render the per-upstream summary as a ``Server-Timing`` header value."""
+        parts = [
+            f'{upstream};dur={entry["dur"]:.1f};desc="{int(entry["count"])} calls"'
+            for upstream, entry in self.summary().items()
+        ]
+        parts.append(f"app;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+    def timeline(self) -> Dict[str, Any]:
+        """JSON-friendly timeline: spans with offsets relative to the request start."""
+        end = self.finished or time.perf_counter()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda s: s.start)
+        return {
+            "trace_id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration_ms": round((end - self.started) * 1000, 2),
+            "upstreams": {
+                upstream: {"count": int(entry["count"]), "duration_ms": round(entry["dur"], 2)}
+                for upstream, entry in self.summary().items()
+            },
+            "gemini_tokens": {"prompt": self.prompt_tokens, "completion": self.completion_tokens},
+            "spans": [
+                {
+                    "upstream": span.upstream,
+                    "operation": span.operation,
+                    "offset_ms": round((span.start - self.started) * 1000, 2),
+                    "duration_ms": round(span.duration * 1000, 2),
+                    "error": span.error,
+                    **({"caller": f"{span.service}.{span.caller}"} if span.service else {}),
+                    **({"attributes": span.attributes} if span.attributes else {}),
+                }
+                for span in spans
+            ],
+        }
+
+
+_current_trace: ContextVar[Optional[RequestTrace]] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> Optional[RequestTrace]:
+    return _current_trace.get()
+
+
+@contextmanager
+def start_trace(method: str = "", path: str = "") -> Iterator[RequestTrace]:
+    """Make a new trace current for the duration of the block."""
+    trace = RequestTrace(method, path)
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        trace.finish()
+        _current_trace.reset(token)
+
+
+# ----------------------------------------------------------------------
+# OpenTelemetry (optional)
+# ----------------------------------------------------------------------
+
+_otel_tracer = None
+_otel_lock = threading.Lock()
+
+
+def _get_otel_tracer():
+    """Return an OpenTelemetry tracer when ``OTEL_EXPORTER`` is set, else ``None``.
+
+    ``otlp`` needs ``opentelemetry-sdk`` and ``opentelemetry-exporter-otlp``
+    (configured through the standard ``OTEL_EXPORTER_OTLP_*`` variables);
+    ``console`` only needs the SDK. If the packages are missing, spans are
+    still recorded locally and nothing is exported.
+    """
+    global _otel_tracer
+    exporter_name = settings.OTEL_EXPORTER.lower()
+    if not exporter_name:
+        return None
+    if _otel_tracer is None:
+        with _otel_lock:
+            if _otel_tracer is None:
+                try:
+                    from opentelemetry import trace as otel_trace
+                    from opentelemetry.sdk.resources import Resource
+                    from opentelemetry.sdk.trace import TracerProvider
+                    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+                    if exporter_name == "otlp":
+                        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                        exporter = OTLPSpanExporter()
+                    elif exporter_name == "console":
+                        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+                        exporter = ConsoleSpanExporter()
+                    else:
+                        raise ValueError(f"Unsupported OTEL_EXPORTER: {settings.OTEL_EXPORTER}")
+                except ImportError as e:
+                    logger.warning(f"OpenTelemetry exporter unavailable ({e}); spans are not exported")
+                    _otel_tracer = False
+                else:
+                    provider = TracerProvider(
+                        resource=Resource.create({"service.name": settings.OTEL_SERVICE_NAME})
+                    )
+                    provider.add_span_processor(BatchSpanProcessor(exporter))
+                    otel_trace.set_tracer_provider(provider)
+                    _otel_tracer = otel_trace.get_tracer("youtube_content_studio")
+    return _otel_tracer or None
+
+
+@contextmanager
+def span(upstream: str, operation: str, **attributes: Any) -> Iterator[Span]:
+    """Record one upstream call on the current request trace.
+
+    Outside of a request (scripts, background tasks) the span is timed but
+    not stored anywhere; with an OpenTelemetry exporter configured it is
+    exported either way.
+    """
+    record = Span(upstream, operation, time.perf_counter(), attributes)
+    tracer = _get_otel_tracer()
+    otel_span = (
+        tracer.start_as_current_span(f"{upstream} {operation}", attributes=attributes)
+        if tracer is not None else None
+    )
+    if otel_span is not None:
+        otel_span.__enter__()
+    exc_info = (None, None, None)
+    try:
+        yield record
+    except BaseException as e:
+        record.error = f"{type(e).__name__}: {e}"
+        exc_info = sys.exc_info()
+        raise
+    finally:
+        record.duration = time.perf_counter() - record.start
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.add(record)
+        if otel_span is not None:
+            otel_span.__exit__(*exc_info)
+        _notify("span_finished", record)
+
+
+# ----------------------------------------------------------------------
+# Service operations
+# ----------------------------------------------------------------------
+
+def instrumented(service: str, operation: Optional[str] = None) -> Callable:
+    """Decorator marking a service method as a named operation.
+
+    Upstream spans made inside the call are labelled with the operation, and
+    listeners get its duration and outcome: ``ok``, ``error`` (it raised) or
+    ``fallback`` (it returned canned data, see :func:`mark_fallback`).
+    ``operation`` defaults to the function name without leading underscores.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        name = operation or func.__name__.lstrip("_")
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _operation_scope(service, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _operation_scope(service, name):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+@contextmanager
+def _operation_scope(service: str, operation: str) -> Iterator[OperationScope]:
+    parent = _current_operation.get()
+    scope = OperationScope(service, operation)
+    token = _current_operation.set(scope)
+    start = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield scope
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        _current_operation.reset(token)
+        if parent is not None:
+            # A nested fallback means the caller's answer is partly canned too.
+            parent.fallbacks += scope.fallbacks
+        if outcome == "ok" and scope.fallbacks:
+            outcome = "fallback"
+        _notify("operation_finished", scope, time.perf_counter() - start, outcome)
+
+
+def mark_fallback(reason: str = "error") -> None:
+    """Record that the current operation is answering with canned data."""
+    scope = _current_operation.get()
+    if scope is not None:
+        scope.fallbacks += 1
+    _notify("fallback", scope, reason)
+
+
+def record_cache_lookup(cache: str, hit: bool) -> None:
+    """Record a hit or miss for one of the in-process caches."""
+    _notify("cache_lookup", cache, hit)
+
+
+def mark_prompt_truncated() -> None:
+    """Record that a prompt input was cut to fit its token budget."""
+    _notify("prompt_truncated", _current_operation.get())
+
+
+# ----------------------------------------------------------------------
+# Recent timelines (opt-in)
+# ----------------------------------------------------------------------
+
+class TimelineStore:
+    """Bounded, most-recent-first store of finished request timelines."""
+
+    def __init__(self, max_entries: int) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, trace: RequestTrace) -> None:
+        timeline = trace.timeline()
+        with self._lock:
+            self._entries[trace.id] = timeline
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, trace_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            return self._entries.get(trace_id)
+
+
+timeline_store = TimelineStore(settings.TRACE_TIMELINE_MAX_ENTRIES)
+
+
+class TracingMiddleware:
+    """ASGI middleware that scopes a :class:`RequestTrace` to each HTTP request.
+
+    Adds a ``Server-Timing`` header summarising upstream calls made before the
+    response headers were sent (for streamed responses, that is whatever ran
+    before the first chunk). When ``TRACE_TIMELINE_ENABLED`` is on and the
+    request carries ``X-Debug-Trace: 1``, the finished timeline is kept and
+    its id returned in ``X-Trace-Id`` for ``GET /api/v1/debug/traces/{id}``.
+    """
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        keep_timeline = settings.TRACE_TIMELINE_ENABLED and any(
+            name == b"x-debug-trace" and value in (b"1", b"true")
+            for name, value in scope.get("headers", [])
+        )
+
+        with start_trace(scope.get("method", ""), scope.get("path", "")) as trace:
+            async def send_with_timing(message):
+                if message["type"] == "http.response.start":
+                    headers = list(message.get("headers", []))
+                    if settings.SERVER_TIMING_ENABLED:
+                        headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                    if keep_timeline:
+                        headers.append((b"x-trace-id", trace.id.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_timing)
+            finally:
+                if keep_timeline:
+                    trace.finish()
+                    timeline_store.put(trace)
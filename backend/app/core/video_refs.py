@@ -0,0 +1,95 @@
+import hashlib
+import json
+from typing import Any, Dict, Iterable, Set
+
+# Fields describing the video itself, identical in every run that found it.
+# Everything else on a stored video (view/like counts, relevance_score,
+# why_trending, subscriber_count, viral_ratio, why_viral, key_takeaways)
+# belongs to the run and stays inline.
+VIDEO_FIELDS = (
+    "platform",
+    "title",
+    "channel_name",
+    "video_id",
+    "url",
+    "thumbnail_url",
+    "published_at",
+    "duration",
+    "tags",
+    "description",
+)
+# Key of the reference left in a run's result in place of the video fields.
+REF_KEY = "video_ref"
+
+
+def video_hash(video: Dict[str, Any]) -> str:
+    """Content address of the shared part of a video: a new title or description is a new entry."""
+    encoded = json.dumps(video, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(encoded.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _map_videos(value: Any, convert) -> Any:
+    # Videos are the items of every "videos" list: result.videos for viral
+    # runs, result.platforms[].videos for trends.
+    if isinstance(value, dict):
+        return {
+            key: [convert(item) if isinstance(item, dict) else item for item in child]
+            if key == "videos" and isinstance(child, list)
+            else _map_videos(child, convert)
+            for key, child in value.items()
+        }
+    if isinstance(value, list):
+        return [_map_videos(child, convert) for child in value]
+    return value
+
+
+def extract_videos(result: Dict[str, Any], videos: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+    """Copy of ``result`` whose videos are references, adding the shared parts to ``videos`` by hash."""
+
+    def convert(item: Dict[str, Any]) -> Dict[str, Any]:
+        item = _without_ref(item)
+        if not item.get("video_id"):
+            return item
+        video = {field: item[field] for field in VIDEO_FIELDS if field in item}
+        digest = video_hash(video)
+        videos.setdefault(digest, video)
+        return {REF_KEY: digest, **{key: value for key, value in item.items() if key not in video}}
+
+    return _map_videos(result, convert)
+
+
+def _without_ref(item: Dict[str, Any]) -> Dict[str, Any]:
+    # A reference sent by the client would be filled in from the shared
+    # analysis_videos table on read, so it is dropped, never trusted.
+    return {key: value for key, value in item.items() if key != REF_KEY} if REF_KEY in item else item
+
+
+def strip_refs(result: Any) -> Any:
+    """Copy of ``result`` without client-sent references, for runs saved with the store off."""
+    return _map_videos(result, _without_ref)
+
+
+def video_refs(results: Iterable[Any]) -> Set[str]:
+    """Hashes referenced by the given results."""
+    refs: Set[str] = set()
+
+    def collect(item: Dict[str, Any]) -> Dict[str, Any]:
+        if isinstance(item.get(REF_KEY), str):
+            refs.add(item[REF_KEY])
+        return item
+
+    for result in results:
+        _map_videos(result, collect)
+    return refs
+
+
+def attach_videos(result: Any, videos: Dict[str, Dict[str, Any]]) -> Any:
+    """Inverse of :func:`extract_videos`; unknown references are left as they are."""
+
+    def convert(item: Dict[str, Any]) -> Dict[str, Any]:
+        video = videos.get(item.get(REF_KEY))
+        if video is None:
+            return item
+        return {**video, **{key: value for key, value in item.items() if key != REF_KEY}}
+
+    return _map_videos(result, convert)
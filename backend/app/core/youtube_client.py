@@ -0,0 +1,171 @@
+import queue
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+import httplib2
+from googleapiclient.discovery import build
+from googleapiclient.http import HttpRequest
+
+from .config import settings
+from .metrics import registry
+from .tracing import span
+
+
+class PooledHttp:
+    """Thread-safe drop-in for ``httplib2.Http`` backed by a keep-alive pool.
+
+    ``httplib2.Http`` keeps its connections open between requests but must not
+    be shared across threads. This class hands each in-flight request its own
+    ``Http`` instance checked out from a bounded pool, so concurrent callers
+    never touch the same connection and finished connections (and their TLS
+    sessions) are reused by the next request.
+    """
+
+    def __init__(self, pool_size: int = 10, timeout: Optional[float] = 15.0) -> None:
+        self.pool_size = max(1, pool_size)
+        self.timeout = timeout
+        self._idle: "queue.LifoQueue[httplib2.Http]" = queue.LifoQueue()
+        self._created = 0
+        self._waiting = 0
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+
+    def _new_http(self) -> httplib2.Http:
+        http = httplib2.Http(timeout=self.timeout)
+        # googleapiclient.http.build_http() drops 308 from the redirect codes
+        # because YouTube uses it for resumable uploads; keep that behaviour.
+        http.redirect_codes = http.redirect_codes - {308}
+        return http
+
+    @contextmanager
+    def _checkout(self) -> Iterator[httplib2.Http]:
+        with self._lock:
+            self._waiting += 1
+        self._slots.acquire()
+        with self._lock:
+            self._waiting -= 1
+        try:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    self._created += 1
+                http = self._new_http()
+            try:
+                yield http
+            finally:
+                self._idle.put(http)
+        finally:
+            self._slots.release()
+
+    def request(self, uri, method="GET", *args, **kwargs):
+        with self._checkout() as http:
+            return http.request(uri, method, *args, **kwargs)
+
+    @property
+    def connections_created(self) -> int:
+        """Number of ``Http`` instances opened so far (for diagnostics)."""
+        return self._created
+
+    @property
+    def in_use(self) -> int:
+        """Connections currently checked out by a request."""
+        return self._created - self._idle.qsize()
+
+    @property
+    def waiting(self) -> int:
+        """Requests blocked waiting for a free connection."""
+        return self._waiting
+
+    def close(self) -> None:
+        while True:
+            try:
+                http = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            http.close()
+
+
+def _request_builder(num_retries: int):
+    """Return an ``HttpRequest`` subclass that retries by default.
+
+    googleapiclient only retries when ``execute(num_retries=...)`` is passed
+    explicitly; baking the default in here covers every existing call site.
+    Each execution is recorded as a ``youtube`` span (retries included).
+    """
+
+    class RetryingHttpRequest(HttpRequest):
+        def execute(self, http=None, num_retries=num_retries):
+            operation = (self.methodId or "request").removeprefix("youtube.")
+            with span("youtube", operation):
+                return super().execute(http=http, num_retries=num_retries)
+
+    return RetryingHttpRequest
+
+
+def build_youtube_client(
+    api_key: str,
+    pool_size: Optional[int] = None,
+    timeout: Optional[float] = None,
+    num_retries: Optional[int] = None,
+    api_endpoint: Optional[str] = None,
+):
+    """Build a YouTube Data API v3 resource on top of :class:`PooledHttp`."""
+    http = PooledHttp(
+        pool_size=pool_size if pool_size is not None else settings.YOUTUBE_HTTP_POOL_SIZE,
+        timeout=timeout if timeout is not None else settings.YOUTUBE_HTTP_TIMEOUT,
+    )
+    client_options = {"api_endpoint": api_endpoint} if api_endpoint else None
+    return build(
+        'youtube',
+        'v3',
+        developerKey=api_key,
+        http=http,
+        requestBuilder=_request_builder(
+            num_retries if num_retries is not None else settings.YOUTUBE_HTTP_RETRIES
+        ),
+        client_options=client_options,
+        static_discovery=True,
+    )
+
+
+_youtube_client = None
+_youtube_client_lock = threading.Lock()
+
+
+def _shared_pool() -> Optional[PooledHttp]:
+    http = getattr(_youtube_client, "_http", None)
+    return http if isinstance(http, PooledHttp) else None
+
+
+registry.gauge(
+    "youtube_http_pool_in_use",
+    "YouTube API connections currently checked out.",
+    callback=lambda: _shared_pool().in_use if _shared_pool() else 0,
+)
+registry.gauge(
+    "youtube_http_pool_waiting",
+    "YouTube API requests queued for a free pooled connection.",
+    callback=lambda: _shared_pool().waiting if _shared_pool() else 0,
+)
+
+
+def get_youtube_client():
+    """Shared YouTube client, or ``None`` when ``YOUTUBE_API_KEY`` is unset.
+
+    The resource is safe to share between threads because every request
+    goes through the pooled transport.
+    """
+    global _youtube_client
+    if not settings.YOUTUBE_API_KEY:
+        return None
+    if _youtube_client is None:
+        with _youtube_client_lock:
+            if _youtube_client is None:
+                _youtube_client = build_youtube_client(
+                    settings.YOUTUBE_API_KEY,
+                    api_endpoint=settings.YOUTUBE_API_ENDPOINT or None,
+                )
+    return _youtube_client
+
@@ -1,25 +1,39 @@
+import logging
 import os
+import time
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from .core.blob_codec import blob_codec
 from .core.config import settings
+from .core.database import get_async_supabase
+from .core.log import setup_logging
+from .core.responses import install_compression
+from .core.metrics import MetricsMiddleware, registry
+from .core.prompts import prompt_registry
+from .core.relevance import relevance_scores
+from .core.shared_cache import get_shared_cache
+from .core.tracing import TracingMiddleware
+from .repositories.youtube_data import create_fallback_data_provider, create_youtube_data_provider
+from .services.channel_refresh import channel_stats_refresher
+from .services.viral_crawler import viral_candidate_crawler
 
 # Suppress gRPC ALTS warnings
 os.environ.setdefault('GRPC_VERBOSITY', 'ERROR')
 os.environ.setdefault('GLOG_minloglevel', '2')
 
+setup_logging()
+logger = logging.getLogger(__name__)
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
     openapi_url=f"{settings.API_V1_STR}/openapi.json"
 )
 
-# CORS configuration - Allow all origins for now
-import sys
-sys.stderr.write(f"[CORS DEBUG] Setting up CORS with wildcard origin\n")
-sys.stderr.flush()
-
+# CORS configuration
 allowed_origins_list = settings.get_allowed_origins()
-sys.stderr.write(f"[CORS DEBUG] Resolved allowed origins: {allowed_origins_list}\n")
-sys.stderr.flush()
+logger.info("CORS allowed origins resolved", extra={"origins": allowed_origins_list})
 
 app.add_middleware(
     CORSMiddleware,
@@ -31,6 +45,12 @@ app.add_middleware(
     max_age=3600,
 )
 
+install_compression(app)
+# Added last so it runs outermost: the metrics middleware reads the trace.
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+app.add_middleware(TracingMiddleware)
+
 
 @app.get("/")
 async def root():
@@ -46,8 +66,16 @@ async def health_check():
     return {"status": "healthy"}
 
 
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(
+            registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+        )
+
+
 # Import and include routers
-from .api import planning, trends, viral, analytics, reports, dashboard, analysis, channels, stats
+from .api import planning, trends, viral, analytics, reports, dashboard, analysis, channels, stats, debug
 
 app.include_router(
     planning.router,
@@ -102,3 +130,57 @@ app.include_router(
     prefix=f"{settings.API_V1_STR}/stats",
     tags=["stats"]
 )
+
+app.include_router(
+    debug.router,
+    prefix=f"{settings.API_V1_STR}/debug",
+    tags=["debug"]
+)
+
+
+def _warm_up_blocking() -> None:
+    get_shared_cache()
+    blob_codec.warm_up()
+    create_youtube_data_provider()
+    create_fallback_data_provider()
+    # Loads the embedding model, when configured, and numpy's kernels.
+    relevance_scores(["warmup"], ["warmup"])
+    # Routers import every service, so all prompt templates are registered by
+    # now. With context caching on this calls the Gemini API, so a failure
+    # is logged and the templates build lazily on first use instead.
+    try:
+        prompt_registry.compile_all()
+    except Exception:
+        logger.exception("Compiling prompt templates failed")
+
+
+@app.on_event("startup")
+async def warm_up_worker():
+    """Open this worker's clients and caches before it accepts traffic.
+
+    Every worker process runs its own startup, so with several workers
+    none of them pays these costs on its first request.
+    """
+    if settings.WEB_CONCURRENCY > 1 and settings.CACHE_BACKEND == "memory":
+        # `uvicorn --workers N` bypasses run.py's check
+        logger.warning(
+            "CACHE_BACKEND=memory with several workers: each worker keeps its own caches and ETag "
+            "versions, so clients can get 304s for stale data. Set CACHE_BACKEND=sqlite."
+        )
+    start = time.perf_counter()
+    await run_in_threadpool(_warm_up_blocking)
+    if settings.SUPABASE_URL:
+        await get_async_supabase()
+    logger.info("Worker warmed up", extra={"pid": os.getpid(), "duration_ms": round((time.perf_counter() - start) * 1000, 1)})
+
+
+@app.on_event("startup")
+async def start_background_jobs():
+    channel_stats_refresher.start()
+    viral_candidate_crawler.start()
+
+
+@app.on_event("shutdown")
+async def stop_background_jobs():
+    await channel_stats_refresher.stop()
+    await viral_candidate_crawler.stop()
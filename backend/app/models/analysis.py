@@ -53,12 +53,31 @@ class AnalysisRunListResponse(BaseModel):
     items: List[AnalysisRunResponse]
     next_cursor: Optional[str] = Field(
         None,
-        description="Opaque cursor used to fetch the next page (created_at ISO string)",
+        description="Opaque cursor used to fetch the next page (encodes created_at and id)",
     )
 
     model_config = ConfigDict(from_attributes=True)
 
 
+class AnalysisSearchHit(BaseModel):
+    """A run matching a history search, without its result and meta payloads."""
+
+    id: str
+    user_id: str
+    analysis_type: AnalysisType
+    keywords: List[str] = Field(default_factory=list)
+    platforms: List[str] = Field(default_factory=list)
+    summary: Optional[str] = None
+    channel_id: Optional[str] = None
+    created_at: datetime
+
+
+class AnalysisSearchResponse(BaseModel):
+    """Runs matching a history search, best match first."""
+
+    items: List[AnalysisSearchHit]
+
+
 class AnalysisStatsResponse(BaseModel):
     """Aggregated analysis statistics for the current user."""
 
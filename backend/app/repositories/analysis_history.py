@@ -0,0 +1,572 @@
+import asyncio
+import json
+import sqlite3
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from supabase import AsyncClient
+
+from ..core.blob_codec import blob_codec
+from ..core.config import settings
+from ..core.text_search import fts_document, fts_query, query_terms, search_document
+from ..core.tracing import span
+from ..core.video_refs import attach_videos, extract_videos, strip_refs, video_refs
+
+# Columns holding JSON values; SQLite stores them as TEXT.
+JSON_COLUMNS = ("keywords", "platforms", "meta", "result")
+
+# Columns of a run as the API returns it. Supabase reads select these
+# explicitly so denormalized columns such as search_document stay in the table.
+RUN_COLUMNS = (
+    "id", "user_id", "analysis_type", "keywords", "platforms",
+    "summary", "channel_id", "meta", "result", "created_at",
+)
+
+# Columns blob_codec may store compressed.
+BLOB_COLUMNS = ("meta", "result")
+
+# Columns returned by search: everything needed to list a run, without the
+# (large) result and meta blobs.
+SEARCH_COLUMNS = ("id", "user_id", "analysis_type", "keywords", "platforms", "summary", "channel_id", "created_at")
+
+# Keyset position of a row: (created_at, id). ``id`` may be ``None`` for
+# legacy timestamp-only cursors.
+CursorKey = Tuple[str, Optional[str]]
+
+
+def decode_blobs(row: Dict[str, Any]) -> Dict[str, Any]:
+    for column in BLOB_COLUMNS:
+        if column in row:
+            row[column] = blob_codec.decode(row[column])
+    return row
+
+
+class AnalysisHistoryRepository(ABC):
+    """Storage interface for ``analysis_history`` rows.
+
+    Rows are plain dicts shaped like the Supabase table so the service layer
+    does not care which backend it is talking to.
+    """
+
+    @abstractmethod
+    async def insert_runs(self, records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Insert one or more rows and return them as stored."""
+
+    @abstractmethod
+    async def list_runs(
+        self,
+        user_id: str,
+        limit: int,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+        cursor: Optional[CursorKey] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return rows ordered by ``(created_at, id)`` descending.
+
+        Only rows strictly after ``cursor`` in that order are returned, so
+        rows sharing a timestamp are never skipped between pages.
+        """
+
+    @abstractmethod
+    async def get_run(self, user_id: str, analysis_id: str) -> Optional[Dict[str, Any]]:
+        """Return one row or ``None``."""
+
+    @abstractmethod
+    async def delete_run(self, user_id: str, analysis_id: str) -> bool:
+        """Delete one row; return whether anything was deleted."""
+
+    @abstractmethod
+    async def count_runs(
+        self,
+        user_id: str,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+    ) -> int:
+        """Count rows matching the filters."""
+
+    @abstractmethod
+    async def select_column(
+        self,
+        user_id: str,
+        column: str,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return ``{column: value}`` dicts for every matching row."""
+
+    @abstractmethod
+    async def search_runs(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        analysis_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        """Return the user's rows matching every term of ``query`` (``SEARCH_COLUMNS`` only).
+
+        Terms match anywhere in the keywords, summary, video titles, channel
+        names and insights (see :func:`app.core.text_search.search_document`).
+        """
+
+    @abstractmethod
+    async def recent_keywords(self, since: str, limit: int) -> List[Dict[str, Any]]:
+        """Return ``{keywords, channel_id}`` for the newest rows of all users created at or after ``since``."""
+
+
+class SupabaseAnalysisHistoryRepository(AnalysisHistoryRepository):
+    """Async PostgREST implementation sharing one connection pool."""
+
+    # PostgREST accepts array inserts; keep request bodies reasonably small.
+    INSERT_BATCH_SIZE = 500
+    # Hashes per analysis_videos lookup; they go in the URL.
+    VIDEO_BATCH_SIZE = 200
+
+    def __init__(self, client: AsyncClient) -> None:
+        self.client = client
+
+    def _filtered(self, query, user_id: str, analysis_type: Optional[str], channel_id: Optional[str]):
+        query = query.eq("user_id", user_id)
+        if analysis_type:
+            query = query.eq("analysis_type", analysis_type)
+        if channel_id:
+            query = query.eq("channel_id", channel_id)
+        return query
+
+    async def insert_runs(self, records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        stored: List[Dict[str, Any]] = []
+        if settings.ANALYSIS_HISTORY_SEARCH:
+            # Searched with pg_trgm; see migrations/003_analysis_history_search.sql
+            records = [{**record, "search_document": search_document(record)} for record in records]
+        videos: Dict[str, Dict[str, Any]] = {}
+        if settings.ANALYSIS_HISTORY_VIDEO_STORE:
+            # See migrations/004_analysis_videos.sql
+            records = [
+                {**record, "result": extract_videos(record.get("result") or {}, videos)} for record in records
+            ]
+            rows = [{"hash": digest, "video": video} for digest, video in videos.items()]
+            for start in range(0, len(rows), self.INSERT_BATCH_SIZE):
+                await (
+                    self.client.table("analysis_videos")
+                    .upsert(rows[start:start + self.INSERT_BATCH_SIZE], on_conflict="hash", ignore_duplicates=True)
+                    .execute()
+                )
+        else:
+            records = [{**record, "result": strip_refs(record.get("result"))} for record in records]
+        # Compresses when enabled, and always escapes values shaped like its envelope
+        records = [
+            {**record, **{column: blob_codec.encode(record.get(column)) for column in BLOB_COLUMNS}}
+            for record in records
+        ]
+        for start in range(0, len(records), self.INSERT_BATCH_SIZE):
+            batch = list(records[start:start + self.INSERT_BATCH_SIZE])
+            response = await self.client.table("analysis_history").insert(batch).execute()
+            stored.extend(decode_blobs(row) for row in response.data or [])
+        if videos:
+            for row in stored:
+                row["result"] = attach_videos(row.get("result"), videos)
+        return stored
+
+    async def _with_videos(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace video references in the rows' results, with one query per ``VIDEO_BATCH_SIZE`` videos."""
+        refs = sorted(video_refs(row.get("result") for row in rows))
+        if not refs:
+            return rows
+        responses = await asyncio.gather(*(
+            self.client.table("analysis_videos")
+            .select("hash, video")
+            .in_("hash", refs[start:start + self.VIDEO_BATCH_SIZE])
+            .execute()
+            for start in range(0, len(refs), self.VIDEO_BATCH_SIZE)
+        ))
+        videos = {item["hash"]: item["video"] for response in responses for item in response.data or []}
+        for row in rows:
+            row["result"] = attach_videos(row.get("result"), videos)
+        return rows
+
+    async def list_runs(
+        self,
+        user_id: str,
+        limit: int,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+        cursor: Optional[CursorKey] = None,
+    ) -> List[Dict[str, Any]]:
+        query = self._filtered(
+            self.client.table("analysis_history").select(", ".join(RUN_COLUMNS)),
+            user_id,
+            analysis_type,
+            channel_id,
+        )
+        if cursor:
+            created_at, row_id = cursor
+            if row_id:
+                # (created_at, id) < (cursor.created_at, cursor.id); served by
+                # the keyset indexes in migrations/001_analysis_history_keyset.sql
+                query = query.or_(
+                    f'created_at.lt."{created_at}",'
+                    f'and(created_at.eq."{created_at}",id.lt."{row_id}")'
+                )
+            else:
+                query = query.lt("created_at", created_at)
+        response = await (
+            query.order("created_at", desc=True)
+            .order("id", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return await self._with_videos([decode_blobs(row) for row in response.data or []])
+
+    async def get_run(self, user_id: str, analysis_id: str) -> Optional[Dict[str, Any]]:
+        response = await (
+            self.client.table("analysis_history")
+            .select(", ".join(RUN_COLUMNS))
+            .eq("user_id", user_id)
+            .eq("id", analysis_id)
+            .limit(1)
+            .execute()
+        )
+        return (await self._with_videos([decode_blobs(response.data[0])]))[0] if response.data else None
+
+    async def delete_run(self, user_id: str, analysis_id: str) -> bool:
+        response = await (
+            self.client.table("analysis_history")
+            .delete()
+            .eq("user_id", user_id)
+            .eq("id", analysis_id)
+            .execute()
+        )
+        # Supabase returns an empty list when nothing was deleted
+        return bool(response.data)
+
+    async def count_runs(
+        self,
+        user_id: str,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+    ) -> int:
+        query = self._filtered(
+            self.client.table("analysis_history").select("id", count="exact", head=True),
+            user_id,
+            analysis_type,
+            channel_id,
+        )
+        response = await query.execute()
+        return response.count or 0
+
+    async def select_column(
+        self,
+        user_id: str,
+        column: str,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        query = self._filtered(
+            self.client.table("analysis_history").select(column),
+            user_id,
+            analysis_type,
+            channel_id,
+        )
+        response = await query.execute()
+        return [decode_blobs(row) for row in response.data or []]
+
+    async def search_runs(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        analysis_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        terms = query_terms(query)
+        # Without migrations/003 there is no search_document column to match
+        if not terms or not settings.ANALYSIS_HISTORY_SEARCH:
+            return []
+        request = self._filtered(
+            self.client.table("analysis_history").select(", ".join(SEARCH_COLUMNS)),
+            user_id,
+            analysis_type,
+            None,
+        )
+        for term in terms:
+            request = request.ilike("search_document", f"%{term}%")
+        response = await request.order("created_at", desc=True).limit(limit).execute()
+        return response.data or []
+
+    async def recent_keywords(self, since: str, limit: int) -> List[Dict[str, Any]]:
+        response = await (
+            self.client.table("analysis_history")
+            .select("keywords, channel_id")
+            .gte("created_at", since)
+            .order("created_at", desc=True)
+            .limit(limit)
+            .execute()
+        )
+        return response.data or []
+
+
+class SQLiteAnalysisHistoryRepository(AnalysisHistoryRepository):
+    """Local SQLite implementation for development and benchmarks.
+
+    Pass ``":memory:"`` for a throwaway in-memory store. Queries run in a
+    worker thread so the event loop is never blocked on disk I/O.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS analysis_history (
+            id TEXT PRIMARY KEY,
+            user_id TEXT NOT NULL,
+            analysis_type TEXT NOT NULL,
+            keywords TEXT NOT NULL DEFAULT '[]',
+            platforms TEXT NOT NULL DEFAULT '[]',
+            summary TEXT,
+            channel_id TEXT,
+            meta TEXT NOT NULL DEFAULT '{}',
+            result TEXT NOT NULL DEFAULT '{}',
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS analysis_history_user_keyset_idx
+            ON analysis_history (user_id, created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS analysis_history_user_type_keyset_idx
+            ON analysis_history (user_id, analysis_type, created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS analysis_history_user_channel_keyset_idx
+            ON analysis_history (user_id, channel_id, created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS analysis_history_user_channel_type_keyset_idx
+            ON analysis_history (user_id, channel_id, analysis_type, created_at DESC, id DESC);
+        CREATE INDEX IF NOT EXISTS analysis_history_created_idx
+            ON analysis_history (created_at DESC);
+        CREATE TABLE IF NOT EXISTS analysis_videos (
+            hash TEXT PRIMARY KEY,
+            video TEXT NOT NULL
+        ) WITHOUT ROWID;
+    """
+    # Full-text index keyed by analysis_history's rowid. Documents are
+    # pre-tokenized into ASCII words and CJK bigrams (app.core.text_search).
+    FTS_SCHEMA = """
+        CREATE VIRTUAL TABLE analysis_history_fts USING fts5(body, tokenize = 'unicode61 remove_diacritics 0');
+    """
+    COLUMNS = RUN_COLUMNS
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+        self._ensure_fts()
+
+    def _ensure_fts(self) -> None:
+        exists = self.conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'analysis_history_fts'"
+        ).fetchone()
+        if exists:
+            return
+        # First start with search: index the rows saved before it existed.
+        with self.conn:
+            self.conn.executescript(self.FTS_SCHEMA)
+            rows = self.conn.execute("SELECT rowid, keywords, summary, result FROM analysis_history").fetchall()
+            self.conn.executemany(
+                "INSERT INTO analysis_history_fts (rowid, body) VALUES (?, ?)",
+                [(row["rowid"], fts_document(search_document(self._decode(row)))) for row in rows],
+            )
+
+    def _execute(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with self._lock:
+            cursor = self.conn.execute(sql, params)
+            rows = cursor.fetchall()
+            self.conn.commit()
+            return rows
+
+    async def _run(self, sql: str, params: Sequence[Any] = ()) -> List[sqlite3.Row]:
+        with span("sqlite", sql.split(None, 1)[0].upper()):
+            return await asyncio.to_thread(self._execute, sql, params)
+
+    @staticmethod
+    def _where(user_id: str, analysis_type: Optional[str], channel_id: Optional[str]):
+        clauses, params = ["user_id = ?"], [user_id]
+        if analysis_type:
+            clauses.append("analysis_type = ?")
+            params.append(analysis_type)
+        if channel_id:
+            clauses.append("channel_id = ?")
+            params.append(channel_id)
+        return " AND ".join(clauses), params
+
+    @staticmethod
+    def _decode(row: sqlite3.Row) -> Dict[str, Any]:
+        data = dict(row)
+        for column in JSON_COLUMNS:
+            if column in data and data[column] is not None:
+                data[column] = json.loads(data[column])
+        return decode_blobs(data)
+
+    async def _with_videos(self, rows: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Replace video references in the rows' results, with one query for all of them."""
+        refs = list(video_refs(row.get("result") for row in rows))
+        if not refs:
+            return rows
+        stored = await self._run(
+            f"SELECT hash, video FROM analysis_videos WHERE hash IN ({', '.join('?' for _ in refs)})",
+            refs,
+        )
+        videos = {row["hash"]: json.loads(row["video"]) for row in stored}
+        for row in rows:
+            row["result"] = attach_videos(row.get("result"), videos)
+        return rows
+
+    def _check_column(self, column: str) -> None:
+        if column not in self.COLUMNS:
+            raise ValueError(f"Unknown analysis_history column: {column}")
+
+    def _insert_many(self, rows: List[tuple], documents: List[tuple], videos: List[tuple]) -> None:
+        placeholders = ", ".join("?" for _ in self.COLUMNS)
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO analysis_videos (hash, video) VALUES (?, ?)", videos)
+            self.conn.executemany(
+                f"INSERT INTO analysis_history ({', '.join(self.COLUMNS)}) VALUES ({placeholders})",
+                rows,
+            )
+            self.conn.executemany(
+                "INSERT INTO analysis_history_fts (rowid, body)"
+                " SELECT rowid, ? FROM analysis_history WHERE id = ?",
+                documents,
+            )
+
+    def _delete(self, user_id: str, analysis_id: str) -> bool:
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT rowid FROM analysis_history WHERE user_id = ? AND id = ?", (user_id, analysis_id)
+            ).fetchone()
+            if row is None:
+                return False
+            self.conn.execute("DELETE FROM analysis_history_fts WHERE rowid = ?", (row[0],))
+            self.conn.execute("DELETE FROM analysis_history WHERE rowid = ?", (row[0],))
+            return True
+
+    async def insert_runs(self, records: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        stored: List[Dict[str, Any]] = []
+        rows: List[tuple] = []
+        documents: List[tuple] = []
+        videos: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            row = {column: record.get(column) for column in self.COLUMNS}
+            row["id"] = row["id"] or str(uuid.uuid4())
+            row["created_at"] = row["created_at"] or datetime.now(timezone.utc).isoformat()
+            stored.append(dict(row))
+            documents.append((fts_document(search_document(row)), row["id"]))
+            if settings.ANALYSIS_HISTORY_VIDEO_STORE:
+                row["result"] = extract_videos(row["result"] or {}, videos)
+            else:
+                row["result"] = strip_refs(row["result"])
+            for column in BLOB_COLUMNS:
+                row[column] = blob_codec.encode(row[column])
+            for column in JSON_COLUMNS:
+                value = row[column]
+                if value is None:
+                    value = [] if column in ("keywords", "platforms") else {}
+                row[column] = json.dumps(value, ensure_ascii=False)
+            rows.append(tuple(row[column] for column in self.COLUMNS))
+        with span("sqlite", "INSERT", rows=len(rows)):
+            await asyncio.to_thread(
+                self._insert_many,
+                rows,
+                documents,
+                [(digest, json.dumps(video, ensure_ascii=False)) for digest, video in videos.items()],
+            )
+        return stored
+
+    async def list_runs(
+        self,
+        user_id: str,
+        limit: int,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+        cursor: Optional[CursorKey] = None,
+    ) -> List[Dict[str, Any]]:
+        where, params = self._where(user_id, analysis_type, channel_id)
+        if cursor:
+            created_at, row_id = cursor
+            if row_id:
+                where += " AND (created_at, id) < (?, ?)"
+                params.extend([created_at, row_id])
+            else:
+                where += " AND created_at < ?"
+                params.append(created_at)
+        rows = await self._run(
+            f"SELECT * FROM analysis_history WHERE {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            [*params, limit],
+        )
+        return await self._with_videos([self._decode(row) for row in rows])
+
+    async def get_run(self, user_id: str, analysis_id: str) -> Optional[Dict[str, Any]]:
+        rows = await self._run(
+            "SELECT * FROM analysis_history WHERE user_id = ? AND id = ? LIMIT 1",
+            [user_id, analysis_id],
+        )
+        return (await self._with_videos([self._decode(rows[0])]))[0] if rows else None
+
+    async def delete_run(self, user_id: str, analysis_id: str) -> bool:
+        with span("sqlite", "DELETE"):
+            return await asyncio.to_thread(self._delete, user_id, analysis_id)
+
+    async def count_runs(
+        self,
+        user_id: str,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+    ) -> int:
+        where, params = self._where(user_id, analysis_type, channel_id)
+        rows = await self._run(f"SELECT COUNT(*) FROM analysis_history WHERE {where}", params)
+        return rows[0][0]
+
+    async def select_column(
+        self,
+        user_id: str,
+        column: str,
+        analysis_type: Optional[str] = None,
+        channel_id: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        self._check_column(column)
+        where, params = self._where(user_id, analysis_type, channel_id)
+        rows = await self._run(f"SELECT {column} FROM analysis_history WHERE {where}", params)
+        return [self._decode(row) for row in rows]
+
+    async def search_runs(
+        self,
+        user_id: str,
+        query: str,
+        limit: int,
+        analysis_type: Optional[str] = None,
+    ) -> List[Dict[str, Any]]:
+        match = fts_query(query)
+        if match is None:
+            return []
+        where, params = self._where(user_id, analysis_type, None)
+        # The FTS table has no column besides body, so the filter needs no alias.
+        columns = ", ".join(f"h.{column}" for column in SEARCH_COLUMNS)
+        rows = await self._run(
+            f"SELECT {columns} FROM analysis_history_fts f JOIN analysis_history h ON h.rowid = f.rowid"
+            f" WHERE analysis_history_fts MATCH ? AND {where}"
+            " ORDER BY f.rank, h.created_at DESC LIMIT ?",
+            [match, *params, limit],
+        )
+        return [self._decode(row) for row in rows]
+
+    async def recent_keywords(self, since: str, limit: int) -> List[Dict[str, Any]]:
+        rows = await self._run(
+            "SELECT keywords, channel_id FROM analysis_history WHERE created_at >= ?"
+            " ORDER BY created_at DESC LIMIT ?",
+            (since, limit),
+        )
+        return [self._decode(row) for row in rows]
+
+
+async def create_analysis_history_repository() -> AnalysisHistoryRepository:
+    """Build the repository selected by ``ANALYSIS_HISTORY_BACKEND``."""
+    if settings.ANALYSIS_HISTORY_BACKEND == "sqlite":
+        return SQLiteAnalysisHistoryRepository(settings.ANALYSIS_HISTORY_SQLITE_PATH)
+
+    from ..core.database import get_async_supabase
+
+    return SupabaseAnalysisHistoryRepository(await get_async_supabase())
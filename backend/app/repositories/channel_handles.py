@@ -0,0 +1,46 @@
+import sqlite3
+import threading
+import time
+from typing import Optional, Tuple
+
+from ..core.tracing import span
+
+
+class ChannelHandleIndex:
+    """Persistent map from channel handles, custom URLs and usernames to ``UC...`` ids.
+
+    Keys are ``"<kind>:<name>"`` (``handle:foo``, ``custom:foo``,
+    ``user:foo``). A row with a ``NULL`` channel id records a name that did
+    not resolve (negative cache); callers decide how long to trust it from
+    ``resolved_at``. Lookups are small indexed reads, so they run inline.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS channel_handles (
+            key TEXT PRIMARY KEY,
+            channel_id TEXT,
+            resolved_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Tuple[Optional[str], float]]:
+        """``(channel_id, resolved_at)`` for a key, or ``None`` if never resolved."""
+        with span("sqlite", "SELECT"), self._lock:
+            row = self.conn.execute(
+                "SELECT channel_id, resolved_at FROM channel_handles WHERE key = ?", (key,)
+            ).fetchone()
+        return (row[0], row[1]) if row else None
+
+    def put(self, key: str, channel_id: Optional[str]) -> None:
+        """Record a resolution; ``channel_id=None`` records a miss."""
+        with span("sqlite", "INSERT"), self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO channel_handles (key, channel_id, resolved_at) VALUES (?, ?, ?)",
+                (key, channel_id, time.time()),
+            )
+            self.conn.commit()
@@ -0,0 +1,111 @@
+import json
+import math
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from ..core.tracing import span
+
+# (video item with snippet and statistics, subscriber count, viral ratio)
+Candidate = Tuple[Dict[str, Any], int, float]
+
+
+def subscriber_bucket(subscriber_count: int) -> int:
+    """Order of magnitude of a subscriber count (0 for 1-9, 3 for 1,000-9,999)."""
+    return int(math.log10(max(subscriber_count, 1)))
+
+
+class ViralCandidateIndex:
+    """Local index of viral candidates per canonical keyword query.
+
+    Each row is one video found for a ``query_key`` with its channel's
+    subscriber count, the precomputed ``viral_ratio`` (views / subscribers),
+    the subscriber order of magnitude and the publish time. The range index
+    on ``(query_key, subscriber_bucket, viral_ratio)`` answers
+    "ratio >= x, subscribers <= y, best first" without touching rows of
+    other buckets. ``viral_crawls`` records when each query was last
+    harvested. WAL mode lets every worker read while the crawler writes.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS viral_candidates (
+            query_key TEXT NOT NULL,
+            video_id TEXT NOT NULL,
+            viral_ratio REAL NOT NULL,
+            subscriber_count INTEGER NOT NULL,
+            subscriber_bucket INTEGER NOT NULL,
+            published_at TEXT NOT NULL,
+            item TEXT NOT NULL,
+            PRIMARY KEY (query_key, video_id)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS viral_candidates_range_idx
+            ON viral_candidates (query_key, subscriber_bucket, viral_ratio DESC);
+        CREATE TABLE IF NOT EXISTS viral_crawls (
+            query_key TEXT PRIMARY KEY,
+            crawled_at REAL NOT NULL,
+            candidates INTEGER NOT NULL
+        );
+    """
+
+    def __init__(self, path: str = ":memory:") -> None:
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=10.0)
+        if path != ":memory:":
+            self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(self.SCHEMA)
+        self._lock = threading.Lock()
+
+    def crawled_at(self, query_key: str) -> Optional[float]:
+        """When ``query_key`` was last stored, or ``None`` if never."""
+        with span("sqlite", "SELECT"), self._lock:
+            row = self.conn.execute(
+                "SELECT crawled_at FROM viral_crawls WHERE query_key = ?", (query_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def crawl_times(self) -> Dict[str, float]:
+        with span("sqlite", "SELECT"), self._lock:
+            return dict(self.conn.execute("SELECT query_key, crawled_at FROM viral_crawls").fetchall())
+
+    def candidates(
+        self, query_key: str, min_viral_ratio: float, max_subscribers: int, limit: int
+    ) -> List[Candidate]:
+        """Best candidates by viral ratio within the subscriber and ratio limits."""
+        with span("sqlite", "SELECT"), self._lock:
+            rows = self.conn.execute(
+                "SELECT item, subscriber_count, viral_ratio FROM viral_candidates"
+                " WHERE query_key = ? AND subscriber_bucket <= ? AND subscriber_count <= ?"
+                " AND viral_ratio >= ? ORDER BY viral_ratio DESC LIMIT ?",
+                (query_key, subscriber_bucket(max_subscribers), max_subscribers, min_viral_ratio, limit),
+            ).fetchall()
+        return [(json.loads(item), subscriber_count, viral_ratio) for item, subscriber_count, viral_ratio in rows]
+
+    def replace(self, query_key: str, candidates: Sequence[Candidate]) -> None:
+        """Store a fresh harvest for ``query_key``, dropping what was there."""
+        rows = [
+            (
+                query_key,
+                item["id"],
+                viral_ratio,
+                subscriber_count,
+                subscriber_bucket(subscriber_count),
+                item["snippet"].get("publishedAt", ""),
+                json.dumps(item, ensure_ascii=False),
+            )
+            for item, subscriber_count, viral_ratio in candidates
+        ]
+        with span("sqlite", "INSERT"), self._lock, self.conn:
+            self.conn.execute("DELETE FROM viral_candidates WHERE query_key = ?", (query_key,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO viral_candidates (query_key, video_id, viral_ratio, subscriber_count,"
+                " subscriber_bucket, published_at, item) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self.conn.execute(
+                "INSERT OR REPLACE INTO viral_crawls (query_key, crawled_at, candidates) VALUES (?, ?, ?)",
+                (query_key, time.time(), len(rows)),
+            )
+
+    def size(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM viral_candidates").fetchone()[0]
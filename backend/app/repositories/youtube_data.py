@@ -0,0 +1,384 @@
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+from ..core.config import settings
+from ..core.query_keys import query_key
+from ..core.shared_cache import SharedCache, cache_key, get_shared_cache
+from ..core.tracing import record_cache_lookup
+from ..core.youtube_client import get_youtube_client
+
+logger = logging.getLogger(__name__)
+
+Item = Dict[str, Any]
+
+
+class YouTubeDataProvider(ABC):
+    """Source of YouTube Data API resources: search results, videos and channels.
+
+    Every method returns dicts shaped like the ``items`` of the matching API
+    response, so the services parse them the same way whichever provider
+    served them. Methods are synchronous, like the services calling them:
+    googleapiclient is blocking, so async code calls them (and the raw
+    client) through ``run_in_threadpool`` to keep them off the event loop.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def search(
+        self,
+        query: str,
+        max_results: int,
+        order: str = "viewCount",
+        published_after: Optional[str] = None,
+        short_only: bool = False,
+    ) -> List[Item]:
+        """``search().list`` items (``id.videoId`` and ``snippet``) for a query."""
+
+    @abstractmethod
+    def videos(self, video_ids: Sequence[str], part: str = "snippet,statistics") -> List[Item]:
+        """``videos().list`` items for the given ids."""
+
+    @abstractmethod
+    def channels(self, channel_ids: Sequence[str]) -> List[Item]:
+        """``channels().list`` items with ``statistics`` for the given ids."""
+
+
+class LiveYouTubeDataProvider(YouTubeDataProvider):
+    """The YouTube Data API, through the shared pooled client."""
+
+    name = "live"
+
+    def __init__(self, youtube) -> None:
+        self.youtube = youtube
+
+    def search(self, query, max_results, order="viewCount", published_after=None, short_only=False):
+        params = dict(
+            q=query,
+            part="id,snippet",
+            maxResults=max_results,
+            order=order,
+            type="video",
+            regionCode="JP",
+            relevanceLanguage="ja",
+        )
+        if published_after:
+            params["publishedAfter"] = published_after
+        if short_only:
+            params["videoDuration"] = "short"
+        return self.youtube.search().list(**params).execute().get("items", [])
+
+    def videos(self, video_ids, part="snippet,statistics"):
+        if not video_ids:
+            return []
+        return self.youtube.videos().list(id=",".join(video_ids), part=part).execute().get("items", [])
+
+    def channels(self, channel_ids):
+        if not channel_ids:
+            return []
+        return self.youtube.channels().list(id=",".join(channel_ids), part="statistics").execute().get("items", [])
+
+
+_TITLE_PATTERNS = (
+    "{term}で人生変わった話",
+    "【{days}日間】{term}チャレンジの結果",
+    "知らないと損する{term}のコツ{count}選",
+    "{term}初心者がやりがちなミス{count}つ",
+    "プロが教える{term}の裏ワザ",
+    "{term}を{days}日続けたらこうなった",
+    "たった{minutes}分でできる{term}",
+    "{term}の常識が変わる{count}つの事実",
+)
+_CHANNEL_PREFIXES = ("", "ゆる", "毎日", "週末", "ひとり", "本気の")
+_CHANNEL_SUFFIXES = ("ちゃんねる", "ラボ", "TV", "日記", "研究所", "のある暮らし")
+
+
+def _digest(*parts: Any) -> bytes:
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).digest()
+
+
+class SyntheticYouTubeDataProvider(YouTubeDataProvider):
+    """Instant, seeded stand-in for the YouTube Data API.
+
+    The same seed and query always give the same videos, channels and
+    statistics; queries are canonicalized first, so word order and
+    full-width/half-width spelling do not matter. Publication dates count
+    back from the current UTC day. Views are log-normal and most channels
+    are small, so the viral finder has candidates to filter.
+    """
+
+    name = "synthetic"
+
+    def __init__(self, seed: int = 0, max_videos: int = 10_000) -> None:
+        self.seed = seed
+        self.max_videos = max_videos
+        # Videos handed out by search, so ``videos()`` can return the same items.
+        self._videos: "OrderedDict[str, Item]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _rng(self, *parts: Any) -> random.Random:
+        return random.Random(int.from_bytes(_digest(self.seed, *parts)[:8], "big"))
+
+    def _video(self, key: str, index: int) -> Item:
+        video_id = "syn" + _digest(self.seed, key, index).hex()[:8]
+        rng = self._rng("video", video_id)
+        terms = key.split() or ["ショート"]
+        title = rng.choice(_TITLE_PATTERNS).format(
+            term=rng.choice(terms),
+            days=rng.choice((3, 7, 30, 100)),
+            count=rng.randint(3, 10),
+            minutes=rng.choice((1, 3, 5)),
+        )
+        channel_name = rng.choice(_CHANNEL_PREFIXES) + rng.choice(terms) + rng.choice(_CHANNEL_SUFFIXES)
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        published = today - timedelta(days=rng.randint(1, 89), minutes=rng.randint(0, 1439))
+        views = int(rng.lognormvariate(11.5, 1.2))
+        return {
+            "kind": "youtube#video",
+            "id": video_id,
+            "snippet": {
+                "publishedAt": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                "channelId": "UCsyn" + _digest(self.seed, "channel", channel_name).hex()[:17],
+                "channelTitle": channel_name,
+                "title": title,
+                "description": f"{title}。{'、'.join(terms)}について解説します。",
+                "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+                "tags": [*terms, "shorts"],
+            },
+            "statistics": {
+                "viewCount": str(views),
+                "likeCount": str(int(views * rng.uniform(0.01, 0.06))),
+                "commentCount": str(int(views * rng.uniform(0.0005, 0.004))),
+            },
+            "contentDetails": {"duration": f"PT{rng.randint(15, 59)}S"},
+        }
+
+    def search(self, query, max_results, order="viewCount", published_after=None, short_only=False):
+        key = query_key([query.replace("#shorts", " ")])
+        videos = [self._video(key, index) for index in range(max_results)]
+        with self._lock:
+            for video in videos:
+                self._videos[video["id"]] = video
+                self._videos.move_to_end(video["id"])
+            while len(self._videos) > self.max_videos:
+                self._videos.popitem(last=False)
+        if order == "viewCount":
+            videos.sort(key=lambda video: int(video["statistics"]["viewCount"]), reverse=True)
+        elif order == "date":
+            videos.sort(key=lambda video: video["snippet"]["publishedAt"], reverse=True)
+        return [
+            {"kind": "youtube#searchResult", "id": {"kind": "youtube#video", "videoId": video["id"]}, "snippet": video["snippet"]}
+            for video in videos
+        ]
+
+    def videos(self, video_ids, part="snippet,statistics"):
+        with self._lock:
+            return [self._videos[video_id] for video_id in video_ids if video_id in self._videos]
+
+    def channels(self, channel_ids):
+        items = []
+        for channel_id in channel_ids:
+            rng = self._rng("channel", channel_id)
+            subscribers = max(int(rng.lognormvariate(9.0, 1.5)), 10)
+            items.append({
+                "kind": "youtube#channel",
+                "id": channel_id,
+                "statistics": {
+                    "subscriberCount": str(subscribers),
+                    "videoCount": str(rng.randint(10, 800)),
+                    "viewCount": str(subscribers * rng.randint(20, 400)),
+                },
+            })
+        return items
+
+
+def _search_key(query: str, order: str, short_only: bool) -> str:
+    return f"{query_key([query])}|{order}|{'short' if short_only else 'any'}"
+
+
+class FixtureYouTubeDataProvider(YouTubeDataProvider):
+    """Replays API responses recorded to a JSON file.
+
+    The file holds ``{"search": {key: [items]}, "videos": {id: item},
+    "channels": {id: item}}``; search keys are the canonical query plus the
+    order and duration filter, so a replay matches however the keywords were
+    spelled. A query that was never recorded returns no items.
+    """
+
+    name = "fixtures"
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._data: Dict[str, Dict[str, Any]] = {"search": {}, "videos": {}, "channels": {}}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                for section, entries in json.load(f).items():
+                    self._data.setdefault(section, {}).update(entries)
+        else:
+            logger.warning(f"YouTube fixtures file not found: {path}")
+
+    def search(self, query, max_results, order="viewCount", published_after=None, short_only=False):
+        items = self._data["search"].get(_search_key(query, order, short_only))
+        if items is None:
+            logger.debug(f"No recorded search for {query!r}")
+            return []
+        return items[:max_results]
+
+    def videos(self, video_ids, part="snippet,statistics"):
+        recorded = self._data["videos"]
+        return [recorded[video_id] for video_id in video_ids if video_id in recorded]
+
+    def channels(self, channel_ids):
+        recorded = self._data["channels"]
+        return [recorded[channel_id] for channel_id in channel_ids if channel_id in recorded]
+
+
+class RecordingYouTubeDataProvider(FixtureYouTubeDataProvider):
+    """Serves from another provider and records every response to a fixtures file.
+
+    Records merge into what the file already holds. The file is rewritten
+    atomically after each call, which is fine for capturing a demo or test
+    session but not meant for production traffic.
+    """
+
+    name = "recording"
+
+    def __init__(self, source: YouTubeDataProvider, path: str) -> None:
+        super().__init__(path)
+        self.source = source
+
+    def _save(self) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._data, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+    def search(self, query, max_results, order="viewCount", published_after=None, short_only=False):
+        items = self.source.search(query, max_results, order, published_after, short_only)
+        with self._lock:
+            self._data["search"][_search_key(query, order, short_only)] = items
+            self._save()
+        return items
+
+    def videos(self, video_ids, part="snippet,statistics"):
+        items = self.source.videos(video_ids, part)
+        with self._lock:
+            for item in items:
+                # Keep the richest part set seen for each video.
+                recorded = self._data["videos"].get(item["id"], {})
+                self._data["videos"][item["id"]] = {**recorded, **item}
+            self._save()
+        return items
+
+    def channels(self, channel_ids):
+        items = self.source.channels(channel_ids)
+        with self._lock:
+            for item in items:
+                self._data["channels"][item["id"]] = item
+            self._save()
+        return items
+
+
+class CachedYouTubeDataProvider(YouTubeDataProvider):
+    """Serves repeated calls from the shared cache for ``ttl`` seconds.
+
+    Searches are cached per canonical query and filters; videos and channels
+    per id (and part set), so a batch only fetches the ids not cached yet.
+    With ``CACHE_BACKEND=sqlite`` one worker's response serves all of them.
+    """
+
+    def __init__(self, source: YouTubeDataProvider, cache: SharedCache, ttl: float) -> None:
+        self.source = source
+        self.cache = cache
+        self.ttl = ttl
+        self.name = source.name
+
+    def search(self, query, max_results, order="viewCount", published_after=None, short_only=False):
+        key = cache_key("search", query_key([query]), max_results, order, published_after, short_only)
+        items = self.cache.lookup("youtube", key)
+        if items is None:
+            items = self.source.search(query, max_results, order, published_after, short_only)
+            self.cache.set("youtube", key, items, self.ttl)
+        return items
+
+    def _by_id(self, kind: str, ids: Sequence[str], fetch) -> List[Item]:
+        keys = {item_id: cache_key(kind, item_id) for item_id in ids}
+        cached = self.cache.get_many("youtube", list(keys.values()))
+        missing = [item_id for item_id in ids if keys[item_id] not in cached]
+        for item_id in ids:
+            record_cache_lookup("youtube", item_id not in missing)
+        found = {item_id: cached[keys[item_id]] for item_id in ids if keys[item_id] in cached}
+        if missing:
+            fetched = {item["id"]: item for item in fetch(missing)}
+            self.cache.set_many("youtube", {keys[item_id]: item for item_id, item in fetched.items()}, self.ttl)
+            found.update(fetched)
+        # Same order as the ids; unknown ids are dropped like the API does.
+        return [found[item_id] for item_id in ids if item_id in found]
+
+    def videos(self, video_ids, part="snippet,statistics"):
+        return self._by_id(f"videos:{part}", video_ids, lambda ids: self.source.videos(ids, part))
+
+    def channels(self, channel_ids):
+        return self._by_id("channels", channel_ids, self.source.channels)
+
+
+_providers: Dict[str, Optional[YouTubeDataProvider]] = {}
+_providers_lock = threading.Lock()
+
+
+def _build_provider(name: str) -> Optional[YouTubeDataProvider]:
+    if name == "live":
+        youtube = get_youtube_client()
+        if youtube is None:
+            return None
+        provider: YouTubeDataProvider = LiveYouTubeDataProvider(youtube)
+        if settings.YOUTUBE_FIXTURES_RECORD:
+            return RecordingYouTubeDataProvider(provider, settings.YOUTUBE_FIXTURES_PATH)
+        if settings.YOUTUBE_CACHE_TTL > 0:
+            provider = CachedYouTubeDataProvider(provider, get_shared_cache(), settings.YOUTUBE_CACHE_TTL)
+        return provider
+    if name == "synthetic":
+        return SyntheticYouTubeDataProvider(settings.SYNTHETIC_DATA_SEED)
+    if name == "fixtures":
+        return FixtureYouTubeDataProvider(settings.YOUTUBE_FIXTURES_PATH)
+    if name in ("gemini", "none", ""):
+        return None
+    raise ValueError(f"Unknown YouTube data provider: {name}")
+
+
+def _shared_provider(name: str) -> Optional[YouTubeDataProvider]:
+    # One instance per kind, so services share a recorder (and its file) and
+    # the synthetic provider's videos.
+    with _providers_lock:
+        if name not in _providers:
+            _providers[name] = _build_provider(name)
+        return _providers[name]
+
+
+def create_youtube_data_provider() -> Optional[YouTubeDataProvider]:
+    """Build the provider selected by ``YOUTUBE_DATA_PROVIDER``.
+
+    ``None`` when it is ``live`` and ``YOUTUBE_API_KEY`` is unset; callers
+    then use the fallback provider.
+    """
+    return _shared_provider(settings.YOUTUBE_DATA_PROVIDER)
+
+
+def create_fallback_data_provider() -> Optional[YouTubeDataProvider]:
+    """Build the provider selected by ``YOUTUBE_FALLBACK_PROVIDER``.
+
+    ``None`` for ``gemini`` and ``none``, which the services handle
+    themselves (a Gemini-generated mock, or no results).
+    """
+    return _shared_provider(settings.YOUTUBE_FALLBACK_PROVIDER)
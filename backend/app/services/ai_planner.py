@@ -1,5 +1,7 @@
-import google.generativeai as genai
-from ..core.config import settings
+import logging
+from ..core.prompts import prompt_registry
+from ..core.tokens import fit_items, prompt_budget, truncate_text
+from ..core.tracing import instrumented
 from ..models.schemas import (
     PersonaInput,
     ChannelStrategy,
@@ -8,44 +10,35 @@ from ..models.schemas import (
     PlanningResponse
 )
 import json
-from typing import List
+from typing import Any, Dict, List
 
-# Configure Gemini API
-genai.configure(api_key=settings.GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
 
+# 静的な指示（役割・出力形式・注意事項）はシステム指示としてテンプレートに分離し、
+# リクエストごとに変わるペルソナや動画コンセプトだけを本文として送る
 
-class AIPlanner:
-    """AI企画案生成サービス"""
-
-    def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-
-    def generate_channel_strategy(
-        self,
-        persona: PersonaInput,
-        channel_genre: str,
-        channel_name: str = None
-    ) -> ChannelStrategy:
-        """チャンネル戦略を生成"""
-
-        prompt = f"""
-あなたは日本のYouTubeチャンネル戦略の専門家です。以下のペルソナ情報に基づいて、日本市場で成功する戦略的なチャンネル企画案を提案してください。
-
+_PERSONA_BODY = """
 ## ペルソナ情報
-- 年齢層: {persona.age_range}
-- 性別: {persona.gender}
-- 興味関心: {', '.join(persona.interests)}
-- 悩み・課題: {', '.join(persona.pain_points)}
-- 目標: {', '.join(persona.goals)}
-- コンテンツの好み: {persona.content_preferences}
+- 年齢層: {age_range}
+- 性別: {gender}
+- 興味関心: {interests}
+- 悩み・課題: {pain_points}
+- 目標: {goals}
+- コンテンツの好み: {content_preferences}
 
 ## チャンネルジャンル
 {channel_genre}
+"""
+
+CHANNEL_STRATEGY_PROMPT = prompt_registry.register(
+    "ai_planner.channel_strategy",
+    instruction="""
+あなたは日本のYouTubeチャンネル戦略の専門家です。与えられたペルソナ情報とチャンネルジャンルに基づいて、日本市場で成功する戦略的なチャンネル企画案を提案してください。
 
 ## 指示
 以下のJSON形式で、戦略的なチャンネル企画案を作成してください。特に、日本市場の特性や視聴者の行動パターンを考慮し、具体的なアクションプランを含めてください：
 
-{{
+{
   "channel_concept": "チャンネルの核となるコンセプト（1-2文）",
   "unique_value": "日本市場における他のチャンネルとの差別化ポイント",
   "target_audience": "ターゲット視聴者の具体的な描写（日本の視聴者の特徴を考慮）",
@@ -53,192 +46,115 @@ class AIPlanner:
   "posting_frequency": "推奨投稿頻度と理由（日本の視聴習慣を考慮）",
   "growth_strategy": ["戦略1（具体的な日本のプロモーション方法など）", "戦略2", "戦略3", "戦略4", "戦略5"],
   "video_concepts": [
-    {{
+    {
       "title": "動画タイトル（クリックされやすいもの）",
       "description": "動画の内容説明",
       "hook": "最初の5秒で視聴者を引き込むフック",
       "key_points": ["ポイント1", "ポイント2", "ポイント3"],
       "cta": "視聴者に促す行動",
       "estimated_length": "推奨動画尺"
-    }}
+    }
   ]
-}}
+}
 
 ※ video_concepts は5つの初期動画アイデアを含めてください。
 ※ すべて日本語で記述してください。
 ※ JSONのみを返してください。説明文は不要です。
-"""
-
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            # Extract JSON from markdown code blocks if present
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-
-            data = json.loads(response_text)
-            return ChannelStrategy(**data)
-
-        except Exception as e:
-            print(f"Error generating strategy: {e}")
-            raise
-
-    def generate_video_concepts(
-        self,
-        persona: PersonaInput,
-        channel_genre: str,
-        video_count: int = 5
-    ) -> List[VideoConcept]:
-        """動画コンセプトを生成"""
-
-        prompt = f"""
-あなたはYouTubeコンテンツクリエイターの専門家です。以下のペルソナに最適な動画コンセプトを{video_count}個提案してください。
-
-## ペルソナ情報
-- 年齢層: {persona.age_range}
-- 性別: {persona.gender}
-- 興味関心: {', '.join(persona.interests)}
-- 悩み・課題: {', '.join(persona.pain_points)}
-- 目標: {', '.join(persona.goals)}
-- コンテンツの好み: {persona.content_preferences}
+""",
+    body=_PERSONA_BODY,
+)
 
-## チャンネルジャンル
-{channel_genre}
+VIDEO_CONCEPTS_PROMPT = prompt_registry.register(
+    "ai_planner.video_concepts",
+    instruction="""
+あなたはYouTubeコンテンツクリエイターの専門家です。与えられたペルソナに最適な動画コンセプトを、指定された本数だけ提案してください。
 
 ## 指示
-以下のJSON配列形式で、{video_count}個の動画コンセプトを作成してください：
+以下のJSON配列形式で、指定された本数の動画コンセプトを作成してください：
 
 [
-  {{
+  {
     "title": "クリックされやすい魅力的なタイトル",
     "description": "動画の内容（2-3文）",
     "hook": "最初の5秒で視聴者を引き込むフレーズ",
     "key_points": ["伝えるポイント1", "ポイント2", "ポイント3"],
     "cta": "動画の最後に促す行動",
     "estimated_length": "推奨動画尺（例：8-10分）"
-  }}
+  }
 ]
 
 ※ すべて日本語で記述してください。
 ※ タイトルは感情を刺激し、具体的な数字や利益を含めてください。
 ※ JSONのみを返してください。説明文は不要です。
-"""
-
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            # Extract JSON from markdown code blocks if present
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-
-            data = json.loads(response_text)
-            return [VideoConcept(**concept) for concept in data]
-
-        except Exception as e:
-            print(f"Error generating video concepts: {e}")
-            raise
-
-    def generate_content_calendar(
-        self,
-        persona: PersonaInput,
-        channel_genre: str,
-        weeks: int = 4
-    ) -> List[ContentCalendar]:
-        """コンテンツカレンダーを生成（4週間分）"""
-
-        prompt = f"""
-あなたはYouTubeコンテンツカレンダーの専門家です。以下のペルソナに基づいて、{weeks}週間分のコンテンツカレンダーを作成してください。
-
-## ペルソナ情報
-- 年齢層: {persona.age_range}
-- 性別: {persona.gender}
-- 興味関心: {', '.join(persona.interests)}
-- 悩み・課題: {', '.join(persona.pain_points)}
-- 目標: {', '.join(persona.goals)}
-- コンテンツの好み: {persona.content_preferences}
+""",
+    body=_PERSONA_BODY + """
+## 本数
+{video_count}個
+""",
+)
 
-## チャンネルジャンル
-{channel_genre}
+CONTENT_CALENDAR_PROMPT = prompt_registry.register(
+    "ai_planner.content_calendar",
+    instruction="""
+あなたはYouTubeコンテンツカレンダーの専門家です。与えられたペルソナに基づいて、指定された週数分のコンテンツカレンダーを作成してください。
 
 ## 指示
 各週に2-3本の動画を配置し、週ごとにテーマを設定してください。
 以下のJSON配列形式で作成してください：
 
 [
-  {{
+  {
     "week": 1,
     "theme": "第1週のテーマ",
     "videos": [
-      {{
+      {
         "title": "動画タイトル",
         "description": "動画の内容",
         "hook": "冒頭フック",
         "key_points": ["ポイント1", "ポイント2", "ポイント3"],
         "cta": "Call to Action",
         "estimated_length": "推奨動画尺"
-      }}
+      }
     ]
-  }}
+  }
 ]
 
 ※ すべて日本語で記述してください。
 ※ 各週のテーマは関連性を持たせ、段階的に視聴者を育成する設計にしてください。
 ※ JSONのみを返してください。説明文は不要です。
-"""
-
-        try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-
-            # Extract JSON from markdown code blocks if present
-            if "```json" in response_text:
-                response_text = response_text.split("```json")[1].split("```")[0].strip()
-            elif "```" in response_text:
-                response_text = response_text.split("```")[1].split("```")[0].strip()
-
-            data = json.loads(response_text)
-            return [ContentCalendar(**week) for week in data]
-
-        except Exception as e:
-            print(f"Error generating content calendar: {e}")
-            raise
-
-    def generate_full_plan(
-        self,
-        persona: PersonaInput,
-        channel_genre: str,
-        channel_name: str = None
-    ) -> PlanningResponse:
-        """完全な企画案を生成（戦略 + カレンダー）"""
-
-        # Generate channel strategy
-        strategy = self.generate_channel_strategy(persona, channel_genre, channel_name)
+""",
+    body=_PERSONA_BODY + """
+## 期間
+{weeks}週間
+""",
+)
 
-        # Generate content calendar
-        calendar = self.generate_content_calendar(persona, channel_genre, weeks=4)
+_SHOOTING_MATERIALS_HEAD = """
+あなたはYouTube動画制作の専門家です。与えられた動画コンセプトに基づいて、日本市場向けの具体的な撮影関連資料（構成書）を作成してください。
 
-        return PlanningResponse(
-            strategy=strategy,
-            calendar=calendar
-        )
+## 指示
+動画コンセプトを基に、日本市場の視聴者に響くような構成書を作成してください。
+"""
 
-    def generate_shooting_materials(
-        self,
-        video_concept: VideoConcept,
-        format: str = "json"
-    ) -> str:
-        """動画コンセプトから撮影関連資料（構成書）を生成する"""
+_SHOOTING_MATERIALS_TAIL = """
+※ すべて日本語で記述してください。
+※ JSONまたはMarkdownのみを返してください。説明文は不要です。
+"""
 
-        if format.lower() not in ["json", "markdown"]:
-            raise ValueError("Unsupported format. Choose 'json' or 'markdown'.")
+_SHOOTING_MATERIALS_BODY = """
+## 動画コンセプト
+- タイトル: {title}
+- 説明: {description}
+- フック: {hook}
+- 主要ポイント: {key_points}
+- CTA: {cta}
+- 推奨尺: {estimated_length}
+"""
 
-        json_format_description = """
+SHOOTING_MATERIALS_PROMPTS = {
+    "json": prompt_registry.register(
+        "ai_planner.shooting_materials_json",
+        instruction=_SHOOTING_MATERIALS_HEAD + """
 以下のJSON形式で出力してください。各フィールドはオプションであり、関連性の高いもののみを埋めてください。:
 
 {
@@ -269,9 +185,12 @@ class AIPlanner:
   ],
   "production_notes": "制作上の注意点やヒント"
 }
-"""
-
-        markdown_format_description = """
+""" + _SHOOTING_MATERIALS_TAIL,
+        body=_SHOOTING_MATERIALS_BODY,
+    ),
+    "markdown": prompt_registry.register(
+        "ai_planner.shooting_materials_markdown",
+        instruction=_SHOOTING_MATERIALS_HEAD + """
 以下のMarkdown形式で出力してください。各セクションはオプションであり、関連性の高いもののみを埋めてください。:
 
 # 動画タイトル
@@ -311,32 +230,156 @@ class AIPlanner:
 
 ## 制作上の注意点
 制作上の注意点やヒント
-"""
+""" + _SHOOTING_MATERIALS_TAIL,
+        body=_SHOOTING_MATERIALS_BODY,
+    ),
+}
 
-        format_description = json_format_description if format.lower() == "json" else markdown_format_description
 
-        prompt = f"""
-あなたはYouTube動画制作の専門家です。以下の動画コンセプトに基づいて、日本市場向けの具体的な撮影関連資料（構成書）を作成してください。
+class AIPlanner:
+    """AI企画案生成サービス"""
 
-## 動画コンセプト
-- タイトル: {video_concept.title}
-- 説明: {video_concept.description}
-- フック: {video_concept.hook}
-- 主要ポイント: {', '.join(video_concept.key_points)}
-- CTA: {video_concept.cta}
-- 推奨尺: {video_concept.estimated_length}
+    @staticmethod
+    def _persona_values(persona: PersonaInput, channel_genre: str, budget: int) -> Dict[str, Any]:
+        """ペルソナ情報をトークン予算内に収めてテンプレートの値にする"""
+        return {
+            "age_range": truncate_text(persona.age_range, 20),
+            "gender": truncate_text(persona.gender, 20),
+            "interests": ", ".join(fit_items(persona.interests, budget // 4, item_tokens=40)),
+            "pain_points": ", ".join(fit_items(persona.pain_points, budget // 4, item_tokens=40)),
+            "goals": ", ".join(fit_items(persona.goals, budget // 4, item_tokens=40)),
+            "content_preferences": truncate_text(persona.content_preferences, budget // 4),
+            "channel_genre": truncate_text(channel_genre, 50),
+        }
+
+    @instrumented("ai_planner")
+    def generate_channel_strategy(
+        self,
+        persona: PersonaInput,
+        channel_genre: str,
+        channel_name: str = None
+    ) -> ChannelStrategy:
+        """チャンネル戦略を生成"""
 
-## 指示
-上記の動画コンセプトを基に、日本市場の視聴者に響くような構成書を作成してください。
+        values = self._persona_values(persona, channel_genre, prompt_budget("ai_planner.generate_channel_strategy", 600))
 
-{format_description}
+        try:
+            response = CHANNEL_STRATEGY_PROMPT.generate(**values)
+            response_text = response.text.strip()
 
-※ すべて日本語で記述してください。
-※ JSONまたはMarkdownのみを返してください。説明文は不要です。
-"""
+            # Extract JSON from markdown code blocks if present
+            if "```json" in response_text:
+                response_text = response_text.split("```json")[1].split("```")[0].strip()
+            elif "```" in response_text:
+                response_text = response_text.split("```")[1].split("```")[0].strip()
+
+            data = json.loads(response_text)
+            return ChannelStrategy(**data)
+
+        except Exception as e:
+            logger.error(f"Error generating strategy: {e}")
+            raise
+
+    @instrumented("ai_planner")
+    def generate_video_concepts(
+        self,
+        persona: PersonaInput,
+        channel_genre: str,
+        video_count: int = 5
+    ) -> List[VideoConcept]:
+        """動画コンセプトを生成"""
+
+        values = self._persona_values(persona, channel_genre, prompt_budget("ai_planner.generate_video_concepts", 600))
+
+        try:
+            response = VIDEO_CONCEPTS_PROMPT.generate(video_count=video_count, **values)
+            response_text = response.text.strip()
+
+            # Extract JSON from markdown code blocks if present
+            if "```json" in response_text:
+                response_text = response_text.split("```json")[1].split("```")[0].strip()
+            elif "```" in response_text:
+                response_text = response_text.split("```")[1].split("```")[0].strip()
+
+            data = json.loads(response_text)
+            return [VideoConcept(**concept) for concept in data]
+
+        except Exception as e:
+            logger.error(f"Error generating video concepts: {e}")
+            raise
+
+    @instrumented("ai_planner")
+    def generate_content_calendar(
+        self,
+        persona: PersonaInput,
+        channel_genre: str,
+        weeks: int = 4
+    ) -> List[ContentCalendar]:
+        """コンテンツカレンダーを生成（4週間分）"""
+
+        values = self._persona_values(persona, channel_genre, prompt_budget("ai_planner.generate_content_calendar", 600))
+
+        try:
+            response = CONTENT_CALENDAR_PROMPT.generate(weeks=weeks, **values)
+            response_text = response.text.strip()
+
+            # Extract JSON from markdown code blocks if present
+            if "```json" in response_text:
+                response_text = response_text.split("```json")[1].split("```")[0].strip()
+            elif "```" in response_text:
+                response_text = response_text.split("```")[1].split("```")[0].strip()
+
+            data = json.loads(response_text)
+            return [ContentCalendar(**week) for week in data]
+
+        except Exception as e:
+            logger.error(f"Error generating content calendar: {e}")
+            raise
+
+    @instrumented("ai_planner")
+    def generate_full_plan(
+        self,
+        persona: PersonaInput,
+        channel_genre: str,
+        channel_name: str = None
+    ) -> PlanningResponse:
+        """完全な企画案を生成（戦略 + カレンダー）"""
+
+        # Generate channel strategy
+        strategy = self.generate_channel_strategy(persona, channel_genre, channel_name)
+
+        # Generate content calendar
+        calendar = self.generate_content_calendar(persona, channel_genre, weeks=4)
+
+        return PlanningResponse(
+            strategy=strategy,
+            calendar=calendar
+        )
+
+    @instrumented("ai_planner")
+    def generate_shooting_materials(
+        self,
+        video_concept: VideoConcept,
+        format: str = "json"
+    ) -> str:
+        """動画コンセプトから撮影関連資料（構成書）を生成する"""
+
+        if format.lower() not in ["json", "markdown"]:
+            raise ValueError("Unsupported format. Choose 'json' or 'markdown'.")
+
+        # 入力の長さでプロンプトが際限なく伸びないよう、項目ごとに予算を割り当てる
+        budget = prompt_budget("ai_planner.generate_shooting_materials", 1200)
+        values = {
+            "title": truncate_text(video_concept.title, budget // 16),
+            "description": truncate_text(video_concept.description, budget // 2),
+            "hook": truncate_text(video_concept.hook, budget // 8),
+            "key_points": ", ".join(fit_items(video_concept.key_points, budget // 4, item_tokens=budget // 16)),
+            "cta": truncate_text(video_concept.cta, budget // 16),
+            "estimated_length": truncate_text(video_concept.estimated_length, 20),
+        }
 
         try:
-            response = self.model.generate_content(prompt)
+            response = SHOOTING_MATERIALS_PROMPTS[format.lower()].generate(**values)
             response_text = response.text.strip()
 
             # Extract content from markdown code blocks if present
@@ -350,7 +393,7 @@ class AIPlanner:
             return response_text
 
         except Exception as e:
-            print(f"Error generating shooting materials: {e}")
+            logger.error(f"Error generating shooting materials: {e}")
             raise
 
 
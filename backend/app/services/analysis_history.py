@@ -1,148 +1,244 @@
-from typing import Any, Dict, List, Optional
+import asyncio
+import base64
+import binascii
+import json
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 from uuid import UUID
 
-from supabase import Client
-from ..core.database import get_supabase
+from ..core.config import settings
+from ..core.etags import user_versions
+from ..core.metrics import registry
+from ..core.query_keys import canonical_terms, query_key
+from ..core.tracing import record_cache_lookup
+
 from ..models.analysis import (
     AnalysisRunCreate,
     AnalysisRunListResponse,
     AnalysisRunResponse,
+    AnalysisSearchHit,
+    AnalysisSearchResponse,
     AnalysisStatsResponse,
     AnalysisType,
 )
+from ..repositories.analysis_history import (
+    AnalysisHistoryRepository,
+    CursorKey,
+    create_analysis_history_repository,
+)
 
+# (user_id, analysis_type, channel_id, limit, cursor) identifying one page
+PageKey = Tuple[str, Optional[str], Optional[str], int, Optional[CursorKey]]
 
-class AnalysisHistoryService:
-    """Supabase-backed persistence for analysis runs."""
 
-    def __init__(self, client: Optional[Client] = None) -> None:
-        self.client: Client = client or get_supabase()
+def encode_cursor(created_at: str, row_id: str) -> str:
+    """Build the opaque pagination cursor for a row."""
+    raw = json.dumps([created_at, row_id], separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
 
-    def save_run(self, user_id: str, payload: AnalysisRunCreate) -> AnalysisRunResponse:
-        record = payload.model_dump()
-        record["user_id"] = user_id
 
-        response = self.client.table("analysis_history").insert(record).execute()
+def decode_cursor(cursor: Optional[str]) -> Optional[CursorKey]:
+    """Parse a cursor from :func:`encode_cursor`.
 
-        if not response.data:
+    Bare ISO timestamps issued by older clients are still accepted and
+    paginate by ``created_at`` alone.
+    """
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        return str(created_at), str(row_id)
+    except (binascii.Error, ValueError, TypeError):
+        return cursor, None
+
+
+class AnalysisHistoryService:
+    """Persistence for analysis runs on top of an async repository."""
+
+    def __init__(self, repository: Optional[AnalysisHistoryRepository] = None) -> None:
+        self._repository = repository
+        self._repository_lock = asyncio.Lock()
+        # Next pages fetched ahead of time: key -> (expires_at, task)
+        self._prefetched: Dict[PageKey, Tuple[float, "asyncio.Task[List[Dict[str, Any]]]"]] = {}
+
+    async def repository(self) -> AnalysisHistoryRepository:
+        # The Supabase client is created lazily on first use so importing this
+        # module never needs a running event loop or network access.
+        if self._repository is None:
+            async with self._repository_lock:
+                if self._repository is None:
+                    self._repository = await create_analysis_history_repository()
+        return self._repository
+
+    async def save_run(self, user_id: str, payload: AnalysisRunCreate) -> AnalysisRunResponse:
+        runs = await self.save_runs(user_id, [payload])
+        return runs[0]
+
+    async def save_runs(
+        self, user_id: str, payloads: Sequence[AnalysisRunCreate]
+    ) -> List[AnalysisRunResponse]:
+        """Insert many runs with as few round-trips as the backend allows."""
+        records = []
+        for payload in payloads:
+            record = payload.model_dump()
+            record["user_id"] = str(user_id)
+            if payload.keywords:
+                # Runs for the same query share a key however the keywords were typed.
+                record["meta"] = {**record["meta"], "query_key": query_key(payload.keywords)}
+            records.append(record)
+
+        if not records:
+            return []
+
+        repository = await self.repository()
+        stored = await repository.insert_runs(records)
+        self._drop_prefetched(str(user_id))
+        user_versions.bump(str(user_id))
+
+        if len(stored) != len(records):
             raise RuntimeError("Failed to save analysis run")
 
-        return AnalysisRunResponse(**response.data[0])
+        return [AnalysisRunResponse(**row) for row in stored]
 
-    def list_runs(
+    async def list_runs(
         self,
         user_id: str,
         analysis_type: Optional[AnalysisType],
         limit: int = 10,
         cursor: Optional[str] = None,
+        prefetch: Optional[bool] = None,
     ) -> AnalysisRunListResponse:
-        limit = max(1, min(limit, 50))  # enforce sane bounds
-
-        query = (
-            self.client.table("analysis_history")
-            .select("*")
-            .eq("user_id", user_id)
-            .order("created_at", desc=True)
-            .limit(limit)
-        )
-
-        if analysis_type:
-            query = query.eq("analysis_type", analysis_type)
-
-        if cursor:
-            query = query.lt("created_at", cursor)
-
-        response = query.execute()
-        data = response.data or []
-        items = [AnalysisRunResponse(**row) for row in data]
-
-        next_cursor = (
-            items[-1].created_at.isoformat() if len(items) == limit else None
+        return await self._list_page(
+            (str(user_id), analysis_type, None, limit, decode_cursor(cursor)), prefetch
         )
 
-        return AnalysisRunListResponse(items=items, next_cursor=next_cursor)
-
-    def list_runs_by_channel(
+    async def list_runs_by_channel(
         self,
         user_id: str,
         channel_id: UUID,
         limit: int = 10,
         cursor: Optional[str] = None,
+        prefetch: Optional[bool] = None,
     ) -> AnalysisRunListResponse:
-        limit = max(1, min(limit, 50))
-
-        query = (
-            self.client.table("analysis_history")
-            .select("*")
-            .eq("user_id", user_id)
-            .eq("channel_id", str(channel_id))
-            .order("created_at", desc=True)
-            .limit(limit)
+        return await self._list_page(
+            (str(user_id), None, str(channel_id), limit, decode_cursor(cursor)), prefetch
         )
 
-        if cursor:
-            query = query.lt("created_at", cursor)
-
-        response = query.execute()
-        data = response.data or []
+    async def _list_page(self, key: PageKey, prefetch: Optional[bool]) -> AnalysisRunListResponse:
+        user_id, analysis_type, channel_id, limit, cursor = key
+        limit = max(1, min(limit, 50))  # enforce sane bounds
+        key = (user_id, analysis_type, channel_id, limit, cursor)
+
+        prefetch = settings.ANALYSIS_HISTORY_PREFETCH if prefetch is None else prefetch
+        data = await self._take_prefetched(key)
+        if prefetch:
+            record_cache_lookup("history_prefetch", hit=data is not None)
+        if data is None:
+            data = await self._fetch_page(key)
+
+        # One extra row tells us whether another page exists without
+        # returning an empty trailing page.
+        has_more = len(data) > limit
+        data = data[:limit]
         items = [AnalysisRunResponse(**row) for row in data]
 
-        next_cursor = (
-            items[-1].created_at.isoformat() if len(items) == limit else None
-        )
+        next_cursor = None
+        if has_more:
+            last = data[-1]
+            next_cursor = encode_cursor(str(last["created_at"]), str(last["id"]))
+            if prefetch:
+                self._start_prefetch(
+                    (user_id, analysis_type, channel_id, limit, decode_cursor(next_cursor))
+                )
 
         return AnalysisRunListResponse(items=items, next_cursor=next_cursor)
 
-    def get_run(self, user_id: str, analysis_id: str) -> AnalysisRunResponse:
-        response = (
-            self.client.table("analysis_history")
-            .select("*")
-            .eq("user_id", user_id)
-            .eq("id", analysis_id)
-            .limit(1)
-            .execute()
+    async def _fetch_page(self, key: PageKey) -> List[Dict[str, Any]]:
+        user_id, analysis_type, channel_id, limit, cursor = key
+        repository = await self.repository()
+        return await repository.list_runs(
+            user_id,
+            limit + 1,
+            analysis_type=analysis_type,
+            channel_id=channel_id,
+            cursor=cursor,
         )
 
-        if not response.data:
+    def _start_prefetch(self, key: PageKey) -> None:
+        now = time.monotonic()
+        for stale in [k for k, (expires, _) in self._prefetched.items() if expires < now]:
+            self._prefetched.pop(stale)[1].cancel()
+        if key in self._prefetched or len(self._prefetched) >= settings.ANALYSIS_HISTORY_PREFETCH_MAX_PAGES:
+            return
+        task = asyncio.get_running_loop().create_task(self._fetch_page(key))
+        # Never let a failed prefetch surface as "Task exception was never retrieved"
+        task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        self._prefetched[key] = (now + settings.ANALYSIS_HISTORY_PREFETCH_TTL, task)
+
+    async def _take_prefetched(self, key: PageKey) -> Optional[List[Dict[str, Any]]]:
+        entry = self._prefetched.pop(key, None)
+        if entry is None:
+            return None
+        expires, task = entry
+        if expires < time.monotonic():
+            task.cancel()
+            return None
+        try:
+            return await task
+        except Exception:  # noqa: BLE001 - fall back to a fresh query
+            return None
+
+    def _drop_prefetched(self, user_id: str) -> None:
+        for key in [k for k in self._prefetched if k[0] == user_id]:
+            self._prefetched.pop(key)[1].cancel()
+
+    async def get_run(self, user_id: str, analysis_id: str) -> AnalysisRunResponse:
+        repository = await self.repository()
+        row = await repository.get_run(str(user_id), analysis_id)
+
+        if not row:
             raise LookupError("Analysis run not found")
 
-        return AnalysisRunResponse(**response.data[0])
+        return AnalysisRunResponse(**row)
 
-    def delete_run(self, user_id: str, analysis_id: str) -> None:
-        response = (
-            self.client.table("analysis_history")
-            .delete()
-            .eq("user_id", user_id)
-            .eq("id", analysis_id)
-            .execute()
-        )
-
-        deleted = response.data or []
-        if len(deleted) == 0:
-            # Supabase returns None when nothing was deleted
+    async def search_runs(
+        self,
+        user_id: str,
+        query: str,
+        analysis_type: Optional[AnalysisType] = None,
+        limit: int = 20,
+    ) -> AnalysisSearchResponse:
+        limit = max(1, min(limit, 50))
+        repository = await self.repository()
+        rows = await repository.search_runs(str(user_id), query, limit, analysis_type=analysis_type)
+        return AnalysisSearchResponse(items=[AnalysisSearchHit(**row) for row in rows])
+
+    async def delete_run(self, user_id: str, analysis_id: str) -> None:
+        repository = await self.repository()
+        deleted = await repository.delete_run(str(user_id), analysis_id)
+        self._drop_prefetched(str(user_id))
+        if deleted:
+            user_versions.bump(str(user_id))
+        if not deleted:
             raise LookupError("Analysis run not found")
 
-    def get_stats_by_channel(self, user_id: str, channel_id: UUID) -> AnalysisStatsResponse:
-        total = self._count_runs(user_id=user_id, channel_id=channel_id)
-        trends = self._count_runs(user_id=user_id, analysis_type="trends", channel_id=channel_id)
-        viral = self._count_runs(user_id=user_id, analysis_type="viral", channel_id=channel_id)
+    async def get_stats_by_channel(self, user_id: str, channel_id: UUID) -> AnalysisStatsResponse:
+        return await self._get_stats(str(user_id), str(channel_id))
 
-        viral_videos = self._count_viral_videos(user_id=user_id, channel_id=channel_id)
+    async def get_stats(self, user_id: str) -> AnalysisStatsResponse:
+        return await self._get_stats(str(user_id))
 
-        return AnalysisStatsResponse(
-            total_runs=total,
-            trends_runs=trends,
-            viral_runs=viral,
-            viral_videos=viral_videos,
+    async def _get_stats(self, user_id: str, channel_id: Optional[str] = None) -> AnalysisStatsResponse:
+        repository = await self.repository()
+        # The four queries are independent, so issue them concurrently.
+        total, trends, viral, viral_videos = await asyncio.gather(
+            repository.count_runs(user_id, channel_id=channel_id),
+            repository.count_runs(user_id, analysis_type="trends", channel_id=channel_id),
+            repository.count_runs(user_id, analysis_type="viral", channel_id=channel_id),
+            self._count_viral_videos(user_id, channel_id=channel_id),
         )
 
-    def get_stats(self, user_id: str) -> AnalysisStatsResponse:
-        total = self._count_runs(user_id=user_id)
-        trends = self._count_runs(user_id=user_id, analysis_type="trends")
-        viral = self._count_runs(user_id=user_id, analysis_type="viral")
-
-        viral_videos = self._count_viral_videos(user_id=user_id)
-
         return AnalysisStatsResponse(
             total_runs=total,
             trends_runs=trends,
@@ -150,43 +246,12 @@ class AnalysisHistoryService:
             viral_videos=viral_videos,
         )
 
-    def _count_runs(
-        self,
-        user_id: str,
-        analysis_type: Optional[AnalysisType] = None,
-        channel_id: Optional[UUID] = None,
-    ) -> int:
-        query = (
-            self.client.table("analysis_history")
-            .select("id", count="exact", head=True)
-            .eq("user_id", user_id)
-        )
-
-        if analysis_type:
-            query = query.eq("analysis_type", analysis_type)
-        
-        if channel_id:
-            query = query.eq("channel_id", str(channel_id))
-
-        response = query.execute()
-
-        # Supabase python client exposes count attribute
-        return response.count or 0
-
-    def _count_viral_videos(self, user_id: str, channel_id: Optional[UUID] = None) -> int:
-        query = (
-            self.client.table("analysis_history")
-            .select("result_summary")
-            .eq("user_id", user_id)
-            .eq("analysis_type", "viral")
+    async def _count_viral_videos(self, user_id: str, channel_id: Optional[str] = None) -> int:
+        repository = await self.repository()
+        data = await repository.select_column(
+            user_id, "result", analysis_type="viral", channel_id=channel_id
         )
 
-        if channel_id:
-            query = query.eq("channel_id", str(channel_id))
-
-        response = query.execute()
-
-        data = response.data or []
         total_videos = 0
         for row in data:
             result = row.get("result") or {}
@@ -196,24 +261,18 @@ class AnalysisHistoryService:
 
         return total_videos
 
-    def get_top_keywords(self, user_id: str, channel_id: Optional[UUID] = None, limit: int = 10) -> List[Dict[str, Any]]:
-        query = (
-            self.client.table("analysis_history")
-            .select("keywords")
-            .eq("user_id", user_id)
+    async def get_top_keywords(self, user_id: str, channel_id: Optional[UUID] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        repository = await self.repository()
+        data = await repository.select_column(
+            str(user_id), "keywords", channel_id=str(channel_id) if channel_id else None
         )
 
-        if channel_id:
-            query = query.eq("channel_id", str(channel_id))
-
-        response = query.execute()
-        data = response.data or []
-
+        # Count canonical terms so that spelling variants of a keyword are merged.
         keyword_counts = {}
         for row in data:
             keywords = row.get("keywords")
             if isinstance(keywords, list):
-                for keyword in keywords:
+                for keyword in canonical_terms(k for k in keywords if isinstance(k, str)):
                     keyword_counts[keyword] = keyword_counts.get(keyword, 0) + 1
 
         sorted_keywords = sorted(keyword_counts.items(), key=lambda item: item[1], reverse=True)
@@ -222,3 +281,9 @@ class AnalysisHistoryService:
 
 # Singleton service used by API layer
 analysis_history_service = AnalysisHistoryService()
+
+registry.gauge(
+    "analysis_history_prefetch_pages",
+    "History pages prefetched and waiting to be requested.",
+    callback=lambda: len(analysis_history_service._prefetched),
+)
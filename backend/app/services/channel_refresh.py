@@ -0,0 +1,124 @@
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List
+
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from ..core.database import get_async_supabase
+from ..core.etags import user_versions
+from ..core.metrics import registry
+from ..core.periodic import PeriodicJob
+from ..core.tracing import instrumented
+from ..repositories.youtube_data import create_youtube_data_provider
+
+logger = logging.getLogger(__name__)
+
+# channels().list accepts at most 50 ids per call (1 quota unit either way).
+CHANNELS_PER_CALL = 50
+# PostgREST returns at most this many rows per select by default.
+PAGE_SIZE = 1000
+
+CHANNEL_REFRESH_RUNS = registry.counter(
+    "channel_refresh_runs_total",
+    "Registered channel statistics refreshes by result (ok, error).",
+    ("result",),
+)
+CHANNEL_REFRESH_UPDATED = registry.counter(
+    "channel_refresh_rows_updated_total",
+    "Registered channel rows whose statistics changed in a refresh.",
+)
+CHANNEL_REFRESH_LAST_SUCCESS = registry.gauge(
+    "channel_refresh_last_success_timestamp_seconds",
+    "Unix time of the last successful channel statistics refresh.",
+)
+
+
+class ChannelStatsRefresher:
+    """登録済みチャンネルの統計をまとめて更新するサービス
+
+    全ユーザーのチャンネルIDを重複なしで集め、50件ずつ channels().list で取得し、
+    変わった行だけをチャンネルごとの update で書き戻す。get_channels_by_user はこの値を返すだけで、
+    リクエスト中に YouTube を呼ばない。
+    """
+
+    def __init__(self) -> None:
+        self._job = PeriodicJob("channel_refresh", self.refresh, CHANNEL_REFRESH_RUNS, CHANNEL_REFRESH_LAST_SUCCESS)
+
+    async def _load_rows(self, supabase) -> List[dict]:
+        rows: List[dict] = []
+        while True:
+            response = await (
+                supabase.table('channels')
+                .select('id, user_id, channel_id, channel_name, channel_url, subscriber_count')
+                .order('id')
+                .range(len(rows), len(rows) + PAGE_SIZE - 1)
+                .execute()
+            )
+            rows.extend(response.data)
+            if len(response.data) < PAGE_SIZE:
+                return rows
+
+    async def _fetch_subscriber_counts(self, channel_ids: List[str]) -> Dict[str, int]:
+        provider = create_youtube_data_provider()
+        if provider is None:
+            return {}
+        counts: Dict[str, int] = {}
+        for start in range(0, len(channel_ids), CHANNELS_PER_CALL):
+            batch = channel_ids[start:start + CHANNELS_PER_CALL]
+            for item in await run_in_threadpool(provider.channels, batch):
+                statistics = item.get('statistics', {})
+                if 'subscriberCount' in statistics:
+                    counts[item['id']] = int(statistics['subscriberCount'])
+        return counts
+
+    @instrumented("channel_refresh")
+    async def refresh(self) -> int:
+        """全登録チャンネルの登録者数を更新し、更新した行数を返す"""
+        supabase = await get_async_supabase()
+        rows = await self._load_rows(supabase)
+        channel_ids = sorted({row['channel_id'] for row in rows})
+        counts = await self._fetch_subscriber_counts(channel_ids)
+
+        changed_ids: Dict[str, List[str]] = {}
+        for row in rows:
+            if row['channel_id'] in counts and counts[row['channel_id']] != row.get('subscriber_count'):
+                changed_ids.setdefault(row['channel_id'], []).append(row['id'])
+
+        # Update only: a row deleted since _load_rows must not come back from
+        # the snapshot, as it would with an upsert.
+        now = datetime.now(timezone.utc).isoformat()
+        changed: List[dict] = []
+        for channel_id, ids in changed_ids.items():
+            response = await (
+                supabase.table('channels')
+                .update({'subscriber_count': counts[channel_id], 'updated_at': now})
+                .in_('id', ids)
+                .execute()
+            )
+            changed.extend(response.data)
+        user_versions.bump_many(row['user_id'] for row in changed)
+
+        CHANNEL_REFRESH_UPDATED.inc(len(changed))
+        logger.info(
+            "Channel statistics refreshed",
+            extra={"channels": len(channel_ids), "fetched": len(counts), "rows_updated": len(changed)},
+        )
+        return len(changed)
+
+    def start(self) -> None:
+        """CHANNEL_REFRESH_INTERVAL が正なら定期更新を開始する"""
+        interval = settings.CHANNEL_REFRESH_INTERVAL
+        if interval <= 0:
+            return
+        if not settings.SUPABASE_URL:
+            logger.warning("SUPABASE_URL is not set. Channel statistics refresh is disabled.")
+            return
+        self._job.start(interval, settings.CHANNEL_REFRESH_JITTER)
+
+    async def stop(self) -> None:
+        await self._job.stop()
+
+
+# Singleton instance
+channel_stats_refresher = ChannelStatsRefresher()
@@ -0,0 +1,140 @@
+import logging
+import re
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import unquote, urlparse
+
+from ..core.config import settings
+from ..core.metrics import registry
+from ..core.tracing import instrumented, record_cache_lookup
+from ..core.youtube_client import get_youtube_client
+from ..repositories.channel_handles import ChannelHandleIndex
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_ID_PATTERN = re.compile(r"^UC[0-9A-Za-z_-]{22}$")
+# Top-level paths that are YouTube pages rather than legacy custom channel URLs.
+_RESERVED_PATHS = {"watch", "shorts", "playlist", "results", "feed", "embed", "live", "hashtag", "redirect"}
+
+CHANNEL_RESOLUTIONS = registry.counter(
+    "channel_resolutions_total",
+    "Channel URL resolutions to UC ids by kind and how they were answered (direct, index, api, search, miss).",
+    ("kind", "source"),
+)
+
+
+def parse_channel_url(url: str) -> Optional[Tuple[str, str]]:
+    """Split a channel URL into ``(kind, name)``.
+
+    ``kind`` is ``channel`` (``/channel/UC...``), ``handle`` (``/@name`` or a
+    bare ``@name``), ``user`` (``/user/name``) or ``custom`` (``/c/name`` and
+    the legacy ``youtube.com/name``). Returns ``None`` for anything else.
+    """
+    url = url.strip()
+    if url.startswith("@"):
+        return ("handle", unquote(url[1:])) if len(url) > 1 else None
+    parsed = urlparse(url if "://" in url else f"https://{url}")
+    host = (parsed.hostname or "").removeprefix("www.").removeprefix("m.")
+    if host not in ("youtube.com", "youtu.be"):
+        return None
+    segments = [unquote(segment) for segment in parsed.path.split("/") if segment]
+    if not segments:
+        return None
+    first = segments[0]
+    if first.startswith("@") and len(first) > 1:
+        return "handle", first[1:]
+    if first in ("channel", "c", "user") and len(segments) > 1:
+        return {"channel": "channel", "c": "custom", "user": "user"}[first], segments[1]
+    if host == "youtube.com" and first not in _RESERVED_PATHS:
+        return "custom", first
+    return None
+
+
+class ChannelResolver:
+    """チャンネルURL（@ハンドル・カスタムURL・旧ユーザー名）を UC... のチャンネルIDに解決するサービス
+
+    1ユニットの channels().list(forHandle/forUsername) を優先し、カスタムURLで
+    それでも見つからない場合だけ100ユニットの search().list を使う。
+    channels().list は snippet と statistics も同じ1ユニットで返すので、その item を
+    ID と一緒に返し、登録時の詳細取得を省けるようにする。
+    結果は永続インデックスに保存し、見つからなかった名前も一定時間キャッシュする。
+    """
+
+    def __init__(self) -> None:
+        self._index: Optional[ChannelHandleIndex] = None
+        self._index_lock = threading.Lock()
+
+    @property
+    def index(self) -> ChannelHandleIndex:
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = ChannelHandleIndex(settings.CHANNEL_HANDLE_INDEX_PATH)
+        return self._index
+
+    def _lookup_api(self, youtube, kind: str, name: str) -> Tuple[Optional[str], Optional[Dict[str, Any]], str]:
+        """YouTube API で解決し、(チャンネルID, channels().list の item, 使った方法) を返す"""
+        lookups = {
+            "handle": [{"forHandle": f"@{name}"}],
+            "user": [{"forUsername": name}],
+            # カスタムURLの多くはハンドルに移行済み、古いものはユーザー名と同じ
+            "custom": [{"forHandle": f"@{name}"}, {"forUsername": name}],
+        }[kind]
+        for params in lookups:
+            items = youtube.channels().list(part="id,snippet,statistics", **params).execute().get("items", [])
+            if items:
+                return items[0]["id"], items[0], "api"
+
+        if kind == "custom" and settings.CHANNEL_RESOLVER_SEARCH_FALLBACK:
+            items = youtube.search().list(
+                q=name, part="id", type="channel", maxResults=1
+            ).execute().get("items", [])
+            if items:
+                return items[0]["id"]["channelId"], None, "search"
+        return None, None, "miss"
+
+    def resolve(self, url: str) -> Optional[str]:
+        """チャンネルURLを UC... のチャンネルIDに解決する（解決できなければ None）"""
+        return self.resolve_channel(url)[0]
+
+    @instrumented("channel_resolver")
+    def resolve_channel(self, url: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """チャンネルURLを (チャンネルID, channels().list の item) に解決する
+
+        item は今回の解決で channels().list を呼んだ場合だけ返る。チャンネルURL・
+        インデックス・検索で解決した場合は None なので、詳細は別途取得する。
+        """
+        parsed = parse_channel_url(url)
+        if parsed is None:
+            return None, None
+        kind, name = parsed
+        if kind == "channel":
+            CHANNEL_RESOLUTIONS.inc(kind=kind, source="direct")
+            return (name if CHANNEL_ID_PATTERN.match(name) else None), None
+
+        youtube = get_youtube_client()
+        if youtube is None:
+            # APIキーがない場合（モック動作）は名前をそのままIDとして扱う
+            return name, None
+
+        # ハンドルとユーザー名は大文字小文字を区別しない
+        key = f"{kind}:{name.casefold()}"
+        cached = self.index.get(key)
+        if cached is not None:
+            channel_id, resolved_at = cached
+            if channel_id or time.time() - resolved_at < settings.CHANNEL_RESOLVER_NEGATIVE_TTL:
+                record_cache_lookup("channel_handles", True)
+                CHANNEL_RESOLUTIONS.inc(kind=kind, source="index")
+                return channel_id, None
+        record_cache_lookup("channel_handles", False)
+
+        channel_id, item, source = self._lookup_api(youtube, kind, name)
+        self.index.put(key, channel_id)
+        CHANNEL_RESOLUTIONS.inc(kind=kind, source=source)
+        logger.debug("Channel resolved", extra={"kind": kind, "name": name, "channel_id": channel_id, "source": source})
+        return channel_id, item
+
+
+# Singleton instance
+channel_resolver = ChannelResolver()
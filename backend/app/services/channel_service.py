@@ -1,38 +1,37 @@
 
-from typing import List, Optional
+from typing import List
 from uuid import UUID
 import logging
-import re
 
 from fastapi import HTTPException, status
-from googleapiclient.discovery import build
-from supabase import Client
+from starlette.concurrency import run_in_threadpool
+from supabase import AsyncClient
 
 from ..core.config import settings
+from ..core.etags import user_versions
+from ..core.youtube_client import get_youtube_client
 from ..models.channel import Channel, ChannelCreate, ChannelInDB
+from .channel_resolver import channel_resolver, parse_channel_url
 
 logger = logging.getLogger(__name__)
 
 class ChannelService:
     """チャンネル管理サービス"""
 
-    def __init__(self, supabase: Client):
+    def __init__(self, supabase: AsyncClient):
         self.supabase = supabase
         if settings.YOUTUBE_API_KEY:
-            self.youtube = build('youtube', 'v3', developerKey=settings.YOUTUBE_API_KEY)
+            self.youtube = get_youtube_client()
         else:
             self.youtube = None
 
-    def _get_channel_id_from_url(self, url: str) -> Optional[str]:
-        """YouTubeチャンネルURLからチャンネルIDを抽出する"""
-        patterns = [
-            r'(?:youtube\.com|youtu\.be)/(?:channel/|c/|user/|@)?([^/\?&]+)'
-        ]
-        for pattern in patterns:
-            match = re.search(pattern, url)
-            if match:
-                return match.group(1)
-        return None
+    @staticmethod
+    def _channel_details(item: dict) -> dict:
+        """channels().list の item（snippet, statistics）から登録に使う詳細を取り出す"""
+        return {
+            'title': item['snippet']['title'],
+            'subscriberCount': int(item['statistics'].get('subscriberCount', 0))
+        }
 
     async def _get_channel_details_from_youtube(self, channel_id: str) -> dict:
         """YouTube APIからチャンネル詳細を取得する"""
@@ -43,57 +42,66 @@ class ChannelService:
                 'subscriberCount': 12345
             }
         try:
-            response = self.youtube.channels().list(
-                part='snippet,statistics',
-                id=channel_id
-            ).execute()
+            response = await run_in_threadpool(
+                self.youtube.channels().list(
+                    part='snippet,statistics',
+                    id=channel_id
+                ).execute
+            )
 
             if not response.get('items'):
                 raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="YouTube channel not found")
 
-            channel_data = response['items'][0]
-            return {
-                'title': channel_data['snippet']['title'],
-                'subscriberCount': int(channel_data['statistics'].get('subscriberCount', 0))
-            }
+            return self._channel_details(response['items'][0])
         except Exception as e:
             # ここではAPIエラーをより具体的にハンドリングすることが望ましい
             raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to fetch from YouTube API: {e}")
 
     async def create_channel(self, user_id: UUID, channel_create: ChannelCreate) -> ChannelInDB:
         """新しいチャンネルを登録する"""
-        channel_identifier = self._get_channel_id_from_url(str(channel_create.channel_url))
-        if not channel_identifier:
+        channel_url = str(channel_create.channel_url)
+        if parse_channel_url(channel_url) is None:
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid YouTube channel URL")
 
-        # @handle の場合はチャンネルIDに変換する必要がある
-        # ここでは簡単のため、そのままIDとして扱うが、実際にはsearch APIで変換する
+        # @handle・カスタムURL・旧ユーザー名は UC... のチャンネルIDに変換する（結果はキャッシュされる）
+        try:
+            channel_identifier, item = await run_in_threadpool(channel_resolver.resolve_channel, channel_url)
+        except Exception as e:
+            raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=f"Failed to resolve channel via YouTube API: {e}")
+        if not channel_identifier:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="YouTube channel not found")
 
-        details = await self._get_channel_details_from_youtube(channel_identifier)
+        # 解決時に channels().list で取得済みなら詳細の再取得（1ユニット）を省く
+        if item is not None:
+            details = self._channel_details(item)
+        else:
+            details = await self._get_channel_details_from_youtube(channel_identifier)
 
         new_channel_data = {
             'user_id': str(user_id),
             'channel_id': channel_identifier,
             'channel_name': details['title'],
-            'channel_url': str(channel_create.channel_url),
+            'channel_url': channel_url,
             'subscriber_count': details['subscriberCount']
         }
 
-        response = self.supabase.table('channels').insert(new_channel_data).execute()
+        response = await self.supabase.table('channels').insert(new_channel_data).execute()
         
         created_channel = response.data[0]
+        user_versions.bump(str(user_id))
         return ChannelInDB(**created_channel)
 
     async def get_channels_by_user(self, user_id: UUID) -> List[Channel]:
         """ユーザーが登録したチャンネル一覧を取得する"""
-        response = self.supabase.table('channels').select('*').eq('user_id', str(user_id)).order('created_at', desc=True).execute()
+        response = await self.supabase.table('channels').select('*').eq('user_id', str(user_id)).order('created_at', desc=True).execute()
         
         channels = response.data
         return [Channel(**c) for c in channels]
 
     async def delete_channel(self, user_id: UUID, channel_id: UUID) -> None:
         """チャンネルを削除する"""
-        self.supabase.table('channels').delete().match({'id': str(channel_id), 'user_id': str(user_id)}).execute()
+        await self.supabase.table('channels').delete().match({'id': str(channel_id), 'user_id': str(user_id)}).execute()
+        user_versions.bump(str(user_id))
         
         # 削除された行がない場合もエラーにはしない（冪等性を保つ）
         return None
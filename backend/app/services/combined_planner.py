@@ -1,59 +1,24 @@
-import google.generativeai as genai
-from ..core.config import settings
+import logging
+from ..core.prompts import prompt_registry
+from ..core.tokens import fit_items, prompt_budget, truncate_text
+from ..core.tracing import instrumented, mark_fallback
 from ..models.trends import TrendsAnalysisResponse
 from ..models.viral_finder import ViralFinderResponse
 from ..models.schemas import VideoConcept, ChannelStrategy, ContentCalendar, PlanningResponse, PersonaInput
 import json
 from typing import List
 
+logger = logging.getLogger(__name__)
 
-class CombinedPlanner:
-    """トレンド+バイラル分析から企画案を生成するサービス"""
-
-    def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-
-    def generate_plan_from_research(
-        self,
-        trends: TrendsAnalysisResponse,
-        viral: ViralFinderResponse,
-        channel_genre: str,
-        channel_name: str = None
-    ) -> PlanningResponse:
-        """トレンド分析とバイラル動画の結果から企画案を生成"""
-
-        # トレンドとバイラルのデータをまとめる
-        trend_titles = []
-        for platform in trends.platforms:
-            for video in platform.videos[:3]:
-                trend_titles.append(video.title)
-
-        viral_titles = [v.title for v in viral.videos[:5]]
-        viral_patterns = viral.insights
-
-        prompt = f"""
-以下のトレンド分析とバイラル動画の調査結果を基に、成功する可能性が高いYouTubeチャンネルの企画案を作成してください。
-
-## チャンネルジャンル
-{channel_genre}
-
-## トレンド動画（人気コンテンツ）
-{chr(10).join(f"- {t}" for t in trend_titles)}
-
-## バイラル動画（登録者少×再生数多）
-{chr(10).join(f"- {t}" for t in viral_titles)}
-
-## バイラル動画の成功パターン
-{chr(10).join(f"- {p}" for p in viral_patterns)}
-
-## 総合的な戦略提案
-{chr(10).join(trends.overall_insights)}
+RESEARCH_PLAN_PROMPT = prompt_registry.register(
+    "combined_planner.research_plan",
+    instruction="""
+与えられたトレンド分析とバイラル動画の調査結果を基に、成功する可能性が高いYouTubeチャンネルの企画案を作成してください。
 
 ## 指示
-上記のデータを分析し、以下のJSON形式で戦略的なチャンネル企画案を作成してください：
+データを分析し、以下のJSON形式で戦略的なチャンネル企画案を作成してください：
 
-{{
+{
   "channel_concept": "トレンドとバイラルパターンを組み合わせたチャンネルコンセプト",
   "unique_value": "差別化ポイント（バイラル要素を取り入れる）",
   "target_audience": "ターゲット視聴者",
@@ -61,24 +26,122 @@ class CombinedPlanner:
   "posting_frequency": "推奨投稿頻度",
   "growth_strategy": ["戦略1（トレンドを活用）", "戦略2（バイラル手法）", "戦略3", "戦略4", "戦略5"],
   "video_concepts": [
-    {{
+    {
       "title": "トレンドとバイラル要素を組み合わせたタイトル",
       "description": "動画の内容",
       "hook": "バイラル動画から学んだ冒頭フック",
       "key_points": ["ポイント1", "ポイント2", "ポイント3"],
       "cta": "Call to Action",
       "estimated_length": "推奨動画尺"
-    }}
+    }
   ]
-}}
+}
 
 ※ video_concepts は5つ生成
 ※ すべて日本語で記述
 ※ JSONのみを返してください
-"""
+""",
+    body="""
+## チャンネルジャンル
+{channel_genre}
+
+## トレンド動画（人気コンテンツ）
+{trend_titles}
+
+## バイラル動画（登録者少×再生数多）
+{viral_titles}
+
+## バイラル動画の成功パターン
+{viral_patterns}
+
+## 総合的な戦略提案
+{overall_insights}
+""",
+)
+
+CALENDAR_FROM_STRATEGY_PROMPT = prompt_registry.register(
+    "combined_planner.calendar_from_strategy",
+    instruction="""
+与えられたチャンネル戦略に基づいて、4週間分のコンテンツカレンダーを作成してください。
+
+## 指示
+各週に2-3本の動画を配置し、戦略と一貫性のある4週間カレンダーを作成してください。
+
+以下のJSON配列形式で出力：
+
+[
+  {
+    "week": 1,
+    "theme": "第1週のテーマ",
+    "videos": [
+      {
+        "title": "動画タイトル",
+        "description": "動画の内容",
+        "hook": "冒頭フック",
+        "key_points": ["ポイント1", "ポイント2", "ポイント3"],
+        "cta": "Call to Action",
+        "estimated_length": "推奨動画尺"
+      }
+    ]
+  }
+]
+
+※ すべて日本語
+※ JSONのみを返してください
+""",
+    body="""
+## チャンネルコンセプト
+{channel_concept}
+
+## コンテンツの柱
+{content_pillars}
+
+## 初期動画コンセプト
+{video_titles}
+""",
+)
+
+
+class CombinedPlanner:
+    """トレンド+バイラル分析から企画案を生成するサービス"""
+
+    @instrumented("combined_planner")
+    def generate_plan_from_research(
+        self,
+        trends: TrendsAnalysisResponse,
+        viral: ViralFinderResponse,
+        channel_genre: str,
+        channel_name: str = None
+    ) -> PlanningResponse:
+        """トレンド分析とバイラル動画の結果から企画案を生成"""
+
+        # トレンドとバイラルのデータをまとめる
+        trend_titles = []
+        for platform in trends.platforms:
+            for video in platform.videos[:3]:
+                trend_titles.append(video.title)
+
+        viral_titles = [v.title for v in viral.videos[:5]]
+        viral_patterns = viral.insights
+
+        # リクエスト本文の分析結果をそのまま埋め込むため、セクションごとに予算内に収める
+        budget = prompt_budget("combined_planner.generate_plan_from_research", 2000)
+        channel_genre = truncate_text(channel_genre, 50)
+        trend_titles = fit_items(trend_titles, budget // 5, item_tokens=60)
+        viral_titles = fit_items(viral_titles, budget // 5, item_tokens=60)
+        viral_patterns = fit_items(viral_patterns, budget // 5, item_tokens=120)
+        overall_insights = fit_items(trends.overall_insights, budget // 5, item_tokens=120)
+
+        values = {
+            "channel_genre": channel_genre,
+            "trend_titles": "\n".join(f"- {t}" for t in trend_titles),
+            "viral_titles": "\n".join(f"- {t}" for t in viral_titles),
+            "viral_patterns": "\n".join(f"- {p}" for p in viral_patterns),
+            "overall_insights": "\n".join(overall_insights),
+        }
 
         try:
-            response = self.model.generate_content(prompt)
+            response = RESEARCH_PLAN_PROMPT.generate(**values)
             response_text = response.text.strip()
 
             if "```json" in response_text:
@@ -98,9 +161,10 @@ class CombinedPlanner:
             )
 
         except Exception as e:
-            print(f"Error generating combined plan: {e}")
+            logger.error(f"Error generating combined plan: {e}")
             raise
 
+    @instrumented("combined_planner")
     def _generate_calendar_from_strategy(
         self,
         strategy: ChannelStrategy,
@@ -108,46 +172,19 @@ class CombinedPlanner:
     ) -> List[ContentCalendar]:
         """戦略からカレンダーを生成"""
 
-        prompt = f"""
-以下のチャンネル戦略に基づいて、4週間分のコンテンツカレンダーを作成してください。
-
-## チャンネルコンセプト
-{strategy.channel_concept}
-
-## コンテンツの柱
-{chr(10).join(f"- {p}" for p in strategy.content_pillars)}
+        budget = prompt_budget("combined_planner.generate_calendar_from_strategy", 1000)
+        channel_concept = truncate_text(strategy.channel_concept, budget // 4)
+        pillars = fit_items(strategy.content_pillars, budget // 4, item_tokens=60)
+        concept_titles = fit_items([v.title for v in strategy.video_concepts], budget // 2, item_tokens=60)
 
-## 初期動画コンセプト
-{chr(10).join(f"- {v.title}" for v in strategy.video_concepts)}
-
-## 指示
-各週に2-3本の動画を配置し、戦略と一貫性のある4週間カレンダーを作成してください。
-
-以下のJSON配列形式で出力：
-
-[
-  {{
-    "week": 1,
-    "theme": "第1週のテーマ",
-    "videos": [
-      {{
-        "title": "動画タイトル",
-        "description": "動画の内容",
-        "hook": "冒頭フック",
-        "key_points": ["ポイント1", "ポイント2", "ポイント3"],
-        "cta": "Call to Action",
-        "estimated_length": "推奨動画尺"
-      }}
-    ]
-  }}
-]
-
-※ すべて日本語
-※ JSONのみを返してください
-"""
+        values = {
+            "channel_concept": channel_concept,
+            "content_pillars": "\n".join(f"- {p}" for p in pillars),
+            "video_titles": "\n".join(f"- {t}" for t in concept_titles),
+        }
 
         try:
-            response = self.model.generate_content(prompt)
+            response = CALENDAR_FROM_STRATEGY_PROMPT.generate(**values)
             response_text = response.text.strip()
 
             if "```json" in response_text:
@@ -159,7 +196,8 @@ class CombinedPlanner:
             return [ContentCalendar(**week) for week in data]
 
         except Exception as e:
-            print(f"Error generating calendar: {e}")
+            logger.error(f"Error generating calendar: {e}")
+            mark_fallback()
             return []
 
 
@@ -1,8 +1,10 @@
+import logging
 import pandas as pd
 import io
 from typing import List
-import google.generativeai as genai
-from ..core.config import settings
+from ..core.gemini import create_gemini_model
+from ..core.tokens import truncate_text, video_title_budget
+from ..core.tracing import instrumented, mark_fallback
 from ..models.analytics import (
     VideoPerformance,
     ChannelMetrics,
@@ -11,14 +13,16 @@ from ..models.analytics import (
     AnalyticsReport
 )
 
+logger = logging.getLogger(__name__)
+
 
 class CSVAnalyzer:
     """YouTubeアナリティクスCSV分析サービス"""
 
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = create_gemini_model()
 
+    @instrumented("csv_analyzer")
     def analyze_csv(self, csv_content: bytes) -> AnalyticsReport:
         """CSVファイルを分析してレポートを生成"""
 
@@ -55,7 +59,8 @@ class CSVAnalyzer:
             )
 
         except Exception as e:
-            print(f"Error analyzing CSV: {e}")
+            logger.error(f"Error analyzing CSV: {e}")
+            mark_fallback()
             # エラー時は模擬データを返す
             return self._generate_mock_report()
 
@@ -79,7 +84,7 @@ class CSVAnalyzer:
                 )
                 videos.append(video)
         except Exception as e:
-            print(f"Error parsing video data: {e}")
+            logger.error(f"Error parsing video data: {e}")
 
         return videos
 
@@ -128,12 +133,13 @@ class CSVAnalyzer:
 
         return performers
 
+    @instrumented("csv_analyzer")
     def _analyze_video_success(self, video: VideoPerformance, metric: str) -> str:
         """動画が成功した理由を分析"""
         prompt = f"""
 以下の動画が「{metric}」で優れたパフォーマンスを示しています。成功した理由を1-2文で分析してください。
 
-動画タイトル: {video.title}
+動画タイトル: {truncate_text(video.title, video_title_budget())}
 再生回数: {video.views:,}
 クリック率: {video.ctr_percentage}%
 平均視聴時間: {video.average_view_duration_seconds}秒
@@ -144,14 +150,17 @@ class CSVAnalyzer:
             response = self.model.generate_content(prompt)
             return response.text.strip()
         except:
+            mark_fallback()
             return f"優れた{metric}を達成しています"
 
+    @instrumented("csv_analyzer")
     def _generate_insights(self, videos: List[VideoPerformance], metrics: ChannelMetrics) -> List[Insight]:
         """AIで洞察を生成"""
 
         # データサマリーを作成
         avg_ctr = sum(v.ctr_percentage for v in videos) / len(videos) if videos else 0
         avg_retention = sum(v.average_view_duration_seconds for v in videos) / len(videos) if videos else 0
+        title_budget = video_title_budget()
 
         prompt = f"""
 YouTubeアナリティクスデータを分析して、5つの重要な洞察と推奨事項を提供してください。
@@ -164,7 +173,7 @@ YouTubeアナリティクスデータを分析して、5つの重要な洞察と
 - 平均視聴維持時間: {avg_retention:.0f}秒
 
 トップ動画タイトル:
-{chr(10).join(f"- {v.title} ({v.views:,}回再生)" for v in sorted(videos, key=lambda x: x.views, reverse=True)[:5])}
+{chr(10).join(f"- {truncate_text(v.title, title_budget)} ({v.views:,}回再生)" for v in sorted(videos, key=lambda x: x.views, reverse=True)[:5])}
 
 以下のJSON配列形式で5つの洞察を返してください:
 
@@ -195,9 +204,11 @@ YouTubeアナリティクスデータを分析して、5つの重要な洞察と
             return [Insight(**item) for item in data[:5]]
 
         except Exception as e:
-            print(f"Error generating insights: {e}")
+            logger.error(f"Error generating insights: {e}")
+            mark_fallback()
             return self._default_insights()
 
+    @instrumented("csv_analyzer")
     def _generate_content_recommendations(self, videos: List[VideoPerformance], insights: List[Insight]) -> List[str]:
         """コンテンツ推奨事項を生成"""
         prompt = f"""
@@ -227,6 +238,7 @@ YouTubeチャンネルのパフォーマンスデータに基づいて、コン
                     recommendations.append(line)
             return recommendations[:5]
         except:
+            mark_fallback()
             return self._default_content_recommendations()
 
     def _generate_optimization_tips(self, videos: List[VideoPerformance], metrics: ChannelMetrics) -> List[str]:
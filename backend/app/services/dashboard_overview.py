@@ -2,6 +2,11 @@ from collections import Counter
 from datetime import datetime, timezone
 from typing import List, Optional
 
+from ..core.config import settings
+from ..core.query_keys import canonical_terms
+from ..core.shared_cache import cache_key, get_shared_cache
+from ..core.single_flight import SingleFlight
+from ..core.tracing import instrumented
 from ..models.dashboard import (
     DashboardOverviewRequest,
     DashboardOverviewResponse,
@@ -17,13 +22,43 @@ from .viral_finder import viral_finder
 
 
 class DashboardOverviewService:
-    """ダッシュボード用の集約データを生成するサービス"""
+    """ダッシュボード用の集約データを生成するサービス
 
+    同じ条件の同時リクエストは1回の生成にまとめる（single-flight）。
+    """
+
+    def __init__(self) -> None:
+        self._flight = SingleFlight("dashboard_overview.generate_overview")
+
+    @instrumented("dashboard_overview")
     def generate_overview(
         self, request: DashboardOverviewRequest
+    ) -> DashboardOverviewResponse:
+        keywords = canonical_terms(request.persona_keywords)
+        # 表記ゆれは同じキーになるが、レスポンスにはリクエストのキーワードを返す
+        key = cache_key(keywords, request.model_dump(mode="json", exclude={"persona_keywords"}))
+        overview = self._flight.do(key, self._cached_overview, key, request, keywords)
+        return overview.model_copy(update={"persona_keywords": request.persona_keywords})
+
+    def _cached_overview(
+        self, key: str, request: DashboardOverviewRequest, keywords: List[str]
+    ) -> DashboardOverviewResponse:
+        ttl = settings.DASHBOARD_CACHE_TTL
+        if ttl <= 0:
+            return self._generate_overview(request, keywords)
+        cache = get_shared_cache()
+        cached = cache.lookup("dashboard", key)
+        if cached is not None:
+            return DashboardOverviewResponse.model_validate(cached)
+        overview = self._generate_overview(request, keywords)
+        cache.set("dashboard", key, overview.model_dump(mode="json"), ttl)
+        return overview
+
+    def _generate_overview(
+        self, request: DashboardOverviewRequest, keywords: List[str]
     ) -> DashboardOverviewResponse:
         trends = trend_analyzer.analyze_trends(
-            keywords=request.persona_keywords,
+            keywords=keywords,
             platforms=request.platforms,
             max_results_per_platform=request.max_results_per_platform,
         )
@@ -34,7 +69,7 @@ class DashboardOverviewService:
         viral_highlights: Optional[DashboardViralHighlights] = None
         if request.include_viral:
             viral_highlights = self._build_viral_highlights(
-                persona_keywords=request.persona_keywords,
+                persona_keywords=keywords,
                 platforms=request.viral_platforms,
                 min_viral_ratio=request.min_viral_ratio,
                 max_subscribers=request.max_subscribers,
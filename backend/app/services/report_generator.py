@@ -1,105 +1,180 @@
 from datetime import datetime
-from typing import List
+from typing import AsyncIterator, Awaitable, Iterator, List
 from ..models.trends import TrendsAnalysisResponse, TrendingVideo
 from ..models.viral_finder import ViralFinderResponse
 from ..models.analytics import AnalyticsReport
-from ..models.schemas import PlanningResponse
+from ..models.schemas import ChannelStrategy, ContentCalendar, PlanningResponse, VideoConcept
 
 
 class ReportGenerator:
-    """Markdownレポート生成サービス"""
+    """Markdownレポート生成サービス
+
+    各レポートはセクション単位の文字列を yield するジェネレーターで組み立てる。
+    ``generate_*`` は全体を結合して返し、``stream_*`` はデータの到着を待ちながら
+    準備できたセクションから順に StreamingResponse へ流す。
+    """
+
+    # ------------------------------------------------------------------
+    # 完成した文字列を返す API
+    # ------------------------------------------------------------------
 
     def generate_trends_report(self, data: TrendsAnalysisResponse) -> str:
         """トレンド分析レポートを生成"""
+        return "".join(self.iter_trends_report(data))
 
-        report = f"""# トレンド動画分析レポート
-
-**生成日時**: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}
+    def generate_viral_report(self, data: ViralFinderResponse) -> str:
+        """バイラル動画レポートを生成"""
+        return "".join(self.iter_viral_report(data))
 
----
+    def generate_analytics_report(self, data: AnalyticsReport) -> str:
+        """CSV分析レポートを生成"""
+        return "".join(self.iter_analytics_report(data))
 
-## 📊 総合分析
+    def generate_planning_report(self, data: PlanningResponse) -> str:
+        """AI企画案レポートを生成"""
+        return "".join(self.iter_planning_report(data))
+
+    # ------------------------------------------------------------------
+    # 同期ジェネレーター（データが揃っている場合）
+    # ------------------------------------------------------------------
+
+    def iter_trends_report(self, data: TrendsAnalysisResponse) -> Iterator[str]:
+        yield self._title("トレンド動画分析レポート")
+        yield from self._trends_sections(data)
+
+    def iter_viral_report(self, data: ViralFinderResponse) -> Iterator[str]:
+        yield self._title("バイラル動画発見レポート")
+        yield from self._viral_sections(data)
+
+    def iter_analytics_report(self, data: AnalyticsReport) -> Iterator[str]:
+        yield self._title("YouTubeアナリティクス分析レポート")
+        yield from self._analytics_sections(data)
+
+    def iter_planning_report(self, data: PlanningResponse) -> Iterator[str]:
+        yield self._title("AI企画案レポート")
+        yield from self._strategy_sections(data.strategy)
+        yield from self._calendar_sections(data.calendar)
+        yield from self._video_concept_sections(data.strategy)
+
+    # ------------------------------------------------------------------
+    # 非同期ストリーミング（データの到着を待ちながら出力）
+    # ------------------------------------------------------------------
+
+    async def stream_trends_report(
+        self, data: Awaitable[TrendsAnalysisResponse]
+    ) -> AsyncIterator[str]:
+        """見出しを即座に返し、分析結果が届き次第本文を流す"""
+        yield self._title("トレンド動画分析レポート")
+        for section in self._trends_sections(await data):
+            yield section
+
+    async def stream_viral_report(
+        self, data: Awaitable[ViralFinderResponse]
+    ) -> AsyncIterator[str]:
+        yield self._title("バイラル動画発見レポート")
+        for section in self._viral_sections(await data):
+            yield section
+
+    async def stream_planning_report(
+        self,
+        strategy: Awaitable[ChannelStrategy],
+        calendar: Awaitable[List[ContentCalendar]],
+    ) -> AsyncIterator[str]:
+        """戦略が届いた時点で戦略セクションを流し、カレンダーはその後に続ける
+
+        ``strategy`` と ``calendar`` は並行して実行中のタスクを渡すことを想定している。
+        """
+        yield self._title("AI企画案レポート")
+        resolved_strategy = await strategy
+        for section in self._strategy_sections(resolved_strategy):
+            yield section
+        for section in self._calendar_sections(await calendar):
+            yield section
+        for section in self._video_concept_sections(resolved_strategy):
+            yield section
+
+    # ------------------------------------------------------------------
+    # セクション
+    # ------------------------------------------------------------------
+
+    def _title(self, title: str) -> str:
+        return f"""# {title}
 
+**生成日時**: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}
 """
-        for idx, insight in enumerate(data.overall_insights, 1):
-            report += f"{idx}. {insight}\n"
 
-        report += "\n---\n\n"
+    def _trends_sections(self, data: TrendsAnalysisResponse) -> Iterator[str]:
+        lines = ["\n---\n\n## 📊 総合分析\n\n"]
+        for idx, insight in enumerate(data.overall_insights, 1):
+            lines.append(f"{idx}. {insight}\n")
+        lines.append("\n---\n\n")
+        yield "".join(lines)
 
         # プラットフォーム別
         for platform_data in data.platforms:
-            report += f"## {platform_data.platform}\n\n"
-            report += f"**分析動画数**: {len(platform_data.videos)}本\n"
-            report += f"**合計再生回数**: {platform_data.total_views:,}回\n\n"
-
-            report += "### プラットフォーム別傾向\n\n"
+            lines = [
+                f"## {platform_data.platform}\n\n",
+                f"**分析動画数**: {len(platform_data.videos)}本\n",
+                f"**合計再生回数**: {platform_data.total_views:,}回\n\n",
+                "### プラットフォーム別傾向\n\n",
+            ]
             for insight in platform_data.insights:
-                report += f"- {insight}\n"
+                lines.append(f"- {insight}\n")
+            lines.append("\n### トップ動画\n\n")
+            yield "".join(lines)
 
-            report += f"\n### トップ動画\n\n"
             for idx, video in enumerate(platform_data.videos[:5], 1):
-                report += f"#### {idx}. {video.title}\n\n"
-                report += f"- **チャンネル**: {video.channel_name}\n"
-                report += f"- **再生回数**: {video.view_count:,}回\n"
-                if video.like_count:
-                    report += f"- **いいね数**: {video.like_count:,}\n"
-                report += f"- **トレンド理由**: {video.why_trending}\n"
-                if video.tags:
-                    report += f"- **タグ**: {', '.join(video.tags[:5])}\n"
-                report += "\n"
-
-            report += "---\n\n"
-
-        return report
-
-    def generate_viral_report(self, data: ViralFinderResponse) -> str:
-        """バイラル動画レポートを生成"""
-
-        report = f"""# バイラル動画発見レポート
-
-**生成日時**: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}
-**発見動画数**: {len(data.videos)}本
-
----
-
-## 🎯 コンテンツ戦略の提案
-
-"""
+                yield self._trending_video_section(idx, video)
+
+            yield "---\n\n"
+
+    def _trending_video_section(self, idx: int, video: TrendingVideo) -> str:
+        lines = [
+            f"#### {idx}. {video.title}\n\n",
+            f"- **チャンネル**: {video.channel_name}\n",
+            f"- **再生回数**: {video.view_count:,}回\n",
+        ]
+        if video.like_count:
+            lines.append(f"- **いいね数**: {video.like_count:,}\n")
+        lines.append(f"- **トレンド理由**: {video.why_trending}\n")
+        if video.tags:
+            lines.append(f"- **タグ**: {', '.join(video.tags[:5])}\n")
+        lines.append("\n")
+        return "".join(lines)
+
+    def _viral_sections(self, data: ViralFinderResponse) -> Iterator[str]:
+        lines = [
+            f"**発見動画数**: {len(data.videos)}本\n\n---\n\n## 🎯 コンテンツ戦略の提案\n\n",
+        ]
         for idx, strategy in enumerate(data.content_strategies, 1):
-            report += f"{idx}. {strategy}\n"
-
-        report += "\n---\n\n## 🔍 バイラル動画の共通パターン\n\n"
+            lines.append(f"{idx}. {strategy}\n")
 
+        lines.append("\n---\n\n## 🔍 バイラル動画の共通パターン\n\n")
         for insight in data.insights:
-            report += f"- {insight}\n"
+            lines.append(f"- {insight}\n")
 
-        report += "\n---\n\n## ⚡ バイラル動画一覧\n\n"
+        lines.append("\n---\n\n## ⚡ バイラル動画一覧\n\n")
+        yield "".join(lines)
 
         for idx, video in enumerate(data.videos, 1):
-            report += f"### {idx}. {video.title}\n\n"
-            report += f"- **チャンネル**: {video.channel_name}\n"
-            report += f"- **登録者数**: {video.subscriber_count:,}人\n"
-            report += f"- **再生回数**: {video.view_count:,}回\n"
-            report += f"- **バイラル比率**: {video.viral_ratio}倍 🔥\n"
-            report += f"\n**なぜバイラルになったか:**\n{video.why_viral}\n\n"
-
+            lines = [
+                f"### {idx}. {video.title}\n\n",
+                f"- **チャンネル**: {video.channel_name}\n",
+                f"- **登録者数**: {video.subscriber_count:,}人\n",
+                f"- **再生回数**: {video.view_count:,}回\n",
+                f"- **バイラル比率**: {video.viral_ratio}倍 🔥\n",
+                f"\n**なぜバイラルになったか:**\n{video.why_viral}\n\n",
+            ]
             if video.key_takeaways:
-                report += "**学べるポイント:**\n"
+                lines.append("**学べるポイント:**\n")
                 for takeaway in video.key_takeaways:
-                    report += f"- {takeaway}\n"
-                report += "\n"
-
-            report += "---\n\n"
-
-        return report
-
-    def generate_analytics_report(self, data: AnalyticsReport) -> str:
-        """CSV分析レポートを生成"""
-
-        report = f"""# YouTubeアナリティクス分析レポート
+                    lines.append(f"- {takeaway}\n")
+                lines.append("\n")
+            lines.append("---\n\n")
+            yield "".join(lines)
 
-**生成日時**: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}
-**分析期間**: {data.channel_metrics.date_range}
+    def _analytics_sections(self, data: AnalyticsReport) -> Iterator[str]:
+        yield f"""**分析期間**: {data.channel_metrics.date_range}
 
 ---
 
@@ -118,99 +193,95 @@ class ReportGenerator:
 ## 🏆 トップパフォーマンス動画
 
 """
+        lines = []
         for performer in data.top_performers:
-            report += f"### {performer.title}\n\n"
-            report += f"- **評価指標**: {performer.metric_name}\n"
-            report += f"- **数値**: {performer.metric_value:,.0f}\n"
-            report += f"- **成功理由**: {performer.why_successful}\n\n"
-
-        report += "---\n\n## 💡 重要な洞察と推奨事項\n\n"
+            lines.append(f"### {performer.title}\n\n")
+            lines.append(f"- **評価指標**: {performer.metric_name}\n")
+            lines.append(f"- **数値**: {performer.metric_value:,.0f}\n")
+            lines.append(f"- **成功理由**: {performer.why_successful}\n\n")
+        lines.append("---\n\n## 💡 重要な洞察と推奨事項\n\n")
+        yield "".join(lines)
 
         for idx, insight in enumerate(data.insights, 1):
-            report += f"### {idx}. [{insight.priority}] {insight.category}\n\n"
-            report += f"**発見**: {insight.finding}\n\n"
-            report += f"**推奨**: {insight.recommendation}\n\n"
-            report += f"**期待効果**: {insight.expected_impact}\n\n"
-            report += "---\n\n"
-
-        report += "## 🎬 コンテンツ戦略の推奨\n\n"
+            yield (
+                f"### {idx}. [{insight.priority}] {insight.category}\n\n"
+                f"**発見**: {insight.finding}\n\n"
+                f"**推奨**: {insight.recommendation}\n\n"
+                f"**期待効果**: {insight.expected_impact}\n\n"
+                "---\n\n"
+            )
+
+        lines = ["## 🎬 コンテンツ戦略の推奨\n\n"]
         for idx, rec in enumerate(data.content_recommendations, 1):
-            report += f"{idx}. {rec}\n"
+            lines.append(f"{idx}. {rec}\n")
 
-        report += "\n---\n\n## 🔧 最適化のヒント\n\n"
+        lines.append("\n---\n\n## 🔧 最適化のヒント\n\n")
         for tip in data.optimization_tips:
-            report += f"- {tip}\n"
+            lines.append(f"- {tip}\n")
 
-        report += "\n---\n\n## ✅ 次に取るべきアクション\n\n"
+        lines.append("\n---\n\n## ✅ 次に取るべきアクション\n\n")
         for idx, action in enumerate(data.next_actions, 1):
-            report += f"{idx}. {action}\n"
-
-        report += "\n"
-
-        return report
-
-    def generate_planning_report(self, data: PlanningResponse) -> str:
-        """AI企画案レポートを生成"""
-
-        report = f"""# AI企画案レポート
+            lines.append(f"{idx}. {action}\n")
 
-**生成日時**: {datetime.now().strftime('%Y年%m月%d日 %H:%M')}
+        lines.append("\n")
+        yield "".join(lines)
 
+    def _strategy_sections(self, strategy: ChannelStrategy) -> Iterator[str]:
+        lines = [f"""
 ---
 
 ## 🎯 チャンネル戦略
 
 ### コンセプト
-{data.strategy.channel_concept}
+{strategy.channel_concept}
 
 ### 独自の価値提案
-{data.strategy.unique_value}
+{strategy.unique_value}
 
 ### ターゲット視聴者
-{data.strategy.target_audience}
+{strategy.target_audience}
 
 ### コンテンツの柱
 
-"""
-        for idx, pillar in enumerate(data.strategy.content_pillars, 1):
-            report += f"{idx}. {pillar}\n"
+"""]
+        for idx, pillar in enumerate(strategy.content_pillars, 1):
+            lines.append(f"{idx}. {pillar}\n")
+
+        lines.append(f"\n### 投稿頻度\n{strategy.posting_frequency}\n\n")
 
-        report += f"\n### 投稿頻度\n{data.strategy.posting_frequency}\n\n"
+        lines.append("### 成長戦略\n\n")
+        for idx, item in enumerate(strategy.growth_strategy, 1):
+            lines.append(f"{idx}. {item}\n")
 
-        report += "### 成長戦略\n\n"
-        for idx, strategy in enumerate(data.strategy.growth_strategy, 1):
-            report += f"{idx}. {strategy}\n"
+        lines.append("\n---\n\n")
+        yield "".join(lines)
 
-        report += "\n---\n\n## 📅 4週間コンテンツカレンダー\n\n"
+    def _calendar_sections(self, calendar: List[ContentCalendar]) -> Iterator[str]:
+        yield "## 📅 4週間コンテンツカレンダー\n\n"
 
-        for week in data.calendar:
-            report += f"### 第{week.week}週: {week.theme}\n\n"
+        for week in calendar:
+            yield f"### 第{week.week}週: {week.theme}\n\n"
             for idx, video in enumerate(week.videos, 1):
-                report += f"#### 動画{idx}: {video.title}\n\n"
-                report += f"**内容**: {video.description}\n\n"
-                report += f"**冒頭フック**: {video.hook}\n\n"
-                report += "**主要ポイント**:\n"
-                for point in video.key_points:
-                    report += f"- {point}\n"
-                report += f"\n**CTA**: {video.cta}\n"
-                report += f"**推奨尺**: {video.estimated_length}\n\n"
-
-            report += "---\n\n"
-
-        report += "## 🎬 初期動画コンセプト\n\n"
-
-        for idx, video in enumerate(data.strategy.video_concepts, 1):
-            report += f"### {idx}. {video.title}\n\n"
-            report += f"{video.description}\n\n"
-            report += f"**冒頭フック**: {video.hook}\n\n"
-            report += "**主要ポイント**:\n"
-            for point in video.key_points:
-                report += f"- {point}\n"
-            report += f"\n**CTA**: {video.cta}\n"
-            report += f"**推奨尺**: {video.estimated_length}\n\n"
-            report += "---\n\n"
-
-        return report
+                yield f"#### 動画{idx}: {video.title}\n\n" + self._video_body(video, "**内容**: ")
+            yield "---\n\n"
+
+    def _video_concept_sections(self, strategy: ChannelStrategy) -> Iterator[str]:
+        yield "## 🎬 初期動画コンセプト\n\n"
+
+        for idx, video in enumerate(strategy.video_concepts, 1):
+            yield f"### {idx}. {video.title}\n\n" + self._video_body(video, "") + "---\n\n"
+
+    def _video_body(self, video: VideoConcept, description_label: str) -> str:
+        lines = [
+            f"{description_label}{video.description}\n\n",
+            f"**冒頭フック**: {video.hook}\n\n",
+            "**主要ポイント**:\n",
+        ]
+        for point in video.key_points:
+            lines.append(f"- {point}\n")
+        lines.append(f"\n**CTA**: {video.cta}\n")
+        lines.append(f"**推奨尺**: {video.estimated_length}\n\n")
+        return "".join(lines)
 
 
 # Singleton instance
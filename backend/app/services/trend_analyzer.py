@@ -1,7 +1,11 @@
-from typing import List
+import logging
+from typing import List, Optional
 from datetime import datetime
-import google.generativeai as genai
-from ..core.config import settings
+from ..core.gemini import create_gemini_model
+from ..core.query_keys import canonical_terms, query_key
+from ..core.single_flight import coalesced
+from ..core.tokens import fit_items, prompt_budget
+from ..core.tracing import instrumented, mark_fallback
 from ..models.trends import (
     TrendingVideo,
     PlatformTrends,
@@ -9,35 +13,50 @@ from ..models.trends import (
 )
 from .youtube_trends import youtube_trends_analyzer
 
+logger = logging.getLogger(__name__)
+
 
 class TrendAnalyzer:
     """全プラットフォームのトレンド分析サービス"""
 
     def __init__(self):
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
-
+        self.model = create_gemini_model()
+
+    @instrumented("trend_analyzer")
+    @coalesced(
+        "trend_analyzer.analyze_trends",
+        keywords=canonical_terms,
+        relevance_terms=lambda terms: canonical_terms(terms or []),
+    )
     def analyze_trends(
         self,
         keywords: List[str],
         platforms: List[str] = ["YouTube"],
-        max_results_per_platform: int = 10
+        max_results_per_platform: int = 10,
+        relevance_terms: Optional[List[str]] = None
     ) -> TrendsAnalysisResponse:
         """全プラットフォームのトレンドを分析"""
 
-        import sys
-        sys.stderr.write(f"[DEBUG] analyze_trends called with keywords: {keywords}\n")
-        sys.stderr.write(f"[DEBUG] platforms: {platforms}\n")
-        sys.stderr.write(f"[DEBUG] max_results_per_platform: {max_results_per_platform}\n")
-        sys.stderr.flush()
+        logger.debug(
+            "analyze_trends called",
+            extra={
+                "keywords": keywords,
+                "query_key": query_key(keywords),
+                "platforms": platforms,
+                "max_results_per_platform": max_results_per_platform,
+            },
+        )
+        # 表記ゆれ（全角/半角・大文字小文字・順序・重複）を吸収した検索語で分析する
+        keywords = canonical_terms(keywords)
 
         platform_trends = []
 
         for platform in platforms:
-            sys.stderr.write(f"[DEBUG] Processing platform: {platform}\n")
-            sys.stderr.flush()
+            logger.debug("Processing platform", extra={"platform": platform})
             if platform == "YouTube":
-                videos = youtube_trends_analyzer.search_trending_shorts(keywords, max_results_per_platform)
+                videos = youtube_trends_analyzer.search_trending_shorts(
+                    keywords, max_results_per_platform, relevance_terms=relevance_terms
+                )
             else:
                 continue
 
@@ -61,6 +80,7 @@ class TrendAnalyzer:
             analyzed_at=datetime.utcnow().isoformat() + "Z"
         )
 
+    @instrumented("trend_analyzer")
     def _analyze_platform_insights(self, platform: str, videos: List[TrendingVideo]) -> List[str]:
         """プラットフォーム別の傾向を分析"""
 
@@ -68,7 +88,11 @@ class TrendAnalyzer:
             return []
 
         # 動画データをまとめる
-        titles = [v.title for v in videos[:5]]
+        titles = fit_items(
+            [v.title for v in videos[:5]],
+            prompt_budget("trend_analyzer.analyze_platform_insights", 400),
+            item_tokens=60,
+        )
         avg_views = sum(v.view_count for v in videos) / len(videos)
         all_tags = []
         for v in videos:
@@ -106,13 +130,15 @@ class TrendAnalyzer:
             return insights[:3]
 
         except Exception as e:
-            print(f"Error analyzing platform insights: {e}")
+            logger.error(f"Error analyzing platform insights: {e}")
+            mark_fallback()
             return [
                 f"{platform}で人気のコンテンツジャンル",
                 "視聴者の関心が高いテーマ",
                 "効果的な投稿スタイル"
             ]
 
+    @instrumented("trend_analyzer")
     def _analyze_overall_insights(
         self,
         platform_trends: List[PlatformTrends],
@@ -123,6 +149,7 @@ class TrendAnalyzer:
         if not platform_trends:
             return []
 
+        keywords = fit_items(keywords, prompt_budget("trend_analyzer.analyze_overall_insights", 200), item_tokens=30)
         prompt = f"""
 以下のキーワードに関連する日本のトレンド分析結果から、コンテンツ制作のための戦略的な示唆を5つ提案してください。
 
@@ -160,7 +187,8 @@ class TrendAnalyzer:
             return insights[:5]
 
         except Exception as e:
-            print(f"Error analyzing overall insights: {e}")
+            logger.error(f"Error analyzing overall insights: {e}")
+            mark_fallback()
             return [
                 "プラットフォームごとの特性を活かしたコンテンツ制作",
                 "トレンドのテーマを取り入れた動画企画",
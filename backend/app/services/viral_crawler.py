@@ -0,0 +1,119 @@
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List
+
+from starlette.concurrency import run_in_threadpool
+
+from ..core.config import settings
+from ..core.metrics import registry
+from ..core.periodic import PeriodicJob
+from ..core.query_keys import canonical_terms
+from ..core.tracing import instrumented
+from .analysis_history import analysis_history_service
+from .viral_finder import viral_finder
+
+logger = logging.getLogger(__name__)
+
+# History rows read per crawl to find the queries worth harvesting.
+HISTORY_ROWS = 5000
+
+VIRAL_CRAWL_RUNS = registry.counter(
+    "viral_crawl_runs_total",
+    "Viral candidate crawls by result (ok, error).",
+    ("result",),
+)
+VIRAL_CRAWL_QUERIES = registry.counter(
+    "viral_crawl_queries_total",
+    "Keyword queries harvested into the viral candidate index by result (ok, error).",
+    ("result",),
+)
+VIRAL_CRAWL_LAST_SUCCESS = registry.gauge(
+    "viral_crawl_last_success_timestamp_seconds",
+    "Unix time of the last successful viral candidate crawl.",
+)
+registry.gauge(
+    "viral_index_candidates",
+    "Candidates stored in the local viral candidate index.",
+    callback=lambda: viral_finder._index.size() if viral_finder._index is not None else 0,
+)
+
+
+class ViralCandidateCrawler:
+    """分析履歴に出てきたキーワードのバイラル候補を定期的に収集するサービス
+
+    直近 VIRAL_CRAWL_LOOKBACK_DAYS 日の全ユーザーの履歴からキーワードを正規化して集め、
+    登録チャンネルに紐づく分析のキーワード、使われた回数の多い順に、
+    インデックスが古くなったものだけ収集し直す。/viral/find はこのインデックスを範囲検索する。
+    """
+
+    def __init__(self) -> None:
+        self._job = PeriodicJob("viral_crawl", self.crawl, VIRAL_CRAWL_RUNS, VIRAL_CRAWL_LAST_SUCCESS)
+
+    async def _queries(self) -> List[List[str]]:
+        """収集すべきキーワード（正規化済み）を優先順に返す"""
+        # 履歴サービスと同じリポジトリ（接続）を使う
+        repository = await analysis_history_service.repository()
+        since = (datetime.now(timezone.utc) - timedelta(days=settings.VIRAL_CRAWL_LOOKBACK_DAYS)).isoformat()
+        rows = await repository.recent_keywords(since, HISTORY_ROWS)
+
+        counts: Counter[str] = Counter()
+        terms_by_key: Dict[str, List[str]] = {}
+        channel_keys = set()
+        for row in rows:
+            terms = canonical_terms(row.get("keywords") or [])
+            if not terms:
+                continue
+            key = " ".join(terms)
+            counts[key] += 1
+            terms_by_key[key] = terms
+            if row.get("channel_id"):
+                channel_keys.add(key)
+
+        ordered = sorted(counts, key=lambda key: (key not in channel_keys, -counts[key], key))
+        return [terms_by_key[key] for key in ordered]
+
+    @instrumented("viral_crawler")
+    async def crawl(self) -> int:
+        """古くなったキーワードの候補を収集し、収集したキーワード数を返す"""
+        index = viral_finder.index
+        if index is None or viral_finder.provider is None:
+            return 0
+        crawled_at = await run_in_threadpool(index.crawl_times)
+        now = time.time()
+        # 前回の巡回や直近のライブ検索で新しいものは飛ばす
+        stale = [
+            terms for terms in await self._queries()
+            if now - crawled_at.get(" ".join(terms), 0) >= settings.VIRAL_CRAWL_INTERVAL
+        ][:settings.VIRAL_CRAWL_MAX_QUERIES]
+
+        candidates = 0
+        for terms in stale:
+            try:
+                candidates += await run_in_threadpool(viral_finder.crawl, terms)
+            except Exception:
+                VIRAL_CRAWL_QUERIES.inc(result="error")
+                logger.exception("Viral candidate crawl failed", extra={"keywords": terms})
+            else:
+                VIRAL_CRAWL_QUERIES.inc(result="ok")
+
+        logger.info("Viral candidates crawled", extra={"queries": len(stale), "candidates": candidates})
+        return len(stale)
+
+    def start(self) -> None:
+        """VIRAL_CRAWL_INTERVAL が正なら定期収集を開始する"""
+        interval = settings.VIRAL_CRAWL_INTERVAL
+        if interval <= 0:
+            return
+        if viral_finder.index is None or viral_finder.provider is None:
+            logger.warning("Viral index or YouTube data provider is not configured. Viral crawl is disabled.")
+            return
+        self._job.start(interval, settings.VIRAL_CRAWL_JITTER)
+
+    async def stop(self) -> None:
+        await self._job.stop()
+
+
+# Singleton instance
+viral_candidate_crawler = ViralCandidateCrawler()
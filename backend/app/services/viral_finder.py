@@ -1,49 +1,87 @@
-from typing import List
+from typing import List, Optional, Tuple
 from datetime import datetime
-import google.generativeai as genai
 import logging
+import threading
+import time
 import urllib.parse
-from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
 
 from ..core.config import settings
+from ..core.gemini import create_gemini_model
+from ..core.metrics import registry
+from ..core.query_keys import canonical_terms, query_key
+from ..core.relevance import filter_relevant, relevance_scores, video_text
+from ..core.single_flight import coalesced
+from ..core.tokens import channel_title_budget, fit_items, prompt_budget, truncate_text, video_title_budget
+from ..core.tracing import instrumented, mark_fallback, record_cache_lookup
 from ..models.viral_finder import ViralVideo, ViralFinderResponse
+from ..repositories.viral_index import Candidate, ViralCandidateIndex
+from ..repositories.youtube_data import (
+    YouTubeDataProvider,
+    create_fallback_data_provider,
+    create_youtube_data_provider,
+)
 
 logger = logging.getLogger(__name__)
 
+# search().list returns at most 50 results per call
+MAX_SEARCH_RESULTS = 50
+# Seconds a harvest must have aged before a short index answer is topped up live.
+TOPUP_MIN_AGE = 3600
+
+VIRAL_CANDIDATE_SOURCES = registry.counter(
+    "viral_candidate_sources_total",
+    "Where viral candidates came from: index (local range query), topup (index plus live search) or live.",
+    ("source",),
+)
+
+
 class ViralFinder:
     """バイラルポテンシャルのある動画を見つけるサービス"""
 
     def __init__(self):
-        if settings.YOUTUBE_API_KEY:
-            self.youtube = build('youtube', 'v3', developerKey=settings.YOUTUBE_API_KEY)
-        else:
-            self.youtube = None
+        self.provider = create_youtube_data_provider()
+        self.fallback_provider = create_fallback_data_provider()
+        if not self.provider and not self.fallback_provider:
             logger.warning("YOUTUBE_API_KEY is not set. Viral video search will not function.")
         
+        self._index: Optional[ViralCandidateIndex] = None
+        self._index_lock = threading.Lock()
+
         if settings.GEMINI_API_KEY:
-            genai.configure(api_key=settings.GEMINI_API_KEY)
-            self.model = genai.GenerativeModel('gemini-2.0-flash')
+            self.model = create_gemini_model()
         else:
             self.model = None
             logger.warning("GEMINI_API_KEY is not set. AI analysis for viral videos will not function.")
 
+    @instrumented("viral_finder")
+    @coalesced(
+        "viral_finder.find_viral_videos",
+        keywords=canonical_terms,
+        relevance_terms=lambda terms: canonical_terms(terms or []),
+    )
     def find_viral_videos(
         self,
         keywords: List[str],
         min_viral_ratio: float = 3.0,
         max_subscribers: int = 100000,
         platforms: List[str] = ["YouTube"],
-        max_results: int = 20
+        max_results: int = 20,
+        relevance_terms: Optional[List[str]] = None
     ) -> ViralFinderResponse:
-        """バイラルポテンシャルのある動画を検索"""
+        """バイラルポテンシャルのある動画を検索
+
+        relevance_terms（省略時は keywords）と関連の薄い動画は Gemini で分析する前に除く。
+        """
 
+        relevance_terms = relevance_terms or keywords
+        keywords = canonical_terms(keywords)
         viral_videos = []
 
         for platform in platforms:
             if platform == "YouTube":
                 videos = self._find_youtube_viral_videos(
-                    keywords, min_viral_ratio, max_subscribers, max_results
+                    keywords, min_viral_ratio, max_subscribers, max_results, relevance_terms
                 )
                 viral_videos.extend(videos)
 
@@ -57,83 +95,213 @@ class ViralFinder:
             content_strategies=content_strategies
         )
 
+    @instrumented("viral_finder")
     def _find_youtube_viral_videos(
         self,
         keywords: List[str],
         min_viral_ratio: float,
         max_subscribers: int,
-        max_results: int
+        max_results: int,
+        relevance_terms: List[str]
     ) -> List[ViralVideo]:
         """YouTube でバイラル動画を検索"""
-        if not self.youtube:
-            logger.warning("YouTube API key not configured. Returning empty list for viral videos.")
+        if not self.provider:
+            mark_fallback("not_configured")
+            if not self.fallback_provider:
+                logger.warning("YouTube API key not configured. Returning empty list for viral videos.")
+                return []
+            return self._search_fallback(keywords, min_viral_ratio, max_subscribers, max_results, relevance_terms)
+
+        try:
+            return self._search_viral_videos(
+                self.provider, keywords, min_viral_ratio, max_subscribers, max_results, relevance_terms
+            )
+        except HttpError as e:
+            logger.error(f"YouTube API error in viral video search: {e}")
+            mark_fallback("youtube_error")
+        except Exception as e:
+            logger.error(f"Error finding YouTube viral videos: {e}")
+            mark_fallback()
+        return self._search_fallback(keywords, min_viral_ratio, max_subscribers, max_results, relevance_terms)
+
+    def _search_fallback(
+        self,
+        keywords: List[str],
+        min_viral_ratio: float,
+        max_subscribers: int,
+        max_results: int,
+        relevance_terms: List[str]
+    ) -> List[ViralVideo]:
+        """YOUTUBE_FALLBACK_PROVIDER のデータソースで検索（なければ空リスト）"""
+        if not self.fallback_provider:
+            return []
+        try:
+            return self._search_viral_videos(
+                self.fallback_provider, keywords, min_viral_ratio, max_subscribers, max_results, relevance_terms
+            )
+        except Exception as e:
+            logger.error(f"Error searching fallback YouTube data ({self.fallback_provider.name}): {e}")
             return []
 
+    @property
+    def index(self) -> Optional[ViralCandidateIndex]:
+        """ローカルの候補インデックス（VIRAL_INDEX_MAX_AGE が0なら None）"""
+        if settings.VIRAL_INDEX_MAX_AGE <= 0:
+            return None
+        if self._index is None:
+            with self._index_lock:
+                if self._index is None:
+                    self._index = ViralCandidateIndex(settings.VIRAL_INDEX_PATH)
+        return self._index
+
+    def harvest_candidates(
+        self, provider: YouTubeDataProvider, keywords: List[str], fetch_count: int
+    ) -> List[Candidate]:
+        """検索結果の動画とチャンネル統計を取得し、全動画のバイラル比率を計算する"""
+        # 1. Search for videos based on keywords
+        search_items = provider.search(
+            " ".join(keywords),
+            fetch_count,
+            order="viewCount",  # Order by view count to prioritize potentially viral videos
+        )
+
+        video_ids = [item["id"]["videoId"] for item in search_items if "videoId" in item["id"]]
+        if not video_ids:
+            return []
+
+        # 2. Get video statistics
+        video_items = provider.videos(video_ids, part="snippet,statistics")
+
+        # 3. Get channel statistics for subscriber count
+        channel_ids = list(set([item["snippet"]["channelId"] for item in video_items]))
+        channel_items = provider.channels(channel_ids)
+
+        channel_stats = {
+            item["id"]: int(item["statistics"]["subscriberCount"])
+            for item in channel_items
+            if "subscriberCount" in item["statistics"]
+        }
+
+        candidates: List[Candidate] = []
+        for item in video_items:
+            subscriber_count = channel_stats.get(item["snippet"]["channelId"], 0)
+            if subscriber_count == 0:
+                continue # Cannot calculate viral ratio without subscribers
+            viral_ratio = int(item["statistics"].get("viewCount", 0)) / subscriber_count
+            candidates.append((item, subscriber_count, viral_ratio))
+        return candidates
+
+    def crawl(self, keywords: List[str]) -> int:
+        """キーワードの候補を取得してインデックスに保存し、件数を返す（バックグラウンド用）"""
+        index = self.index
+        if index is None or self.provider is None:
+            return 0
+        keywords = canonical_terms(keywords)
+        candidates = self.harvest_candidates(self.provider, keywords, MAX_SEARCH_RESULTS)
+        index.replace(query_key(keywords), candidates)
+        return len(candidates)
+
+    def _viral_candidates(
+        self,
+        provider: YouTubeDataProvider,
+        keywords: List[str],
+        min_viral_ratio: float,
+        max_subscribers: int,
+        max_results: int
+    ) -> List[Candidate]:
+        """インデックスが新しければ範囲検索で、なければ（候補が足りなければ）ライブ検索で候補を集める"""
+        # インデックスは本番のデータソース専用（フォールバックのデータは混ぜない）
+        index = self.index if provider is self.provider else None
+        key = query_key(keywords)
+        source = "live"
+        if index is not None:
+            crawled_at = index.crawled_at(key)
+            fresh = crawled_at is not None and time.time() - crawled_at < settings.VIRAL_INDEX_MAX_AGE
+            record_cache_lookup("viral_index", fresh)
+            if fresh:
+                candidates = index.candidates(key, min_viral_ratio, max_subscribers, max_results * 3)
+                # 収集したばかりならライブ検索しても同じ動画しか返らない
+                topup = settings.VIRAL_INDEX_LIVE_TOPUP and time.time() - crawled_at >= TOPUP_MIN_AGE
+                if len(candidates) >= max_results or not topup:
+                    VIRAL_CANDIDATE_SOURCES.inc(source="index")
+                    return candidates
+                source = "topup"
+
+        # search は件数に関係なく100ユニットなので、インデックスに残すときは上限まで取る
+        fetch_count = MAX_SEARCH_RESULTS if index is not None else min(max_results * 3, MAX_SEARCH_RESULTS)
+        harvested = self.harvest_candidates(provider, keywords, fetch_count)
+        if index is not None:
+            index.replace(key, harvested)
+        VIRAL_CANDIDATE_SOURCES.inc(source=source)
+        return [
+            candidate for candidate in harvested
+            if candidate[2] >= min_viral_ratio and candidate[1] <= max_subscribers
+        ]
+
+    def _search_viral_videos(
+        self,
+        provider: YouTubeDataProvider,
+        keywords: List[str],
+        min_viral_ratio: float,
+        max_subscribers: int,
+        max_results: int,
+        relevance_terms: List[str]
+    ) -> List[ViralVideo]:
+        """候補を集め、関連度とバイラル比率で絞り込んで上位だけ Gemini で分析する"""
         viral_videos: List[ViralVideo] = []
+        candidates = self._viral_candidates(provider, keywords, min_viral_ratio, max_subscribers, max_results)
+
+        # Drop videos unrelated to the persona, then keep the top results by viral ratio
+        # so Gemini only analyzes the videos that are returned
+        scores = relevance_scores(relevance_terms, [video_text(item["snippet"]) for item, _, _ in candidates])
+        candidates = [candidates[index] for index in filter_relevant(scores, settings.RELEVANCE_MIN_SCORE)]
+        candidates.sort(key=lambda candidate: candidate[2], reverse=True)
+        for item, subscriber_count, viral_ratio in candidates[:max_results]:
+            video_id = item["id"]
+            snippet = item["snippet"]
+            statistics = item["statistics"]
+            view_count = int(statistics.get("viewCount", 0))
+            like_count = int(statistics.get("likeCount", 0)) if "likeCount" in statistics else None
+            comment_count = int(statistics.get("commentCount", 0)) if "commentCount" in statistics else None
+
+            why_viral, key_takeaways = self._analyze_viral_video(snippet, view_count, subscriber_count, viral_ratio)
+
+            viral_videos.append(ViralVideo(
+                platform="YouTube",
+                title=snippet["title"],
+                channel_name=snippet["channelTitle"],
+                subscriber_count=subscriber_count,
+                view_count=view_count,
+                video_id=video_id,
+                url=f"https://www.youtube.com/watch?v={video_id}",
+                thumbnail_url=snippet["thumbnails"]["high"]["url"] if "high" in snippet["thumbnails"] else None,
+                like_count=like_count,
+                comment_count=comment_count,
+                published_at=snippet["publishedAt"],
+                viral_ratio=round(viral_ratio, 2),
+                why_viral=why_viral,
+                key_takeaways=key_takeaways
+            ))
+
+        return viral_videos
+
+    def _analyze_viral_video(
+        self,
+        snippet: dict,
+        view_count: int,
+        subscriber_count: int,
+        viral_ratio: float
+    ) -> Tuple[str, List[str]]:
+        """Gemini でバイラルになった理由と学べるポイントを分析"""
+        why_viral = "Geminiによる分析が利用できません。"
+        key_takeaways = []
         try:
-            # 1. Search for videos based on keywords
-            search_response = self.youtube.search().list(
-                q=" ".join(keywords),
-                type="video",
-                part="id,snippet",
-                maxResults=min(max_results * 3, 50),  # Fetch more to filter later
-                order="viewCount",  # Order by view count to prioritize potentially viral videos
-                regionCode="JP", # Focus on Japanese content
-                relevanceLanguage="ja"
-            ).execute()
-
-            video_ids = [item["id"]["videoId"] for item in search_response.get("items", []) if "videoId" in item["id"]]
-            if not video_ids:
-                return []
-
-            # 2. Get video statistics
-            videos_response = self.youtube.videos().list(
-                id=",".join(video_ids),
-                part="snippet,statistics"
-            ).execute()
-
-            # 3. Get channel statistics for subscriber count
-            channel_ids = list(set([item["snippet"]["channelId"] for item in videos_response.get("items", [])]))
-            channels_response = self.youtube.channels().list(
-                id=",".join(channel_ids),
-                part="statistics"
-            ).execute()
-
-            channel_stats = {
-                item["id"]: int(item["statistics"]["subscriberCount"])
-                for item in channels_response.get("items", [])
-                if "subscriberCount" in item["statistics"]
-            }
-
-            # 4. Filter and process videos
-            for item in videos_response.get("items", []):
-                video_id = item["id"]
-                snippet = item["snippet"]
-                statistics = item["statistics"]
-
-                subscriber_count = channel_stats.get(snippet["channelId"], 0)
-                view_count = int(statistics.get("viewCount", 0))
-                like_count = int(statistics.get("likeCount", 0)) if "likeCount" in statistics else None
-                comment_count = int(statistics.get("commentCount", 0)) if "commentCount" in statistics else None
-
-                if subscriber_count == 0:
-                    continue # Cannot calculate viral ratio without subscribers
-
-                viral_ratio = view_count / subscriber_count
-
-                if viral_ratio >= min_viral_ratio and subscriber_count <= max_subscribers:
-                    # Use Gemini to generate why_viral and key_takeaways
-                    # This part still uses Gemini for analysis, as it's a separate AI task
-                    # If self.model is completely removed, this part needs a new Gemini client or a dedicated service
-                    why_viral = "Geminiによる分析が利用できません。"
-                    key_takeaways = []
-                    try:
-                        if hasattr(self, 'model') and self.model:
-                            analysis_prompt = f"""
+            if self.model:
+                analysis_prompt = f"""
 以下のYouTube動画について、なぜバイラルになったのか（登録者数が少ないのに再生数が多い）を1-2文で簡潔に分析し、この動画から学べるポイントを3つ箇条書きで記述してください。
 
-動画タイトル: {snippet["title"]}
-チャンネル名: {snippet["channelTitle"]}
+動画タイトル: {truncate_text(snippet["title"], video_title_budget())}
+チャンネル名: {truncate_text(snippet["channelTitle"], channel_title_budget())}
 再生回数: {view_count:,}
 登録者数: {subscriber_count:,}
 バイラル比率: {viral_ratio:.1f}倍
@@ -145,49 +313,24 @@ class ViralFinder:
 - [ポイント2]
 - [ポイント3]
 """
-                            analysis_response = self.model.generate_content(analysis_prompt)
-                            analysis_text = analysis_response.text.strip()
-                            lines = analysis_text.split('\n')
-                            for line in lines:
-                                if line.startswith("なぜバイラルになったか:"):
-                                    why_viral = line.replace("なぜバイラルになったか:", "").strip()
-                                elif line.startswith("- "):
-                                    key_takeaways.append(line.replace("- ", "").strip())
-                        else:
-                            logger.warning("Gemini model not available for viral video analysis.")
-                    except Exception as e:
-                        logger.error(f"Error generating viral analysis with Gemini: {e}")
-
-
-                    viral_videos.append(ViralVideo(
-                        platform="YouTube",
-                        title=snippet["title"],
-                        channel_name=snippet["channelTitle"],
-                        subscriber_count=subscriber_count,
-                        view_count=view_count,
-                        video_id=video_id,
-                        url=f"https://www.youtube.com/watch?v={video_id}",
-                        thumbnail_url=snippet["thumbnails"]["high"]["url"] if "high" in snippet["thumbnails"] else None,
-                        like_count=like_count,
-                        comment_count=comment_count,
-                        published_at=snippet["publishedAt"],
-                        viral_ratio=round(viral_ratio, 2),
-                        why_viral=why_viral,
-                        key_takeaways=key_takeaways
-                    ))
-            
-            # Sort by viral ratio in descending order
-            viral_videos.sort(key=lambda v: v.viral_ratio, reverse=True)
-
-            return viral_videos[:max_results]
-
-        except HttpError as e:
-            logger.error(f"YouTube API error in viral video search: {e}")
-            return []
+                analysis_response = self.model.generate_content(analysis_prompt)
+                analysis_text = analysis_response.text.strip()
+                lines = analysis_text.split('\n')
+                for line in lines:
+                    if line.startswith("なぜバイラルになったか:"):
+                        why_viral = line.replace("なぜバイラルになったか:", "").strip()
+                    elif line.startswith("- "):
+                        key_takeaways.append(line.replace("- ", "").strip())
+            else:
+                logger.warning("Gemini model not available for viral video analysis.")
+                mark_fallback("not_configured")
         except Exception as e:
-            logger.error(f"Error finding YouTube viral videos: {e}")
-            return []
+            logger.error(f"Error generating viral analysis with Gemini: {e}")
+            mark_fallback()
+        return why_viral, key_takeaways
 
+
+    @instrumented("viral_finder")
     def _analyze_viral_patterns(self, videos: List[ViralVideo]) -> List[str]:
         """バイラル動画の共通パターンを分析"""
 
@@ -196,7 +339,11 @@ class ViralFinder:
 
         # トップ10のデータを抽出
         top_videos = sorted(videos, key=lambda v: v.viral_ratio, reverse=True)[:10]
-        titles = [v.title for v in top_videos]
+        titles = fit_items(
+            [v.title for v in top_videos],
+            prompt_budget("viral_finder.analyze_viral_patterns", 600),
+            item_tokens=60,
+        )
         avg_ratio = sum(v.viral_ratio for v in top_videos) / len(top_videos)
 
         prompt = f"""
@@ -232,7 +379,8 @@ class ViralFinder:
             return insights[:5]
 
         except Exception as e:
-            print(f"Error analyzing viral patterns: {e}")
+            logger.error(f"Error analyzing viral patterns: {e}")
+            mark_fallback()
             return [
                 "感情を刺激するタイトル",
                 "具体的な数字や期間を含む",
@@ -241,6 +389,7 @@ class ViralFinder:
                 "サムネイルが目を引く"
             ]
 
+    @instrumented("viral_finder")
     def _generate_content_strategies(
         self,
         videos: List[ViralVideo],
@@ -255,13 +404,17 @@ class ViralFinder:
         for v in videos[:10]:
             all_takeaways.extend(v.key_takeaways)
 
+        budget = prompt_budget("viral_finder.generate_content_strategies", 800)
+        keywords = fit_items(keywords, budget // 4, item_tokens=30)
+        all_takeaways = fit_items(all_takeaways[:15], budget - budget // 4, item_tokens=60)
+
         prompt = f"""
 以下のキーワードで日本でバイラルになった動画の学びから、小規模チャンネルが再生数を伸ばすための具体的なコンテンツ戦略を5つ提案してください。
 
 キーワード: {', '.join(keywords)}
 
 バイラル動画から学べるポイント:
-{chr(10).join(f"- {t}" for t in all_takeaways[:15])}
+{chr(10).join(f"- {t}" for t in all_takeaways)}
 
 以下の形式で5つの箇条書きで回答してください:
 - 戦略1: 具体的なアクションプラン
@@ -288,7 +441,8 @@ class ViralFinder:
             return strategies[:5]
 
         except Exception as e:
-            print(f"Error generating content strategies: {e}")
+            logger.error(f"Error generating content strategies: {e}")
+            mark_fallback()
             return [
                 "ニッチなテーマで専門性を打ち出す",
                 "視聴者の感情に訴えるストーリーテリング",
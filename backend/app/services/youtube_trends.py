@@ -1,87 +1,165 @@
-from googleapiclient.discovery import build
 from datetime import datetime, timedelta
-from typing import List
+from typing import List, Optional
 import urllib.parse
 from ..core.config import settings
+from ..core.gemini import create_gemini_model
+from ..core.diversity import select_diverse
+from ..core.prompts import prompt_registry
+from ..core.query_keys import query_key
+from ..core.relevance import filter_relevant, relevance_scores, video_text
+from ..core.tokens import fit_items, prompt_budget, truncate_text
+from ..core.tracing import instrumented, mark_fallback
 from ..models.trends import TrendingVideo
-import google.generativeai as genai
+from ..repositories.youtube_data import (
+    YouTubeDataProvider,
+    create_fallback_data_provider,
+    create_youtube_data_provider,
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+MOCK_TRENDS_PROMPT = prompt_registry.register(
+    "youtube_trends.mock_trends",
+    instruction="""
+与えられたキーワードに厳密に関連する内容で、直近3ヶ月で再生回数が多いYouTube Shorts動画を、指定された本数だけリアルなデータとして生成してください。
+
+以下のJSON配列形式で出力してください：
+
+[
+  {
+    "title": "動画タイトル（感情を刺激する魅力的なもの）",
+    "channel_name": "チャンネル名",
+    "view_count": 500000,
+    "like_count": 15000,
+    "comment_count": 500,
+    "published_at": "2025-01-15T10:00:00Z",
+    "tags": ["タグ1", "タグ2", "タグ3"],
+    "description": "動画の説明",
+    "why_trending": "トレンドになっている理由の分析"
+  }
+]
+
+※ view_count は10万〜300万の範囲でリアルな数値を設定
+※ published_at は過去3ヶ月以内の日付
+※ すべて日本語で記述
+※ JSONのみを返してください
+※ 再生回数が多い順に並べる
+""",
+    body="""
+キーワード: {keywords}
+本数: {max_results}本
+""",
+)
+
 
 class YouTubeTrendsAnalyzer:
     """YouTube トレンド分析サービス"""
 
     def __init__(self):
-        if settings.YOUTUBE_API_KEY:
-            self.youtube = build('youtube', 'v3', developerKey=settings.YOUTUBE_API_KEY)
-        else:
-            self.youtube = None
+        self.provider = create_youtube_data_provider()
+        self.fallback_provider = create_fallback_data_provider()
 
         # Gemini for analysis
-        genai.configure(api_key=settings.GEMINI_API_KEY)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.model = create_gemini_model()
 
+    @instrumented("youtube_trends")
     def search_trending_shorts(
         self,
         keywords: List[str],
-        max_results: int = 10
+        max_results: int = 10,
+        relevance_terms: Optional[List[str]] = None
     ) -> List[TrendingVideo]:
-        """YouTube Shorts のトレンド動画を検索"""
-        if not self.youtube:
-            # YouTube API キーがない場合は、Geminiで模擬データを生成
-            return self._generate_mock_youtube_trends(keywords, max_results)
+        """YouTube Shorts のトレンド動画を検索
 
-        try:
-            import random
-
-            days_ago = 90
-            time_ago = datetime.utcnow() - timedelta(days=days_ago)
-            published_after = time_ago.isoformat("T") + "Z"
-
-            search_query = " ".join(keywords) + " #shorts"
-            order = 'viewCount'
-            fetch_count = min(max_results * 3, 50)
-
-            search_response = self.youtube.search().list(
-                q=search_query,
-                part='id,snippet',
-                maxResults=fetch_count,
-                order=order,
-                publishedAfter=published_after,
-                type='video',
-                videoDuration='short',
-                regionCode='JP',
-                relevanceLanguage='ja'
-            ).execute()
-
-            items = search_response.get('items', [])
-            if len(items) > max_results:
-                items = random.sample(items, max_results)
-
-            video_ids = [item['id']['videoId'] for item in items]
-            if not video_ids:
-                return []
+        relevance_terms（ペルソナの興味関心・悩みなど。省略時は keywords）との
+        関連性を relevance_score に入れ、関連の薄い動画は Gemini に渡す前に除く。
+        """
+        relevance_terms = relevance_terms or keywords
+        if not self.provider:
+            # YouTube API キーがない場合は、フォールバックのデータソースを使う
+            mark_fallback("not_configured")
+            return self._search_fallback(keywords, max_results, relevance_terms)
 
-            videos_response = self.youtube.videos().list(
-                part='snippet,statistics,contentDetails',
-                id=','.join(video_ids)
-            ).execute()
-
-            trending_videos = []
-            for item in videos_response.get('items', []):
-                video = self._parse_youtube_video(item)
-                if video:
-                    trending_videos.append(video)
-
-            return trending_videos
+        try:
+            return self._search_trending_shorts(self.provider, keywords, max_results, relevance_terms)
 
         except Exception as e:
             logger.error(f"Error searching YouTube trends: {e}", exc_info=True)
-            # 本番環境ではエラーを投げるべきだが、デモとして動作を継続するために模擬データを返す
+            # 本番環境ではエラーを投げるべきだが、デモとして動作を継続するために代替データを返す
             # raise e
-            return self._generate_mock_youtube_trends(keywords, max_results)
+            mark_fallback("youtube_error")
+            return self._search_fallback(keywords, max_results, relevance_terms)
+
+    def _search_fallback(
+        self,
+        keywords: List[str],
+        max_results: int,
+        relevance_terms: List[str]
+    ) -> List[TrendingVideo]:
+        """YOUTUBE_FALLBACK_PROVIDER に従って代替データを返す"""
+        if self.fallback_provider:
+            try:
+                return self._search_trending_shorts(self.fallback_provider, keywords, max_results, relevance_terms)
+            except Exception as e:
+                logger.error(f"Error searching fallback YouTube data ({self.fallback_provider.name}): {e}", exc_info=True)
+                return []
+        if settings.YOUTUBE_FALLBACK_PROVIDER == "gemini":
+            # Geminiで模擬データを生成
+            videos = self._generate_mock_youtube_trends(keywords, max_results)
+            scores = relevance_scores(relevance_terms, [f"{v.title}\n{' '.join(v.tags)}\n{v.description}" for v in videos])
+            for video, score in zip(videos, scores):
+                video.relevance_score = round(float(score), 3)
+            return videos
+        return []
+
+    def _search_trending_shorts(
+        self,
+        provider: YouTubeDataProvider,
+        keywords: List[str],
+        max_results: int,
+        relevance_terms: List[str]
+    ) -> List[TrendingVideo]:
+        """データソースから Shorts を検索し、スコア順に多様な動画を選んでパース"""
+        days_ago = 90
+        # 時間単位に丸め、同じ1時間の検索がキャッシュを共有できるようにする
+        time_ago = (datetime.utcnow() - timedelta(days=days_ago)).replace(minute=0, second=0, microsecond=0)
+        published_after = time_ago.isoformat("T") + "Z"
+
+        search_query = " ".join(keywords) + " #shorts"
+        fetch_count = min(max_results * 3, 50)
+
+        items = provider.search(
+            search_query,
+            fetch_count,
+            order='viewCount',
+            published_after=published_after,
+            short_only=True,
+        )
+
+        video_ids = [item['id']['videoId'] for item in items]
+        if not video_ids:
+            return []
+
+        # 候補全件の統計を1回で取得し（最大50件）、ペルソナとの関連が薄いものを除いてから
+        # 再生数・新しさ・関連性・チャンネルの重複・似たタイトルを考慮して選ぶ。
+        # 同じクエリには常に同じ結果を返す
+        candidates = provider.videos(video_ids, part='snippet,statistics,contentDetails')
+        scores = relevance_scores(relevance_terms, [video_text(item['snippet']) for item in candidates])
+        relevant = filter_relevant(scores, settings.RELEVANCE_MIN_SCORE)
+        candidates = [candidates[index] for index in relevant]
+        scores = scores[relevant]
+        score_by_id = {item['id']: float(score) for item, score in zip(candidates, scores)}
+        selected = select_diverse(candidates, max_results, seed=query_key(keywords), relevance=scores)
+
+        trending_videos = []
+        for item in selected:
+            video = self._parse_youtube_video(item)
+            if video:
+                video.relevance_score = round(score_by_id[item['id']], 3)
+                trending_videos.append(video)
+
+        return trending_videos
 
     def _parse_youtube_video(self, item) -> TrendingVideo:
         """YouTube API レスポンスをパース"""
@@ -112,8 +190,10 @@ class YouTubeTrendsAnalyzer:
             why_trending=why_trending
         )
 
+    @instrumented("youtube_trends")
     def _analyze_why_trending(self, title: str, description: str, views: int) -> str:
         """Gemini を使ってトレンド理由を分析"""
+        title = truncate_text(title, prompt_budget("youtube_trends.analyze_why_trending", 100))
         prompt = f"""
 以下のYouTube Shorts動画がトレンドになっている理由を1-2文で簡潔に分析してください。
 
@@ -127,44 +207,24 @@ class YouTubeTrendsAnalyzer:
 
 日本語で簡潔に回答してください。
 """
+        if not settings.GEMINI_API_KEY:
+            mark_fallback("not_configured")
+            return "視聴者の関心を集めている人気コンテンツです"
         try:
             response = self.model.generate_content(prompt)
             return response.text.strip()
         except Exception:
+            mark_fallback()
             return f"視聴者の関心を集めている人気コンテンツです"
 
+    @instrumented("youtube_trends")
     def _generate_mock_youtube_trends(self, keywords: List[str], max_results: int) -> List[TrendingVideo]:
         """模擬的なYouTubeトレンドデータを生成（API キーがない場合）"""
 
-        prompt = f"""
-以下のキーワードに厳密に関連する内容で、直近3ヶ月で再生回数が多いYouTube Shorts動画を{max_results}個、リアルなデータとして生成してください。
-
-キーワード: {', '.join(keywords)}
-
-以下のJSON配列形式で出力してください：
-
-[
-  {{
-    "title": "動画タイトル（感情を刺激する魅力的なもの）",
-    "channel_name": "チャンネル名",
-    "view_count": 500000,
-    "like_count": 15000,
-    "comment_count": 500,
-    "published_at": "2025-01-15T10:00:00Z",
-    "tags": ["タグ1", "タグ2", "タグ3"],
-    "description": "動画の説明",
-    "why_trending": "トレンドになっている理由の分析"
-  }}
-]
-
-※ view_count は10万〜300万の範囲でリアルな数値を設定
-※ published_at は過去3ヶ月以内の日付
-※ すべて日本語で記述
-※ JSONのみを返してください
-※ 再生回数が多い順に並べる"""
+        keywords = fit_items(keywords, prompt_budget("youtube_trends.generate_mock_youtube_trends", 200), item_tokens=30)
 
         try:
-            response = self.model.generate_content(prompt)
+            response = MOCK_TRENDS_PROMPT.generate(max_results=max_results, keywords=", ".join(keywords))
             response_text = response.text.strip()
 
             if "```json" in response_text:
@@ -200,6 +260,7 @@ class YouTubeTrendsAnalyzer:
 
         except Exception as e:
             logger.error(f"Error generating mock YouTube trends: {e}", exc_info=True)
+            mark_fallback()
             return []
 
 
@@ -0,0 +1,110 @@
+"""Compression ratio and CPU cost of analysis history ``result``/``meta`` blobs.
+
+Loads history like ``benchmarks.video_store`` (``--sqlite``, ``--jsonl`` or a
+synthetic history), trains a zstd dictionary on 80% of the blobs and
+compares gzip, zstd and zstd with the dictionary on the other 20%. With
+``--train PATH`` the dictionary is written for ``ANALYSIS_HISTORY_ZSTD_DICT``
+(name it ``*.zdict``). Needs ``pip install zstandard``.
+
+    cd backend && python -m benchmarks.blob_compression --sqlite analysis_history.db --train history-v1.zdict
+"""
+
+import argparse
+import gzip
+import random
+import time
+from typing import Callable, Dict, List
+
+import zstandard
+
+from app.core.blob_codec import _dumps
+from app.core.video_refs import extract_videos
+from benchmarks.video_store import load_jsonl, load_sqlite, synthetic
+
+
+def blobs(rows: List[dict], min_size: int, video_store: bool) -> List[bytes]:
+    videos: Dict[str, dict] = {}
+    samples = []
+    for row in rows:
+        result = row.get("result") or {}
+        if video_store:
+            result = extract_videos(result, videos)
+        for value in (result, row.get("meta") or {}):
+            encoded = _dumps(value)
+            if len(encoded) >= min_size:
+                samples.append(encoded)
+    return samples
+
+
+def measure(label: str, samples: List[bytes], compress: Callable, decompress: Callable) -> None:
+    raw = stored = 0
+    encode_cpu = decode_cpu = 0.0
+    for sample in samples:
+        start = time.thread_time()
+        compressed = compress(sample)
+        encode_cpu += time.thread_time() - start
+        start = time.thread_time()
+        assert decompress(compressed) == sample
+        decode_cpu += time.thread_time() - start
+        raw += len(sample)
+        # Stored base64-encoded inside JSON, as app.core.blob_codec does
+        stored += (len(compressed) + 2) // 3 * 4 + 12
+    print(
+        f"{label:<16} ratio {raw / stored:6.2f}x  stored {stored:>10} / {raw:>10} bytes  "
+        f"encode {encode_cpu / len(samples) * 1e6:8.1f}us  decode {decode_cpu / len(samples) * 1e6:7.1f}us per blob"
+    )
+
+
+def main(rows: List[dict], args) -> None:
+    samples = blobs(rows, args.min_size, args.video_store)
+    if len(samples) < 10:
+        raise SystemExit(f"only {len(samples)} blobs of at least {args.min_size} bytes; need 10")
+    random.Random(7).shuffle(samples)
+    split = len(samples) * 4 // 5
+    training, held_out = samples[:split], samples[split:]
+    print(f"{len(samples)} blobs >= {args.min_size} bytes, training on {len(training)}, measuring {len(held_out)}")
+
+    start = time.perf_counter()
+    dictionary = zstandard.train_dictionary(args.dict_size, training, level=args.level)
+    print(f"trained {len(dictionary.as_bytes())}-byte dictionary {dictionary.dict_id()} in {time.perf_counter() - start:.1f}s")
+    if args.train:
+        with open(args.train, "wb") as f:
+            f.write(dictionary.as_bytes())
+        print(f"wrote {args.train}")
+
+    dictionary.precompute_compress(level=args.level)
+    measure("gzip -6", held_out, lambda data: gzip.compress(data, 6), gzip.decompress)
+    measure(
+        f"zstd -{args.level}",
+        held_out,
+        lambda data: zstandard.ZstdCompressor(level=args.level).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+    measure(
+        f"zstd -{args.level} +dict",
+        held_out,
+        lambda data: zstandard.ZstdCompressor(level=args.level, dict_data=dictionary).compress(data),
+        lambda data: zstandard.ZstdDecompressor(dict_data=dictionary).decompress(data),
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--sqlite", help="analysis_history SQLite database")
+    source.add_argument("--jsonl", help="analysis_history rows exported as JSON lines")
+    parser.add_argument("--runs", type=int, default=2000, help="synthetic runs")
+    parser.add_argument("--train", help="write the trained dictionary to this path")
+    parser.add_argument("--dict-size", type=int, default=64 * 1024)
+    parser.add_argument("--level", type=int, default=9)
+    parser.add_argument("--min-size", type=int, default=2048, help="ANALYSIS_HISTORY_COMPRESSION_MIN_SIZE")
+    parser.add_argument("--video-store", action="store_true", help="measure results with videos split out")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        history = load_sqlite(args.sqlite)
+    elif args.jsonl:
+        history = load_jsonl(args.jsonl)
+    else:
+        history = synthetic(args.runs, catalog=3000)
+    main(history, args)
@@ -0,0 +1,245 @@
+"""Offline end-to-end throughput and latency benchmark.
+
+Starts the fake YouTube and Gemini servers, launches the API under uvicorn
+pointed at them (``YOUTUBE_API_ENDPOINT`` / ``GEMINI_API_ENDPOINT``, SQLite
+history), then drives each heavy endpoint at a fixed concurrency and reports
+RPS, p50/p95/p99 latency and upstream calls per request. Results are written
+to ``benchmarks/results/e2e-<timestamp>.json``; ``--compare`` prints the
+change against the previous run (or a given results file).
+
+    cd backend && python -m benchmarks.e2e --requests 200 --concurrency 16
+    cd backend && python -m benchmarks.e2e --latency 0.05 --error-rate 0.02 --compare
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from .fake_gemini import FakeGeminiServer
+from .fake_youtube import FakeYouTubeServer
+
+RESULTS_DIR = Path(__file__).parent / "results"
+API = "/api/v1"
+
+KEYWORDS = ["筋トレ", "ダイエット"]
+
+
+def _analytics_csv(rows: int = 30) -> bytes:
+    out = io.StringIO()
+    out.write("Video title,Views,Watch time (hours),Average view duration,Impressions,"
+              "Impressions click-through rate (%),Likes,Comments\n")
+    for index in range(rows):
+        out.write(f"動画{index},{1000 + index * 97},{10 + index * 0.5},{60 + index},"
+                  f"{20000 + index * 300},{3 + index % 5 * 0.4},{50 + index},{index % 9}\n")
+    return out.getvalue().encode("utf-8")
+
+
+def _scenarios() -> Dict[str, Callable[[httpx.AsyncClient], "asyncio.Future"]]:
+    trends_request = {"persona_keywords": KEYWORDS, "platforms": ["YouTube"], "max_results_per_platform": 10}
+    viral_request = {"keywords": KEYWORDS, "platforms": ["YouTube"], "max_results": 10}
+    csv_body = _analytics_csv()
+
+    return {
+        "trends/analyze": lambda c: c.post(f"{API}/trends/analyze", json=trends_request),
+        "viral/find": lambda c: c.post(f"{API}/viral/find", json=viral_request),
+        "dashboard/overview": lambda c: c.post(
+            f"{API}/dashboard/overview", json={"persona_keywords": KEYWORDS, "platforms": ["YouTube"]}
+        ),
+        "reports/combined-plan": lambda c: c.post(
+            f"{API}/reports/combined-plan",
+            json={"trends_request": trends_request, "viral_request": viral_request, "channel_genre": "フィットネス"},
+        ),
+        "analytics/analyze-csv": lambda c: c.post(
+            f"{API}/analytics/analyze-csv", files={"file": ("analytics.csv", csv_body, "text/csv")}
+        ),
+    }
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_api(
+    port: int, youtube: FakeYouTubeServer, gemini: FakeGeminiServer, server_logs: bool
+) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        YOUTUBE_API_KEY="benchmark",
+        YOUTUBE_API_ENDPOINT=youtube.endpoint,
+        GEMINI_API_KEY="benchmark",
+        GEMINI_API_ENDPOINT=gemini.endpoint,
+        ANALYSIS_HISTORY_BACKEND="sqlite",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        stdout=None if server_logs else subprocess.DEVNULL,
+        stderr=None if server_logs else subprocess.DEVNULL,
+    )
+
+
+async def _wait_ready(base_url: str, process: subprocess.Popen, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                raise RuntimeError(f"API server exited with code {process.returncode}")
+            try:
+                if (await client.get("/health")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError("API server did not become ready")
+
+
+async def _drive(client: httpx.AsyncClient, call, requests: int, concurrency: int) -> Dict:
+    samples: List[float] = []
+    errors = 0
+    remaining = iter(range(requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                response = await call(client)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        "requests": requests,
+        "errors": errors,
+        "rps": round(requests / elapsed, 2),
+        "p50_ms": round(statistics.median(samples), 2),
+        "p95_ms": round(_percentile(samples, 95), 2),
+        "p99_ms": round(_percentile(samples, 99), 2),
+    }
+
+
+async def run(args) -> Dict:
+    fakes = dict(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                 payload_scale=args.payload_scale, seed=args.seed)
+    youtube = FakeYouTubeServer(**fakes).start()
+    gemini = FakeGeminiServer(**fakes).start()
+    port = _free_port()
+    process = _start_api(port, youtube, gemini, args.server_logs)
+    base_url = f"http://127.0.0.1:{port}"
+    results: Dict[str, Dict] = {}
+    try:
+        await _wait_ready(base_url, process)
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+            for name, call in _scenarios().items():
+                if args.only and name not in args.only:
+                    continue
+                await _drive(client, call, min(args.warmup, args.requests), args.concurrency)
+                youtube.reset_counters()
+                gemini.reset_counters()
+
+                stats = await _drive(client, call, args.requests, args.concurrency)
+                stats["upstream_per_request"] = {
+                    **{f"youtube.{k}": round(v / args.requests, 2) for k, v in sorted(youtube.reset_counters().items())},
+                    **{f"gemini.{k}": round(v / args.requests, 2) for k, v in sorted(gemini.reset_counters().items())},
+                }
+                results[name] = stats
+                print(
+                    f"{name:<24} {stats['rps']:8.1f} rps  p50={stats['p50_ms']:8.1f}ms "
+                    f"p95={stats['p95_ms']:8.1f}ms p99={stats['p99_ms']:8.1f}ms "
+                    f"errors={stats['errors']}  upstream/req={stats['upstream_per_request']}"
+                )
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+        youtube.stop()
+        gemini.stop()
+
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "config": {k: v for k, v in vars(args).items() if k not in ("compare", "only", "no_save", "server_logs")},
+        "results": results,
+    }
+
+
+def _previous_run(exclude: Optional[Path] = None) -> Optional[Path]:
+    runs = sorted(p for p in RESULTS_DIR.glob("e2e-*.json") if p != exclude)
+    return runs[-1] if runs else None
+
+
+def compare(current: Dict, baseline_path: Path) -> None:
+    baseline = json.loads(baseline_path.read_text())
+    print(f"\ncompared with {baseline_path.name} ({baseline['timestamp']})")
+    for name, stats in current["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            continue
+        changes = []
+        for key in ("rps", "p50_ms", "p95_ms", "p99_ms"):
+            if before[key]:
+                changes.append(f"{key} {(stats[key] - before[key]) / before[key]:+.1%}")
+        print(f"{name:<24} " + "  ".join(changes))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="upstream latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="random extra latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of upstream calls that fail")
+    parser.add_argument("--payload-scale", type=int, default=1, help="multiplier for fake payload sizes")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", help="endpoints to run, e.g. trends/analyze viral/find")
+    parser.add_argument("--compare", nargs="?", const="previous", help="results file to compare with")
+    parser.add_argument("--no-save", action="store_true")
+    parser.add_argument("--server-logs", action="store_true", help="show the API server's output")
+    args = parser.parse_args()
+
+    current = asyncio.run(run(args))
+
+    saved = None
+    if not args.no_save:
+        RESULTS_DIR.mkdir(exist_ok=True)
+        saved = RESULTS_DIR / f"e2e-{datetime.now():%Y%m%d-%H%M%S}.json"
+        saved.write_text(json.dumps(current, indent=2, ensure_ascii=False))
+        print(f"\nresults written to {saved}")
+
+    if args.compare:
+        baseline = _previous_run(exclude=saved) if args.compare == "previous" else Path(args.compare)
+        if baseline is None:
+            print("no previous run to compare with")
+        else:
+            compare(current, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Local stand-in for the Gemini ``generateContent`` REST endpoint.
+
+Recognises the prompt shapes used by the services (strategy JSON, calendar
+JSON, CSV insights, mock trends, viral analysis, bullet lists) and answers
+with canned text in the format each parser expects. Latency, error rate and
+response size come from :class:`FakeUpstreamServer`.
+"""
+
+import json
+from http.server import BaseHTTPRequestHandler
+
+from .fake_youtube import FakeUpstreamServer
+
+
+def _video_concept(index: int, scale: int) -> dict:
+    return {
+        "title": f"ベンチマーク動画{index}",
+        "description": "動画の内容説明です。" * scale,
+        "hook": "最初の5秒で引き込むフック",
+        "key_points": [f"ポイント{n}" for n in range(3 * scale)],
+        "cta": "チャンネル登録をお願いします",
+        "estimated_length": "8-10分",
+    }
+
+
+def fake_completion(prompt: str, scale: int = 1) -> str:
+    """Return text shaped like what the service behind ``prompt`` parses."""
+    if '"channel_concept"' in prompt:
+        return json.dumps({
+            "channel_concept": "ベンチマーク用コンセプト" * scale,
+            "unique_value": "差別化ポイント",
+            "target_audience": "20-30代",
+            "content_pillars": ["柱1", "柱2", "柱3", "柱4"],
+            "posting_frequency": "週3回",
+            "growth_strategy": [f"戦略{n}" for n in range(5)],
+            "video_concepts": [_video_concept(n, scale) for n in range(5)],
+        }, ensure_ascii=False)
+    if '"week": 1' in prompt:
+        return json.dumps([
+            {"week": week, "theme": f"第{week}週のテーマ", "videos": [_video_concept(n, scale) for n in range(3)]}
+            for week in range(1, 5)
+        ], ensure_ascii=False)
+    if '"expected_impact"' in prompt:
+        return json.dumps([
+            {
+                "category": "パフォーマンス",
+                "priority": "高" if n == 0 else "中",
+                "finding": "発見した事実" * scale,
+                "recommendation": "推奨アクション",
+                "expected_impact": "期待される効果",
+            }
+            for n in range(5)
+        ], ensure_ascii=False)
+    if '"why_trending"' in prompt:
+        return json.dumps([
+            {
+                "title": f"模擬トレンド動画{n}",
+                "channel_name": "模擬チャンネル",
+                "view_count": 500000 - n * 1000,
+                "like_count": 15000,
+                "comment_count": 500,
+                "published_at": "2025-01-15T10:00:00Z",
+                "tags": ["タグ1", "タグ2"],
+                "description": "動画の説明" * scale,
+                "why_trending": "トレンドになっている理由",
+            }
+            for n in range(10)
+        ], ensure_ascii=False)
+    if "なぜバイラルになったか" in prompt:
+        return "なぜバイラルになったか: 共感を呼ぶ構成のため。\n学べるポイント:\n- 冒頭で結論\n- 数字入りタイトル\n- 問いかけで終わる"
+    return "\n".join(f"- ベンチマーク用の示唆{n}" + "。" * scale for n in range(5))
+
+
+class FakeGeminiHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - silence access log
+        pass
+
+    def do_POST(self):
+        server: FakeUpstreamServer = self.server
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+
+        # System instructions count as prompt text, both for routing and for tokens.
+        system = request.get("systemInstruction") or request.get("system_instruction") or {}
+        prompt = "".join(
+            part.get("text", "")
+            for content in [system, *request.get("contents", [])]
+            for part in content.get("parts", [])
+        )
+        if ":countTokens" in self.path:
+            server.record("countTokens")
+            self._send_json(200, {"totalTokens": len(prompt) // 2})
+            return
+        if ":generateContent" not in self.path:
+            # e.g. cachedContents: context caching is not emulated
+            self._send_json(404, {"error": {"code": 404, "message": "Not supported by the fake", "status": "NOT_FOUND"}})
+            return
+
+        server.record("generateContent")
+        server.sleep()
+        if server.should_fail():
+            self._send_json(503, {"error": {"code": 503, "message": "Injected failure", "status": "UNAVAILABLE"}})
+            return
+
+        text = fake_completion(prompt, server.payload_scale)
+        server.record("promptTokens", len(prompt) // 2)
+        server.record("completionTokens", len(text) // 2)
+        self._send_json(200, {
+            "candidates": [{
+                "content": {"parts": [{"text": text}], "role": "model"},
+                "finishReason": "STOP",
+                "index": 0,
+            }],
+            "usageMetadata": {
+                "promptTokenCount": len(prompt) // 2,
+                "candidatesTokenCount": len(text) // 2,
+                "totalTokenCount": (len(prompt) + len(text)) // 2,
+            },
+        })
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeGeminiServer(FakeUpstreamServer):
+    handler_class = FakeGeminiHandler
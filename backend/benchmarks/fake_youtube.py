@@ -0,0 +1,180 @@
+"""Local stand-in for the YouTube Data API v3 used by the benchmarks.
+
+Serves ``search``, ``videos`` and ``channels`` list endpoints with
+deterministic fake payloads over HTTP/1.1 keep-alive so transport behaviour
+(connection reuse, pooling) can be measured without network access or quota.
+Latency, error rate and payload size are configurable.
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+
+# Half of the videos match the e2e benchmark's keywords, so persona relevance
+# filtering has something to keep and something to drop.
+TOPICS = ["筋トレ", "ダイエット", "料理", "旅行"]
+
+
+def _video_item(video_id: str, payload_scale: int = 1) -> Dict:
+    seed = sum(ord(c) for c in video_id)
+    topic = TOPICS[seed % len(TOPICS)]
+    return {
+        "kind": "youtube#video",
+        "id": video_id,
+        "snippet": {
+            "publishedAt": "2025-01-15T10:00:00Z",
+            "channelId": f"UC{seed % 40:022d}",
+            "title": f"{topic}のテスト動画 {video_id} #shorts",
+            "description": "ベンチマーク用のダミー説明文です。" * 4 * payload_scale,
+            "thumbnails": {"high": {"url": f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"}},
+            "channelTitle": f"チャンネル{seed % 40}",
+            "tags": ["ベンチマーク", "shorts", topic, f"tag{seed % 7}"],
+        },
+        "statistics": {
+            "viewCount": str(10_000 + seed * 137),
+            "likeCount": str(100 + seed),
+            "commentCount": str(seed % 50),
+        },
+        "contentDetails": {"duration": "PT45S"},
+    }
+
+
+def _channel_id(name: str) -> str:
+    return "UC" + hashlib.sha256(name.lstrip("@").lower().encode("utf-8")).hexdigest()[:22]
+
+
+class FakeYouTubeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; without TCP_NODELAY the
+    # keep-alive path would be dominated by Nagle/delayed-ACK stalls.
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):  # noqa: A002 - silence access log
+        pass
+
+    def do_GET(self):
+        server: FakeUpstreamServer = self.server  # type: ignore[assignment]
+        parsed = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        resource = parsed.path.rstrip("/").rsplit("/", 1)[-1]
+
+        server.record(resource)
+        server.sleep()
+        if server.should_fail():
+            self.send_error(503, "Injected failure")
+            return
+
+        if resource == "search" and params.get("type") == "channel":
+            items = [{"id": {"kind": "youtube#channel", "channelId": _channel_id(params.get("q", ""))}}]
+        elif resource == "search":
+            count = int(params.get("maxResults", 5))
+            items = [
+                {"id": {"kind": "youtube#video", "videoId": f"vid{i:04d}"}, "snippet": {}}
+                for i in range(count)
+            ]
+        elif resource == "channels" and ("forHandle" in params or "forUsername" in params):
+            # Names starting with "missing" do not exist.
+            name = params.get("forHandle") or params.get("forUsername")
+            items = [] if name.lstrip("@").startswith("missing") else [{"id": _channel_id(name)}]
+        elif resource == "videos":
+            items = [
+                _video_item(vid, server.payload_scale)
+                for vid in params.get("id", "").split(",") if vid
+            ]
+        elif resource == "channels":
+            items = [
+                {"id": cid, "snippet": {"title": cid}, "statistics": {"subscriberCount": "5000"}}
+                for cid in params.get("id", "").split(",") if cid
+            ]
+        else:
+            self.send_error(404)
+            return
+
+        body = json.dumps({"items": items}).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=UTF-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class FakeUpstreamServer(ThreadingHTTPServer):
+    """Threaded HTTP server with injectable latency, errors and call counts."""
+
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(
+        self,
+        address: Tuple[str, int] = ("127.0.0.1", 0),
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        payload_scale: int = 1,
+        seed: int = 0,
+    ):
+        super().__init__(address, self.handler_class)
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload_scale = payload_scale
+        self._random = random.Random(seed)
+        self.calls: Dict[str, int] = {}
+        self.connections = 0
+        self._calls_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    def process_request(self, request, client_address):
+        with self._calls_lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+    def record(self, resource: str, count: int = 1) -> None:
+        with self._calls_lock:
+            self.calls[resource] = self.calls.get(resource, 0) + count
+
+    def sleep(self) -> None:
+        if self.latency or self.jitter:
+            with self._calls_lock:
+                extra = self._random.uniform(0, self.jitter)
+            time.sleep(self.latency + extra)
+
+    def should_fail(self) -> bool:
+        if not self.error_rate:
+            return False
+        with self._calls_lock:
+            return self._random.random() < self.error_rate
+
+    def reset_counters(self) -> Dict[str, int]:
+        """Return the per-resource counts (calls, tokens) and start counting afresh."""
+        with self._calls_lock:
+            calls, self.calls = self.calls, {}
+        return calls
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeUpstreamServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+
+class FakeYouTubeServer(FakeUpstreamServer):
+    handler_class = FakeYouTubeHandler
+
+
+def video_ids(count: int) -> List[str]:
+    return [f"vid{i:04d}" for i in range(count)]
@@ -0,0 +1,110 @@
+"""Deep-page cost of analysis history pagination on a seeded table.
+
+Seeds a SQLite repository (same indexes as
+``migrations/001_analysis_history_keyset.sql``) with 100k runs, where every
+timestamp is shared by several rows, then compares:
+
+* keyset: the ``(created_at, id)`` cursor used by ``list_runs``
+* offset: ``LIMIT/OFFSET`` paging, for reference
+* legacy: the old ``created_at < cursor`` cursor, which skips tied rows
+
+    cd backend && python -m benchmarks.history_pagination --rows 100000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.repositories.analysis_history import SQLiteAnalysisHistoryRepository
+from app.services.analysis_history import AnalysisHistoryService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+async def seed(repository: SQLiteAnalysisHistoryRepository, rows: int, ties: int) -> None:
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    batch = []
+    for index in range(rows):
+        batch.append({
+            "id": str(uuid.UUID(int=index + 1)),
+            "user_id": USER_ID,
+            "analysis_type": "viral" if index % 3 == 0 else "trends",
+            "keywords": ["筋トレ"],
+            "platforms": ["YouTube"],
+            "summary": f"run {index}",
+            "meta": {},
+            "result": {"videos": []},
+            "created_at": (base + timedelta(seconds=index // ties)).isoformat(),
+        })
+        if len(batch) == 5000:
+            await repository.insert_runs(batch)
+            batch = []
+    if batch:
+        await repository.insert_runs(batch)
+
+
+def _ms(samples):
+    return f"p50={statistics.median(samples):6.2f}ms max={max(samples):6.2f}ms"
+
+
+async def main(rows: int, ties: int, page_size: int, depth: int) -> None:
+    repository = SQLiteAnalysisHistoryRepository(":memory:")
+    start = time.perf_counter()
+    await seed(repository, rows, ties)
+    print(f"seeded {rows} rows ({ties} per timestamp) in {time.perf_counter() - start:.1f}s")
+
+    service = AnalysisHistoryService(repository)
+
+    # Walk the keyset cursor to the requested depth, timing every page.
+    cursor, samples = None, []
+    for _ in range(depth):
+        start = time.perf_counter()
+        page = await service.list_runs(USER_ID, None, limit=page_size, cursor=cursor, prefetch=False)
+        samples.append((time.perf_counter() - start) * 1000)
+        cursor = page.next_cursor
+    print(f"keyset page 1:       {samples[0]:6.2f}ms")
+    print(f"keyset page {depth}:  {samples[-1]:6.2f}ms   all pages {_ms(samples)}")
+
+    offset_samples = []
+    for page_number in (0, depth - 1):
+        start = time.perf_counter()
+        await repository._run(
+            "SELECT * FROM analysis_history WHERE user_id = ? "
+            "ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?",
+            [USER_ID, page_size, page_number * page_size],
+        )
+        offset_samples.append((time.perf_counter() - start) * 1000)
+    print(f"offset page 1:       {offset_samples[0]:6.2f}ms")
+    print(f"offset page {depth}:  {offset_samples[1]:6.2f}ms")
+
+    # Full walk: keyset must see every row, the legacy cursor loses ties.
+    for label, legacy in (("keyset", False), ("legacy", True)):
+        key, total = None, 0
+        while True:
+            batch = await repository.list_runs(USER_ID, page_size, cursor=key)
+            total += len(batch)
+            if len(batch) < page_size:
+                break
+            last = batch[-1]
+            key = (last["created_at"], None if legacy else last["id"])
+        print(f"{label} full walk returned {total}/{rows} rows")
+
+    # Prefetch: the next page is already in flight when the client asks.
+    first = await service.list_runs(USER_ID, None, limit=page_size, prefetch=True)
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    await service.list_runs(USER_ID, None, limit=page_size, cursor=first.next_cursor, prefetch=True)
+    print(f"prefetched page 2:   {(time.perf_counter() - start) * 1000:6.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--ties", type=int, default=4, help="rows sharing each timestamp")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--depth", type=int, default=1000, help="number of pages to walk")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.ties, args.page_size, args.depth))
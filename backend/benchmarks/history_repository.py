@@ -0,0 +1,76 @@
+"""Exercise ``AnalysisHistoryService`` against the local SQLite repository.
+
+Compares importing history one row at a time with ``save_runs`` and times the
+read paths (list, get, stats) with concurrent callers, all without Supabase.
+
+    cd backend && python -m benchmarks.history_repository --runs 2000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from typing import Awaitable, Callable, List
+
+from app.models.analysis import AnalysisRunCreate
+from app.repositories.analysis_history import SQLiteAnalysisHistoryRepository
+from app.services.analysis_history import AnalysisHistoryService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def sample_payload(index: int) -> AnalysisRunCreate:
+    return AnalysisRunCreate(
+        analysis_type="viral" if index % 3 == 0 else "trends",
+        keywords=["筋トレ", f"キーワード{index % 25}"],
+        platforms=["YouTube"],
+        summary=f"ベンチマーク実行 #{index}",
+        meta={"max_results": 10},
+        result={"videos": [{"title": f"動画{index}-{n}", "view_count": n * 1000} for n in range(10)]},
+    )
+
+
+async def _timed(label: str, call: Callable[[], Awaitable[object]], repeat: int, concurrency: int) -> None:
+    samples: List[float] = []
+
+    async def one() -> None:
+        start = time.perf_counter()
+        await call()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for offset in range(0, repeat, concurrency):
+        await asyncio.gather(*(one() for _ in range(min(concurrency, repeat - offset))))
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<26} {repeat / elapsed:9.1f} ops/s  "
+        f"p50={statistics.median(samples):6.2f}ms  max={max(samples):6.2f}ms"
+    )
+
+
+async def main(runs: int, concurrency: int) -> None:
+    payloads = [sample_payload(i) for i in range(runs)]
+
+    one_by_one = AnalysisHistoryService(SQLiteAnalysisHistoryRepository(":memory:"))
+    start = time.perf_counter()
+    for payload in payloads:
+        await one_by_one.save_run(USER_ID, payload)
+    print(f"{'save_run x' + str(runs):<26} {time.perf_counter() - start:9.3f}s")
+
+    service = AnalysisHistoryService(SQLiteAnalysisHistoryRepository(":memory:"))
+    start = time.perf_counter()
+    saved = await service.save_runs(USER_ID, payloads)
+    print(f"{'save_runs (bulk)':<26} {time.perf_counter() - start:9.3f}s")
+
+    run_id = saved[len(saved) // 2].id
+    await _timed("list_runs", lambda: service.list_runs(USER_ID, None, limit=20), 200, concurrency)
+    await _timed("get_run", lambda: service.get_run(USER_ID, run_id), 200, concurrency)
+    await _timed("get_stats", lambda: service.get_stats(USER_ID), 50, concurrency)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    asyncio.run(main(args.runs, args.concurrency))
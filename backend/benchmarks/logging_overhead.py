@@ -0,0 +1,153 @@
+"""Logging cost on the request path: synchronous stderr vs the queue pipeline.
+
+Part 1 has 8 threads emit DEBUG lines through three sinks and reports the
+caller-side cost per line (what a request thread pays):
+
+* ``stderr write+flush``: the old ``sys.stderr.write`` + ``flush()`` pattern
+* ``StreamHandler``: stdlib logging writing synchronously
+* ``queue pipeline``: ``app.core.log.setup_logging`` (JSON on a listener thread)
+
+Part 2 drives ``/api/v1/trends/analyze`` in-process against the fake YouTube
+and Gemini servers with ``LOG_LEVEL`` at INFO, DEBUG and DEBUG sampled at
+10%, and reports p50/p99 and RPS. Output goes to a temporary file so the
+terminal is not the bottleneck.
+
+    cd backend && python -m benchmarks.logging_overhead
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import tempfile
+import threading
+import time
+from typing import Callable, List
+
+import httpx
+
+from .fake_gemini import FakeGeminiServer
+from .fake_youtube import FakeYouTubeServer
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+def _threaded(emit: Callable[[int], None], threads: int, lines: int) -> float:
+    """Return the mean caller-side cost of one ``emit`` in microseconds."""
+    durations: List[float] = []
+    barrier = threading.Barrier(threads)
+
+    def worker() -> None:
+        barrier.wait()
+        start = time.perf_counter()
+        for index in range(lines):
+            emit(index)
+        durations.append(time.perf_counter() - start)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return statistics.mean(durations) / lines * 1_000_000
+
+
+def micro(threads: int, lines: int) -> None:
+    from app.core.log import setup_logging, shutdown_logging
+
+    payload = {"keywords": ["筋トレ", "ダイエット"], "platforms": ["YouTube"], "max_results_per_platform": 10}
+    with tempfile.TemporaryFile("w+") as sink:
+        def stderr_write(index: int) -> None:
+            sink.write(f"[DEBUG] analyze_trends called with keywords: {payload['keywords']}\n")
+            sink.flush()
+
+        logger = logging.getLogger("benchmarks.logging")
+        root = logging.getLogger()
+
+        direct = logging.StreamHandler(sink)
+        direct.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        saved = root.handlers[:]
+        root.handlers = [direct]
+        root.setLevel(logging.DEBUG)
+
+        def log_call(index: int) -> None:
+            logger.debug("analyze_trends called", extra=payload)
+
+        results = {"stderr write+flush": _threaded(stderr_write, threads, lines)}
+        results["StreamHandler (sync)"] = _threaded(log_call, threads, lines)
+
+        root.handlers = saved
+        setup_logging(level="DEBUG", fmt="json", stream=sink)
+        results["queue pipeline (JSON)"] = _threaded(log_call, threads, lines)
+        shutdown_logging()
+
+    print(f"caller-side cost per line, {threads} threads x {lines} lines")
+    for label, micros in results.items():
+        print(f"  {label:<24} {micros:8.2f} µs")
+
+
+async def macro(requests: int, concurrency: int) -> None:
+    from app.core.log import setup_logging, shutdown_logging
+    from app.main import app
+
+    body = {"persona_keywords": ["筋トレ"], "platforms": ["YouTube"], "max_results_per_platform": 5}
+    print(f"\n/api/v1/trends/analyze, {requests} requests at concurrency {concurrency}")
+    try:
+        with tempfile.TemporaryFile("w+") as sink:
+            for label, level, rate in (("INFO", "INFO", 1.0), ("DEBUG", "DEBUG", 1.0), ("DEBUG @10%", "DEBUG", 0.1)):
+                setup_logging(level=level, fmt="json", debug_sample_rate=rate, stream=sink)
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                    await client.post("/api/v1/trends/analyze", json=body)  # warm up
+                    samples: List[float] = []
+                    remaining = iter(range(requests))
+
+                    async def worker() -> None:
+                        for _ in remaining:
+                            start = time.perf_counter()
+                            await client.post("/api/v1/trends/analyze", json=body)
+                            samples.append((time.perf_counter() - start) * 1000)
+
+                    start = time.perf_counter()
+                    await asyncio.gather(*(worker() for _ in range(concurrency)))
+                    elapsed = time.perf_counter() - start
+                lines = sink.tell()
+                print(
+                    f"  {label:<12} p50={statistics.median(samples):7.2f}ms "
+                    f"p99={_percentile(samples, 99):7.2f}ms {requests / elapsed:7.1f} rps "
+                    f"log bytes so far={lines:,}"
+                )
+    finally:
+        shutdown_logging()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--lines", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="fake upstream latency in seconds")
+    args = parser.parse_args()
+
+    # The settings object is built on first import of ``app``, so point it at
+    # the fakes before either part imports anything from there.
+    youtube = FakeYouTubeServer(latency=args.latency).start()
+    gemini = FakeGeminiServer(latency=args.latency).start()
+    os.environ.update(
+        YOUTUBE_API_KEY="benchmark",
+        YOUTUBE_API_ENDPOINT=youtube.endpoint,
+        GEMINI_API_KEY="benchmark",
+        GEMINI_API_ENDPOINT=gemini.endpoint,
+        ANALYSIS_HISTORY_BACKEND="sqlite",
+    )
+    try:
+        micro(args.threads, args.lines)
+        asyncio.run(macro(args.requests, args.concurrency))
+    finally:
+        youtube.stop()
+        gemini.stop()
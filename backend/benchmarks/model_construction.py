@@ -0,0 +1,118 @@
+"""Validated vs trusted (``model_construct``) model building on internal data.
+
+Times the models the services build from our own rows (analysis history,
+channels) and from field-by-field parsed YouTube items, once through
+``Model(**data)`` and once through ``model_construct`` with the conversions
+it needs to serialize identically (ISO timestamps to ``datetime``, ids to
+``UUID``, URLs to ``HttpUrl``). Both results are checked to produce the
+same JSON.
+
+    cd backend && python -m benchmarks.model_construction
+"""
+
+import argparse
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict
+
+import pydantic
+from pydantic import HttpUrl
+
+from app.models.analysis import AnalysisRunListResponse, AnalysisRunResponse
+from app.models.channel import Channel
+from app.models.trends import TrendingVideo
+from app.models.viral_finder import ViralVideo
+from benchmarks.video_store import synthetic
+
+NOW = datetime.now(timezone.utc).isoformat()
+
+
+def _run_row() -> Dict[str, Any]:
+    row = synthetic(1, 40)[0]
+    return {**row, "id": str(uuid.uuid4()), "user_id": str(uuid.uuid4()), "channel_id": None, "created_at": NOW}
+
+
+def _channel_row() -> Dict[str, Any]:
+    return {
+        "id": str(uuid.uuid4()),
+        "channel_id": "UC" + "x" * 22,
+        "channel_name": "フィットネスチャンネル",
+        "channel_url": "https://www.youtube.com/@fitness",
+        "subscriber_count": 12345,
+        "created_at": NOW,
+        "updated_at": NOW,
+    }
+
+
+def _video() -> Dict[str, Any]:
+    return dict(_run_row()["result"]["videos"][0], like_count=10, comment_count=2)
+
+
+def _trending_video() -> Dict[str, Any]:
+    video = _video()
+    for key in ("subscriber_count", "viral_ratio", "why_viral", "key_takeaways"):
+        video.pop(key)
+    return {**video, "duration": "PT30S", "relevance_score": None, "why_trending": "季節のテーマに合っている"}
+
+
+def _viral_video() -> Dict[str, Any]:
+    video = _video()
+    for key in ("tags", "description"):
+        video.pop(key)
+    return video
+
+
+def construct_run(row: Dict[str, Any]) -> AnalysisRunResponse:
+    return AnalysisRunResponse.model_construct(**{**row, "created_at": datetime.fromisoformat(row["created_at"])})
+
+
+def construct_channel(row: Dict[str, Any]) -> Channel:
+    return Channel.model_construct(**{
+        **row,
+        "id": uuid.UUID(row["id"]),
+        "channel_url": HttpUrl(row["channel_url"]),
+        "created_at": datetime.fromisoformat(row["created_at"]),
+        "updated_at": datetime.fromisoformat(row["updated_at"]),
+    })
+
+
+def _timed(build: Callable[[], Any], repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build()
+    return (time.perf_counter() - start) / repeat * 1e6
+
+
+def main(repeat: int) -> None:
+    page = [_run_row() for _ in range(20)]
+    cases = [
+        ("AnalysisRunResponse", lambda row: AnalysisRunResponse(**row), construct_run, _run_row()),
+        ("Channel", lambda row: Channel(**row), construct_channel, _channel_row()),
+        ("TrendingVideo", lambda data: TrendingVideo(**data), lambda data: TrendingVideo.model_construct(**data),
+         _trending_video()),
+        ("ViralVideo", lambda data: ViralVideo(**data), lambda data: ViralVideo.model_construct(**data),
+         _viral_video()),
+        (
+            "list page of 20",
+            lambda rows: AnalysisRunListResponse(items=[AnalysisRunResponse(**row) for row in rows]),
+            lambda rows: AnalysisRunListResponse.model_construct(
+                items=[construct_run(row) for row in rows], next_cursor=None
+            ),
+            page,
+        ),
+    ]
+    print(f"pydantic {pydantic.VERSION}")
+    print(f"{'model':<20} {'validated':>10} {'trusted':>10}  speedup")
+    for name, validated, trusted, data in cases:
+        assert validated(data).model_dump_json() == trusted(data).model_dump_json(), name
+        validated_us = _timed(lambda: validated(data), repeat)
+        trusted_us = _timed(lambda: trusted(data), repeat)
+        print(f"{name:<20} {validated_us:8.2f}us {trusted_us:8.2f}us  {validated_us / trusted_us:6.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+    main(args.repeat)
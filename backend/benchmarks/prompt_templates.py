@@ -0,0 +1,108 @@
+"""Static vs per-request share of every registered prompt template.
+
+For each template, renders the body with representative values and reports
+the static instruction and the per-request body in bytes and (estimated)
+tokens. The static part is what a context cache saves on every call:
+
+* ``inline``: instruction and body sent together as one prompt (before
+  templates)
+* ``system instruction``: the same bytes on the wire, but the instruction is
+  built once at startup instead of per call
+* ``context cache``: only the body is sent, so the saving per call is the
+  whole static part (Gemini only caches instructions above a minimum size,
+  see ``GEMINI_CONTEXT_CACHE_MIN_TOKENS``)
+
+It also times building the prompt string per call: the old f-string with
+the instruction inlined vs rendering the body alone.
+
+    cd backend && python -m benchmarks.prompt_templates
+"""
+
+import argparse
+import importlib
+import os
+import pkgutil
+import time
+
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ.setdefault("ANALYSIS_HISTORY_BACKEND", "sqlite")
+
+SAMPLE_VALUES = {
+    "age_range": "20-30代",
+    "gender": "女性",
+    "interests": "筋トレ, ダイエット, 料理",
+    "pain_points": "時間がない, 続かない",
+    "goals": "健康的に痩せる, 習慣化",
+    "content_preferences": "短い動画で要点だけ知りたい",
+    "channel_genre": "フィットネス",
+    "video_count": 5,
+    "weeks": 4,
+    "title": "1日5分で変わる！自宅筋トレ入門",
+    "description": "器具なしでできる筋トレを初心者向けに解説する動画です。",
+    "hook": "たった5分で体が変わるとしたら？",
+    "key_points": "正しいフォーム, 回数の目安, 続けるコツ",
+    "cta": "チャンネル登録して一緒に続けよう",
+    "estimated_length": "8分",
+    "keywords": "筋トレ, ダイエット",
+    "max_results": 10,
+    "trend_titles": "\n".join(f"- トレンド動画タイトル{n}" for n in range(6)),
+    "viral_titles": "\n".join(f"- バイラル動画タイトル{n}" for n in range(5)),
+    "viral_patterns": "\n".join(f"- 成功パターン{n}: 数字入りのタイトル" for n in range(5)),
+    "overall_insights": "\n".join(f"示唆{n}: 週3回の投稿" for n in range(5)),
+    "channel_concept": "忙しい人のための5分筋トレ",
+    "content_pillars": "\n".join(f"- 柱{n}" for n in range(4)),
+    "video_titles": "\n".join(f"- 初期動画{n}" for n in range(5)),
+}
+
+
+def _per_call_us(func, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) / repeat * 1_000_000
+
+
+def main(repeat: int) -> None:
+    import app.services
+    from app.core.tokens import estimate_tokens
+    from app.core.prompts import prompt_registry
+
+    # Services register their templates when imported
+    for module in pkgutil.iter_modules(app.services.__path__):
+        importlib.import_module(f"app.services.{module.name}")
+
+    header = (
+        f"{'template':<40} {'static B':>9} {'body B':>8} {'static tok':>10} {'body tok':>9} "
+        f"{'static %':>8} {'inline µs':>9} {'body µs':>8}"
+    )
+    print(header)
+    print("-" * len(header))
+    totals = [0, 0, 0, 0]
+    for template in prompt_registry.templates():
+        values = {field: SAMPLE_VALUES[field] for field in template.fields}
+        body = template.render(**values)
+        body_bytes = len(body.encode("utf-8"))
+        body_tokens = estimate_tokens(body)
+        share = template.static_bytes / (template.static_bytes + body_bytes) * 100
+        inline_us = _per_call_us(lambda: template.full_text(**values), repeat)
+        body_us = _per_call_us(lambda: template.render(**values), repeat)
+        print(
+            f"{template.name:<40} {template.static_bytes:>9,} {body_bytes:>8,} "
+            f"{template.static_tokens:>10,} {body_tokens:>9,} {share:>7.1f}% {inline_us:>9.2f} {body_us:>8.2f}"
+        )
+        totals[0] += template.static_bytes
+        totals[1] += body_bytes
+        totals[2] += template.static_tokens
+        totals[3] += body_tokens
+    print("-" * len(header))
+    print(f"{'total':<40} {totals[0]:>9,} {totals[1]:>8,} {totals[2]:>10,} {totals[3]:>9,}")
+    print(
+        "\nWith a context cache, every call saves its template's static bytes/tokens; "
+        "with a system instruction only the per-call string building is saved."
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20_000, help="renders per template for the timing columns")
+    main(parser.parse_args().repeat)
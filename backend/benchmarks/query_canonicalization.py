@@ -0,0 +1,128 @@
+"""Cache hit ratio of raw vs canonical query keys on a replayed request log.
+
+Replays the keyword queries of a request log through an LRU cache twice:
+once keyed by the keywords as typed (what reached ``search().list`` before
+canonicalization) and once by ``app.core.query_keys.query_key``. Reports
+requests, distinct keys and hit ratio for both.
+
+``--log`` takes JSON lines. Each line may be a request body
+(``persona_keywords`` / ``keywords``, also nested under ``trends_request`` /
+``viral_request``), an analysis history row (``keywords``) or one of the
+app's own JSON log lines (``analyze_trends called`` at DEBUG carries
+``keywords``). Without ``--log`` a seeded synthetic log is generated with the
+variants seen in practice: reordering, separators inside one keyword,
+full-width/half-width forms, case and duplicates.
+
+    cd backend && python -m benchmarks.query_canonicalization --log requests.jsonl
+"""
+
+import argparse
+import json
+import random
+from collections import OrderedDict
+from typing import Iterator, List, Optional
+
+from app.core.query_keys import query_key
+
+VOCABULARY = [
+    "筋トレ", "ダイエット", "料理", "時短レシピ", "キャンプ", "vlog", "iPhone", "ゲーム実況",
+    "英語学習", "副業", "投資", "メイク", "ヨガ", "朝活", "カフェ", "猫", "DIY", "旅行",
+]
+# NFKC folds these back to the full-width forms above.
+HALF_WIDTH = {"ダイエット": "ﾀﾞｲｴｯﾄ", "キャンプ": "ｷｬﾝﾌﾟ", "ゲーム実況": "ｹﾞｰﾑ実況", "メイク": "ﾒｲｸ", "カフェ": "ｶﾌｪ"}
+FULL_WIDTH = {c: chr(ord(c) + 0xFEE0) for c in "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"}
+
+
+def _variant(terms: List[str], rng: random.Random) -> List[str]:
+    terms = list(terms)
+    rng.shuffle(terms)
+    spelled = []
+    for term in terms:
+        roll = rng.random()
+        if term in HALF_WIDTH and roll < 0.2:
+            term = HALF_WIDTH[term]
+        elif term.isascii() and roll < 0.2:
+            term = "".join(FULL_WIDTH.get(c, c) for c in term)
+        elif term.isascii() and roll < 0.4:
+            term = rng.choice([term.upper(), term.lower(), term.capitalize()])
+        spelled.append(term)
+    if rng.random() < 0.1:
+        spelled.append(rng.choice(spelled))
+    style = rng.random()
+    if style < 0.5 or len(spelled) == 1:
+        return spelled
+    separator = rng.choice([", ", "、", "　", " ", ","])
+    return [separator.join(spelled)]
+
+
+def synthetic_log(requests: int, seed: int) -> Iterator[List[str]]:
+    rng = random.Random(seed)
+    queries = [
+        sorted(rng.sample(VOCABULARY, rng.choice((1, 2, 2, 3))))
+        for _ in range(300)
+    ]
+    weights = [1 / (rank + 1) for rank in range(len(queries))]  # Zipf-like popularity
+    for _ in range(requests):
+        yield _variant(rng.choices(queries, weights)[0], rng)
+
+
+def _keywords_of(entry: dict) -> Optional[List[str]]:
+    for field in ("persona_keywords", "keywords"):
+        value = entry.get(field)
+        if isinstance(value, list) and all(isinstance(v, str) for v in value):
+            return value
+    for nested in ("trends_request", "viral_request"):
+        if isinstance(entry.get(nested), dict):
+            return _keywords_of(entry[nested])
+    return None
+
+
+def replayed_log(path: str) -> Iterator[List[str]]:
+    with open(path, encoding="utf-8") as log:
+        for line in log:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(entry, dict):
+                keywords = _keywords_of(entry)
+                if keywords is not None:
+                    yield keywords
+
+
+def hit_ratio(keys: List[str], cache_size: int) -> float:
+    cache: "OrderedDict[str, None]" = OrderedDict()
+    hits = 0
+    for key in keys:
+        if key in cache:
+            hits += 1
+            cache.move_to_end(key)
+        else:
+            cache[key] = None
+            if len(cache) > cache_size:
+                cache.popitem(last=False)
+    return hits / len(keys) if keys else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--log", help="JSON lines to replay (default: synthetic log)")
+    parser.add_argument("--requests", type=int, default=20_000, help="synthetic log size")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--cache-size", type=int, default=100, help="LRU entries")
+    args = parser.parse_args()
+
+    queries = list(replayed_log(args.log) if args.log else synthetic_log(args.requests, args.seed))
+    if not queries:
+        raise SystemExit("no keyword queries found in the log")
+    raw = [" ".join(keywords) for keywords in queries]
+    canonical = [query_key(keywords) for keywords in queries]
+
+    print(f"{len(queries):,} queries from {args.log or 'synthetic log'}, LRU of {args.cache_size} entries")
+    print(f"  {'key':<10} {'distinct':>9} {'hit ratio':>10}")
+    for label, keys in (("raw", raw), ("canonical", canonical)):
+        print(f"  {label:<10} {len(set(keys)):>9,} {hit_ratio(keys, args.cache_size):>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Serialization CPU time and wire size for a 50-video dashboard response.
+
+Compares FastAPI's classic path (re-validate against ``response_model``,
+``jsonable_encoder``, ``json.dumps``) with ``ModelJSONResponse``
+(``model_dump_json``) and orjson, then reports the body size uncompressed,
+gzipped and (if ``brotli`` is installed) brotli-compressed.
+
+    cd backend && python -m benchmarks.response_encoding
+"""
+
+import argparse
+import gzip
+import json
+import time
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.responses import ModelJSONResponse
+from app.models.dashboard import (
+    DashboardOverviewResponse,
+    DashboardPlatformSummary,
+    DashboardQuickMetric,
+    DashboardTrendingHighlights,
+    DashboardViralHighlights,
+)
+from app.models.trends import TrendingVideo
+from app.models.viral_finder import ViralVideo
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional dependency
+    brotli = None
+
+
+def _trending(index: int) -> TrendingVideo:
+    return TrendingVideo(
+        platform="YouTube",
+        title=f"【衝撃】たった3分で変わる朝の筋トレルーティン #{index}",
+        channel_name=f"フィットネスチャンネル{index % 7}",
+        video_id=f"vid{index:05d}",
+        url=f"https://www.youtube.com/shorts/vid{index:05d}",
+        thumbnail_url=f"https://i.ytimg.com/vi/vid{index:05d}/hqdefault.jpg",
+        view_count=120_000 + index * 3_517,
+        like_count=4_000 + index * 11,
+        comment_count=150 + index,
+        published_at="2025-01-15T10:00:00Z",
+        duration="PT45S",
+        tags=["筋トレ", "ダイエット", "朝活", "shorts", f"タグ{index % 9}"],
+        description="毎朝3分でできる簡単な筋トレを紹介します。道具は不要、自宅でできます。" * 6,
+        why_trending="短時間で効果を実感できる具体的な方法を冒頭で提示しているため。",
+    )
+
+
+def _viral(index: int) -> ViralVideo:
+    return ViralVideo(
+        platform="YouTube",
+        title=f"登録者500人なのに100万回再生された理由 #{index}",
+        channel_name=f"小規模チャンネル{index}",
+        subscriber_count=500 + index * 40,
+        view_count=1_000_000 - index * 9_000,
+        video_id=f"viral{index:05d}",
+        url=f"https://www.youtube.com/watch?v=viral{index:05d}",
+        thumbnail_url=f"https://i.ytimg.com/vi/viral{index:05d}/hqdefault.jpg",
+        like_count=20_000,
+        comment_count=800,
+        published_at="2025-02-01T09:00:00Z",
+        viral_ratio=round((1_000_000 - index * 9_000) / (500 + index * 40), 2),
+        why_viral="視聴者の共感を呼ぶストーリー構成と、結論を先に示すフックが効いている。",
+        key_takeaways=["冒頭3秒で結論を見せる", "数字を入れたタイトル", "コメントを促す問いかけ"],
+    )
+
+
+def build_response(videos: int) -> DashboardOverviewResponse:
+    trending = [_trending(i) for i in range(videos // 2)]
+    viral = [_viral(i) for i in range(videos - len(trending))]
+    return DashboardOverviewResponse(
+        persona_keywords=["筋トレ", "ダイエット"],
+        channel_goal="半年で登録者1万人",
+        quick_metrics=[
+            DashboardQuickMetric(id=f"m{i}", label="指標", value=f"{i * 1000:,}", context="説明")
+            for i in range(6)
+        ],
+        trending=DashboardTrendingHighlights(
+            overall_insights=["短尺で結論を先に示す動画が伸びている"] * 5,
+            platform_summaries=[
+                DashboardPlatformSummary(
+                    platform="YouTube",
+                    total_videos=len(trending),
+                    total_views=sum(v.view_count for v in trending),
+                    average_views=sum(v.view_count for v in trending) // len(trending),
+                    top_videos=trending,
+                    insights=["朝の習慣化ネタが強い"] * 3,
+                )
+            ],
+            top_video=trending[0],
+            top_tags=["筋トレ", "ダイエット", "朝活"],
+        ),
+        viral=DashboardViralHighlights(
+            videos=viral,
+            insights=["具体的な数字を含むタイトル"] * 5,
+            content_strategies=["ビフォーアフターを冒頭に置く"] * 5,
+        ),
+        recommended_actions=["週3本のショートを投稿する"] * 6,
+    )
+
+
+def _time(label: str, encode: Callable[[], bytes], repeat: int) -> bytes:
+    body = encode()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        encode()
+    per_call = (time.perf_counter() - start) / repeat * 1000
+    print(f"{label:<40} {per_call:7.3f} ms/response")
+    return body
+
+
+def main(videos: int, repeat: int, level: int) -> None:
+    model = build_response(videos)
+    adapter = TypeAdapter(DashboardOverviewResponse)
+
+    def classic() -> bytes:
+        validated = adapter.validate_python(model)
+        return json.dumps(
+            jsonable_encoder(validated), ensure_ascii=False, separators=(",", ":")
+        ).encode("utf-8")
+
+    print(f"dashboard response with {videos} videos, {repeat} iterations")
+    body = _time("classic (validate + jsonable_encoder)", classic, repeat)
+    _time("ModelJSONResponse (model_dump_json)", lambda: ModelJSONResponse(model).body, repeat)
+    if orjson is not None:
+        _time("orjson(model_dump(mode='json'))", lambda: orjson.dumps(model.model_dump(mode="json")), repeat)
+
+    print()
+    print(f"{'identity':<20} {len(body):>8,} bytes")
+    gz = _time(f"gzip level {level}", lambda: gzip.compress(body, compresslevel=level), repeat)
+    print(f"{'gzip':<20} {len(gz):>8,} bytes ({len(gz) / len(body):.1%})")
+    if brotli is not None:
+        br = _time(f"brotli quality {level}", lambda: brotli.compress(body, quality=level), repeat)
+        print(f"{'brotli':<20} {len(br):>8,} bytes ({len(br) / len(body):.1%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--videos", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--level", type=int, default=6)
+    args = parser.parse_args()
+    main(args.videos, args.repeat, args.level)
@@ -0,0 +1,157 @@
+"""Measure what the content-addressed video store saves on analysis history.
+
+Reads history rows from a local SQLite history database (``--sqlite``), a
+JSON-lines export of the Supabase table (``--jsonl``, one row object per
+line, e.g. ``select row_to_json(h) from analysis_history h``) or, without
+either, a synthetic history where popular videos recur across runs. Reports
+the stored ``result`` bytes inline and with videos split out, then times
+``get_run``/``list_runs`` on SQLite with and without the store.
+
+    cd backend && python -m benchmarks.video_store --sqlite analysis_history.db
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sqlite3
+import time
+from typing import Any, Dict, List
+
+from app.core.config import settings
+from app.core.video_refs import REF_KEY, extract_videos
+from app.models.analysis import AnalysisRunCreate
+from app.repositories.analysis_history import SQLiteAnalysisHistoryRepository, decode_blobs
+from app.services.analysis_history import AnalysisHistoryService
+
+USER_ID = "00000000-0000-0000-0000-000000000001"
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, ensure_ascii=False).encode("utf-8"))
+
+
+def load_sqlite(path: str) -> List[Dict[str, Any]]:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    rows = [dict(row) for row in conn.execute("SELECT * FROM analysis_history")]
+    for row in rows:
+        for column in ("keywords", "platforms", "meta", "result"):
+            row[column] = json.loads(row[column]) if row[column] else None
+    return [decode_blobs(row) for row in rows]
+
+
+def load_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [decode_blobs(json.loads(line)) for line in f if line.strip()]
+
+
+def synthetic(runs: int, catalog: int, seed: int = 7) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    videos = [
+        {
+            "platform": "YouTube",
+            "title": f"【保存版】自宅でできる筋トレ {n} 選",
+            "channel_name": f"フィットネスチャンネル{n % 97}",
+            "video_id": f"vid{n:08d}",
+            "url": f"https://www.youtube.com/watch?v=vid{n:08d}",
+            "thumbnail_url": f"https://i.ytimg.com/vi/vid{n:08d}/hqdefault.jpg",
+            "published_at": "2026-09-01T00:00:00Z",
+            "tags": ["筋トレ", "ダイエット", "ホームトレーニング"],
+            "description": "毎日10分の簡単なトレーニングで体を引き締めましょう。" * 8,
+        }
+        for n in range(catalog)
+    ]
+    # Zipf-like popularity: the same few videos show up in many runs.
+    weights = [1 / (rank + 1) for rank in range(catalog)]
+    rows = []
+    for index in range(runs):
+        picked = {id(video): video for video in rng.choices(videos, weights, k=15)}.values()
+        items = [
+            {**video, "view_count": rng.randint(1000, 10**6), "subscriber_count": 5000,
+             "viral_ratio": rng.uniform(3, 50), "why_viral": "サムネイルの意外性", "key_takeaways": ["冒頭5秒"]}
+            for video in picked
+        ]
+        rows.append({
+            "analysis_type": "viral",
+            "keywords": ["筋トレ"],
+            "platforms": ["YouTube"],
+            "summary": f"バイラル分析 #{index}",
+            "meta": {},
+            "result": {"videos": items, "insights": [], "content_strategies": []},
+        })
+    return rows
+
+
+def report(rows: List[Dict[str, Any]]) -> None:
+    videos: Dict[str, Dict[str, Any]] = {}
+    inline = referenced = items = 0
+    start = time.perf_counter()
+    for row in rows:
+        result = row.get("result") or {}
+        inline += _size(result)
+        stored = extract_videos(result, videos)
+        referenced += _size(stored)
+        items += json.dumps(stored).count(f'"{REF_KEY}"')
+    elapsed = time.perf_counter() - start
+    store = sum(_size(video) + 32 for video in videos.values())
+    total = referenced + store
+    print(f"runs                {len(rows):>12}")
+    print(f"videos in results   {items:>12}")
+    print(f"distinct videos     {len(videos):>12}")
+    print(f"result bytes inline {inline:>12}")
+    print(f"runs + video store  {total:>12}  ({referenced} runs, {store} videos)")
+    if inline:
+        print(f"reduction           {1 - total / inline:>12.1%}")
+    if rows:
+        print(f"extract per run     {elapsed / len(rows) * 1e6:>10.1f}us")
+
+
+async def time_reads(rows: List[Dict[str, Any]], repeat: int) -> None:
+    payloads = [
+        AnalysisRunCreate(
+            analysis_type=row.get("analysis_type") or "viral",
+            keywords=row.get("keywords") or [],
+            platforms=row.get("platforms") or [],
+            summary=row.get("summary"),
+            meta=row.get("meta") or {},
+            result=row.get("result") or {},
+        )
+        for row in rows
+    ]
+    for enabled in (False, True):
+        settings.ANALYSIS_HISTORY_VIDEO_STORE = enabled
+        service = AnalysisHistoryService(SQLiteAnalysisHistoryRepository(":memory:"))
+        saved = await service.save_runs(USER_ID, payloads)
+        run_id = saved[len(saved) // 2].id
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await service.get_run(USER_ID, run_id)
+        get_ms = (time.perf_counter() - start) / repeat * 1000
+        start = time.perf_counter()
+        for _ in range(repeat):
+            await service.list_runs(USER_ID, None, limit=20, prefetch=False)
+        list_ms = (time.perf_counter() - start) / repeat * 1000
+        label = "video store" if enabled else "inline"
+        print(f"{label:<12} get_run {get_ms:7.3f}ms  list_runs(20) {list_ms:7.3f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--sqlite", help="analysis_history SQLite database")
+    source.add_argument("--jsonl", help="analysis_history rows exported as JSON lines")
+    parser.add_argument("--runs", type=int, default=2000, help="synthetic runs")
+    parser.add_argument("--catalog", type=int, default=3000, help="distinct synthetic videos")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    if args.sqlite:
+        history = load_sqlite(args.sqlite)
+    elif args.jsonl:
+        history = load_jsonl(args.jsonl)
+    else:
+        history = synthetic(args.runs, args.catalog)
+    report(history)
+    if history:
+        asyncio.run(time_reads(history, args.repeat))
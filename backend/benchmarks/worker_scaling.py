@@ -0,0 +1,125 @@
+"""Throughput of the API as the number of uvicorn worker processes grows.
+
+Starts the fake YouTube and Gemini servers once, then for each worker count
+launches ``uvicorn --workers N`` against them (SQLite history, shared SQLite
+cache) and drives the CPU-heavy endpoints at a fixed concurrency. The
+response caches are disabled by default so every request does the full
+work; ``--cache`` turns them on to show one worker's results serving the
+others. Speedup is relative to the first worker count. Scaling is bounded
+by the cores available (``os.cpu_count()`` is printed) and by the fake
+upstreams, which share this process.
+
+    cd backend && python -m benchmarks.worker_scaling --workers 1 2 4 --requests 200 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Dict
+
+import httpx
+
+from .e2e import API, KEYWORDS, _analytics_csv, _drive, _free_port, _wait_ready
+from .fake_gemini import FakeGeminiServer
+from .fake_youtube import FakeYouTubeServer
+
+
+def _scenarios() -> Dict:
+    csv_body = _analytics_csv(200)
+    trends_request = {"persona_keywords": KEYWORDS, "platforms": ["YouTube"], "max_results_per_platform": 10}
+    return {
+        "trends/analyze": lambda c: c.post(f"{API}/trends/analyze", json=trends_request),
+        "dashboard/overview": lambda c: c.post(
+            f"{API}/dashboard/overview", json={"persona_keywords": KEYWORDS, "platforms": ["YouTube"]}
+        ),
+        "analytics/analyze-csv": lambda c: c.post(
+            f"{API}/analytics/analyze-csv", files={"file": ("analytics.csv", csv_body, "text/csv")}
+        ),
+    }
+
+
+def _start_api(port: int, workers: int, youtube, gemini, cache_path: str, cache: bool, server_logs: bool):
+    ttl = {} if cache else {"YOUTUBE_CACHE_TTL": "0", "LLM_CACHE_TTL": "0", "DASHBOARD_CACHE_TTL": "0"}
+    env = dict(
+        os.environ,
+        YOUTUBE_API_KEY="benchmark",
+        YOUTUBE_API_ENDPOINT=youtube.endpoint,
+        GEMINI_API_KEY="benchmark",
+        GEMINI_API_ENDPOINT=gemini.endpoint,
+        ANALYSIS_HISTORY_BACKEND="sqlite",
+        CACHE_BACKEND="sqlite",
+        CACHE_SQLITE_PATH=cache_path,
+        **ttl,
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=Path(__file__).resolve().parent.parent,
+        env=env,
+        stdout=None if server_logs else subprocess.DEVNULL,
+        stderr=None if server_logs else subprocess.DEVNULL,
+    )
+
+
+async def run(args) -> Dict[int, Dict[str, Dict]]:
+    youtube = FakeYouTubeServer(latency=args.latency).start()
+    gemini = FakeGeminiServer(latency=args.latency).start()
+    results: Dict[int, Dict[str, Dict]] = {}
+    try:
+        for workers in args.workers:
+            port = _free_port()
+            with tempfile.TemporaryDirectory() as tmp:
+                process = _start_api(port, workers, youtube, gemini, os.path.join(tmp, "cache.db"),
+                                     args.cache, args.server_logs)
+                base_url = f"http://127.0.0.1:{port}"
+                try:
+                    await _wait_ready(base_url, process, timeout=60.0)
+                    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+                    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120.0) as client:
+                        results[workers] = {}
+                        for name, call in _scenarios().items():
+                            if args.only and name not in args.only:
+                                continue
+                            # Enough warmup requests to reach every worker.
+                            await _drive(client, call, max(args.warmup, workers * 2), args.concurrency)
+                            results[workers][name] = await _drive(client, call, args.requests, args.concurrency)
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+    finally:
+        youtube.stop()
+        gemini.stop()
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--requests", type=int, default=100, help="requests per endpoint and worker count")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--warmup", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.0, help="upstream latency in seconds")
+    parser.add_argument("--cache", action="store_true", help="keep the YouTube/LLM/dashboard caches on")
+    parser.add_argument("--only", nargs="*", help="endpoints to run, e.g. trends/analyze")
+    parser.add_argument("--server-logs", action="store_true", help="show the API server's output")
+    args = parser.parse_args()
+
+    print(f"cpu_count={os.cpu_count()} cache={'on' if args.cache else 'off'}")
+    results = asyncio.run(run(args))
+
+    base = results[args.workers[0]]
+    for name in base:
+        print(f"\n{name}")
+        for workers, by_name in results.items():
+            stats = by_name[name]
+            speedup = stats["rps"] / base[name]["rps"] if base[name]["rps"] else 0.0
+            print(f"  workers={workers:<3} {stats['rps']:8.1f} rps  x{speedup:4.2f}  "
+                  f"p50={stats['p50_ms']:8.1f}ms p95={stats['p95_ms']:8.1f}ms errors={stats['errors']}")
+
+
+if __name__ == "__main__":
+    main()
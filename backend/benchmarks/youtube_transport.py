@@ -0,0 +1,96 @@
+"""Compare the default httplib2 transport with ``PooledHttp``.
+
+Runs 100 sequential and 100 parallel ``videos().list`` calls against the
+local fake YouTube server and prints p50/p99 latency plus the number of TCP
+connections the server accepted.
+
+    cd backend && python -m benchmarks.youtube_transport
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List
+
+import httplib2
+from googleapiclient.discovery import build
+
+from app.core.youtube_client import build_youtube_client
+
+from .fake_youtube import FakeYouTubeServer, video_ids
+
+
+def _percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def _timed(call: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    call()
+    return (time.perf_counter() - start) * 1000
+
+
+def _run(label: str, transport_factory, calls: int, workers: int, latency: float) -> None:
+    server = FakeYouTubeServer(latency=latency).start()
+    try:
+        client, execute = transport_factory(server.endpoint)
+        ids = ",".join(video_ids(10))
+
+        def one_call(_=None) -> float:
+            return _timed(lambda: execute(client.videos().list(part="snippet,statistics", id=ids)))
+
+        if workers == 1:
+            samples = [one_call() for _ in range(calls)]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                samples = list(executor.map(one_call, range(calls)))
+
+        print(
+            f"{label:<34} p50={statistics.median(samples):7.2f}ms "
+            f"p99={_percentile(samples, 99):7.2f}ms connections={server.connections}"
+        )
+    finally:
+        server.stop()
+
+
+def default_transport(endpoint: str):
+    # httplib2.Http is not thread-safe, so the only safe way to use the stock
+    # transport from several threads is a fresh Http (and connection) per call.
+    client = build(
+        "youtube",
+        "v3",
+        developerKey="bench",
+        http=httplib2.Http(timeout=15),
+        client_options={"api_endpoint": endpoint},
+        static_discovery=True,
+    )
+    return client, lambda request: request.execute(http=httplib2.Http(timeout=15))
+
+
+def pooled_transport(pool_size: int):
+    def factory(endpoint: str):
+        client = build_youtube_client(
+            "bench", pool_size=pool_size, timeout=15, num_retries=0, api_endpoint=endpoint
+        )
+        return client, lambda request: request.execute()
+
+    return factory
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.005, help="server-side latency in seconds")
+    args = parser.parse_args()
+
+    for mode, workers in (("sequential", 1), ("parallel", args.workers)):
+        _run(f"default httplib2 ({mode})", default_transport, args.calls, workers, args.latency)
+        _run(f"PooledHttp ({mode})", pooled_transport(args.workers), args.calls, workers, args.latency)
+
+
+if __name__ == "__main__":
+    main()
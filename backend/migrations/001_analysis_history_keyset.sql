@@ -0,0 +1,26 @@
+-- Keyset pagination for analysis_history.
+--
+-- list_runs / list_runs_by_channel page with an opaque (created_at, id)
+-- cursor and ORDER BY created_at DESC, id DESC. Each index below matches one
+-- filter combination used by AnalysisHistoryService, so a page is a single
+-- index range scan regardless of how deep it is:
+--
+--   WHERE user_id = $1 [AND channel_id = $2] [AND analysis_type = $3]
+--     AND (created_at, id) < ($cursor_created_at, $cursor_id)
+--   ORDER BY created_at DESC, id DESC
+--   LIMIT $limit + 1
+--
+-- The same indexes also back the per-user / per-channel count queries used
+-- by the stats endpoints.
+
+CREATE INDEX IF NOT EXISTS analysis_history_user_keyset_idx
+    ON public.analysis_history (user_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS analysis_history_user_type_keyset_idx
+    ON public.analysis_history (user_id, analysis_type, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS analysis_history_user_channel_keyset_idx
+    ON public.analysis_history (user_id, channel_id, created_at DESC, id DESC);
+
+CREATE INDEX IF NOT EXISTS analysis_history_user_channel_type_keyset_idx
+    ON public.analysis_history (user_id, channel_id, analysis_type, created_at DESC, id DESC);
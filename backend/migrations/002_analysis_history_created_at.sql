@@ -0,0 +1,12 @@
+-- Recent keywords across all users.
+--
+-- The viral candidate crawler reads the keywords of the newest runs of every
+-- user to decide which queries to harvest:
+--
+--   SELECT keywords, channel_id FROM analysis_history
+--   WHERE created_at >= $since ORDER BY created_at DESC LIMIT $limit
+--
+-- The keyset indexes all lead with user_id, so this needs its own index.
+
+CREATE INDEX IF NOT EXISTS analysis_history_created_idx
+    ON public.analysis_history (created_at DESC);
@@ -0,0 +1,29 @@
+-- Full-text search over analysis history.
+--
+-- GET /api/v1/analysis/search matches every search term anywhere in a run's
+-- keywords, summary, video titles, channel names and insights:
+--
+--   SELECT ... FROM analysis_history
+--   WHERE user_id = $user AND search_document ILIKE '%term%' [AND ...]
+--   ORDER BY created_at DESC LIMIT $limit
+--
+-- The backend writes search_document (NFKC, case-folded) on insert. A trigram
+-- index serves ILIKE '%term%' for Japanese as well, as it needs no word
+-- segmentation. Terms shorter than three characters still work but fall
+-- back to scanning the user's rows.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE public.analysis_history
+    ADD COLUMN IF NOT EXISTS search_document text;
+
+-- Rows saved before this migration: an approximation of the backend's
+-- document (the whole result instead of the searchable fields only).
+UPDATE public.analysis_history
+SET search_document = lower(
+    coalesce(summary, '') || E'\n' || coalesce(keywords::text, '') || E'\n' || coalesce(result::text, '')
+)
+WHERE search_document IS NULL;
+
+CREATE INDEX IF NOT EXISTS analysis_history_search_idx
+    ON public.analysis_history USING gin (search_document gin_trgm_ops);
@@ -0,0 +1,18 @@
+-- Content-addressed video store for analysis history.
+--
+-- With ANALYSIS_HISTORY_VIDEO_STORE=true the backend writes the fields that
+-- describe a video (title, channel, url, thumbnail, tags, description...)
+-- once per distinct content, keyed by a hash of that content, and each run's
+-- result keeps {"video_ref": hash} plus its own fields (view counts,
+-- why_viral, viral_ratio...). Reads fetch all videos of a run or a page with
+-- one `hash IN (...)` query. Existing rows keep their inline videos and are
+-- read as before.
+
+CREATE TABLE IF NOT EXISTS public.analysis_videos (
+    hash text PRIMARY KEY,
+    video jsonb NOT NULL,
+    created_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Only the backend (service role) reads and writes this table.
+ALTER TABLE public.analysis_videos ENABLE ROW LEVEL SECURITY;
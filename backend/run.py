@@ -1,9 +1,26 @@
+import argparse
+import os
+
 import uvicorn
 
+from app.core.config import settings
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the API server")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")))
+    # With more than one worker the server runs in production mode (no reload);
+    # use CACHE_BACKEND=sqlite so the workers share caches and ETag versions.
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    args = parser.parse_args()
+    if args.workers > 1 and settings.CACHE_BACKEND == "memory":
+        # Per-worker ETag versions would answer 304 with another worker's stale tag
+        parser.error("--workers > 1 needs CACHE_BACKEND=sqlite; with memory each worker has its own caches and ETag versions")
+
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        reload=args.workers == 1
     )